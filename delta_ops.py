@@ -1,20 +1,107 @@
 """
 DELTA OPS DASHBOARD
 4 Tabs: Dashboard | Operational Issues | Circular Implementation | Task Reminders
-Ops data stored in:      DELTA_OPS_data.csv
-Circular data stored in: DELTA_OPS_circular_data.csv
-Task data stored in:     DELTA_OPS_task_data.csv
+All data stored in:      DELTA_OPS.db (SQLite — tables ops_data, circular_data, task_data)
+Legacy / parquet store:  DELTA_OPS_data.parquet, DELTA_OPS_circular_data.parquet,
+                         DELTA_OPS_task_data.parquet (migrated from the matching .csv files)
+Startup timings:         DELTA_OPS_PROFILE=1 streamlit run delta_ops.py
+Batch commands:          python delta_ops.py {validate,import,export,report,remind} --help
 """
 
 import os
 import io
+import sys
+import json
+import time
+import atexit
+import sqlite3
+import builtins
+import threading
+import uuid
 import html as _html
+from difflib import SequenceMatcher
+from functools import partial
+from datetime import datetime, date, timedelta, timezone
+
+# ─── Startup profile (DELTA_OPS_PROFILE=1) ────────────────────────────────────
+# Reports how long each package took to import — on first use, wherever that
+# happens — and how long each stage of a script run took, to stderr and at
+# the foot of the page. plotly, gspread/google-auth and pyarrow are imported
+# inside the functions that need them, so they only show up once used.
+PROFILE_STARTUP = os.environ.get("DELTA_OPS_PROFILE", "") not in ("", "0")
+
+
+def _install_import_timer() -> dict:
+    """
+    Wrap __import__ so the first import of each module is timed, inclusive
+    of what it pulls in, and booked to its top-level package. Installed
+    once per process; returns the process-wide {package: seconds}.
+    """
+    current = builtins.__import__
+    if hasattr(current, "import_times"):
+        return current.import_times
+    times, local = {}, threading.local()
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules or getattr(local, "busy", False):
+            return current(name, globals, locals, fromlist, level)
+        local.busy = True
+        started = time.perf_counter()
+        try:
+            return current(name, globals, locals, fromlist, level)
+        finally:
+            local.busy = False
+            top = name.partition(".")[0]
+            times[top] = times.get(top, 0.0) + time.perf_counter() - started
+
+    timed_import.import_times = times
+    builtins.__import__ = timed_import
+    return times
+
+
+_import_times = _install_import_timer() if PROFILE_STARTUP else {}
+_run_phases = []                      # (stage, seconds) for this script run
+_phase_started = time.perf_counter()
+
+
+def profile_phase(stage: str):
+    """Close the current stage of the script run (no-op unless profiling)."""
+    global _phase_started
+    if PROFILE_STARTUP:
+        now = time.perf_counter()
+        _run_phases.append((stage, now - _phase_started))
+        _phase_started = now
+
+
+def report_startup_profile(open_tab: str):
+    """Close the run's last stage and report stage and import timings."""
+    profile_phase(f"tab: {open_tab}")
+    lines = [f"{'stage':<32}{'ms':>10}"]
+    lines += [f"{stage:<32}{secs * 1000:>10.1f}" for stage, secs in _run_phases]
+    lines.append(f"{'total':<32}{sum(secs for _, secs in _run_phases) * 1000:>10.1f}")
+    lines.append("")
+    lines.append(f"{'first import (process)':<32}{'ms':>10}")
+    lines += [f"{pkg:<32}{secs * 1000:>10.1f}"
+              for pkg, secs in sorted(_import_times.items(), key=lambda kv: -kv[1])]
+    report = "\n".join(lines)
+    print(f"[delta-ops] startup profile\n{report}", file=sys.stderr)
+    with st.expander("Startup profile"):
+        st.code(report, language=None)
+
+
 import pandas as pd
 import numpy as np
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, date, timedelta
+
+# `python delta_ops.py <command>` runs the command line (see "Command line"
+# below) instead of the page; Streamlit's bare-mode warnings are muted.
+HEADLESS = __name__ == "__main__" and not st.runtime.exists()
+if HEADLESS:
+    from streamlit import config as _st_config, logger as _st_logger
+    _st_config.set_option("logger.level", "error")   # parses the config first, which resets the level
+    _st_logger.set_log_level("error")
+
+profile_phase("imports")
 
 # ─── Page config ──────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -83,6 +170,14 @@ html, body, .stApp {
     color: var(--muted);
     letter-spacing: 0.08em;
 }
+.ops-sync {
+    color: var(--med);
+    border: 1px solid rgba(255,170,0,0.3);
+    border-radius: 3px;
+    padding: 2px 8px;
+    margin-right: 14px;
+}
+.ops-sync.err { color: var(--hi); border-color: rgba(255,68,102,0.4); }
 
 /* ── Tab bar ── */
 .stTabs [data-baseweb="tab-list"] {
@@ -458,6 +553,16 @@ div[data-testid="stExpander"] { border-color: var(--border) !important; backgrou
 .upload-err  { border-left: 3px solid var(--hi);  }
 .upload-warn { border-left: 3px solid var(--med); }
 
+/* ── Pagination ── */
+.page-info {
+    font-family: 'IBM Plex Mono', monospace;
+    font-size: 10px;
+    letter-spacing: 0.12em;
+    color: var(--muted);
+    text-align: center;
+    padding-top: 12px;
+}
+
 /* ── Radio override ── */
 .stRadio > div { gap: 6px !important; }
 .stRadio label { color: var(--text) !important; font-size: 12px !important; }
@@ -540,15 +645,38 @@ div[data-testid="stExpander"] { border-color: var(--border) !important; backgrou
 </style>""", unsafe_allow_html=True)
 
 
+profile_phase("page config + styles")
+
 # ─── Data layer ───────────────────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(__file__)
 OPS_CSV    = os.path.join(BASE_DIR, "DELTA_OPS_data.csv")
 CIRC_CSV   = os.path.join(BASE_DIR, "DELTA_OPS_circular_data.csv")
 TASK_CSV   = os.path.join(BASE_DIR, "DELTA_OPS_task_data.csv")
 
-OPS_COLUMNS  = ["team", "issue_description", "issue_date", "reported_to", "severity", "status"]
-CIRC_COLUMNS = ["team", "circular_description", "due_date", "reported_to", "severity", "status"]
-TASK_COLUMNS = ["team", "issue_description", "due_date", "task", "severity", "status"]
+# Primary local store (typed, columnar). CSVs above are migrated on first load
+# and only written when pyarrow is unavailable; Export buttons still give CSV.
+OPS_STORE  = os.path.join(BASE_DIR, "DELTA_OPS_data.parquet")
+CIRC_STORE = os.path.join(BASE_DIR, "DELTA_OPS_circular_data.parquet")
+TASK_STORE = os.path.join(BASE_DIR, "DELTA_OPS_task_data.parquet")
+
+# Local storage engine: "sqlite" (default — indexed, row-level writes, WAL) or
+# "parquet" (the files above). SQLite migrates the Parquet / CSV files once.
+LOCAL_BACKEND = "sqlite"
+DB_PATH       = os.path.join(BASE_DIR, "DELTA_OPS.db")
+
+# Every change made in the app is appended to a journal in DB_PATH, which is
+# also the audit trail. The local store is a snapshot the journal tail is
+# folded into: on each save with SQLite, every JOURNAL_COMPACT_EVERY events
+# with Parquet; loads replay whatever tail is left.
+JOURNAL_COMPACT_EVERY = 200
+
+# Every record carries a persistent unique key; updates and deletes target it.
+ID_COL       = "record_id"
+OPS_COLUMNS  = ["team", "issue_description", "issue_date", "reported_to", "severity", "status", ID_COL]
+CIRC_COLUMNS = ["team", "circular_description", "due_date", "reported_to", "severity", "status", ID_COL]
+TASK_COLUMNS = ["team", "issue_description", "due_date", "task", "severity", "status", ID_COL]
+
+DATE_FMT     = "%d-%m-%Y"   # on-disk / on-sheet date format
 
 OPS_TEAMS    = ["DP", "BROKING", "EAGLE"]
 CIRC_TEAMS   = ["DP", "BROKING", "EAGLE", "COMPLIANCE"]
@@ -564,12 +692,324 @@ GS_TAB_OPS  = "ops_data"
 GS_TAB_CIRC = "circular_data"
 GS_TAB_TASK = "task_data"
 
+# Closed vocabularies. Loaders and the upload validator return these columns
+# as ordered Categoricals: the vocabulary first, in its semantic order (so
+# severity sorts High → Medium → Low), then any other values found.
+CATEGORIES = {
+    "ops":  {"team": OPS_TEAMS,  "reported_to": OPS_REPORTED_TO,  "severity": SEVERITIES, "status": STATUSES},
+    "circ": {"team": CIRC_TEAMS, "reported_to": CIRC_REPORTED_TO, "severity": SEVERITIES, "status": STATUSES},
+    "task": {"team": TASK_TEAMS, "task": TASK_TYPES,              "severity": SEVERITIES, "status": STATUSES},
+}
+# Stored as categoricals in the local store
+CATEGORY_COLS = ["team", "reported_to", "task", "severity", "status"]
+
+# Dataset → (SQLite table, columns, date columns). Sheet tab names double as table names.
+SQL_DATASETS = {
+    "ops":  (GS_TAB_OPS,  OPS_COLUMNS,  ["issue_date"]),
+    "circ": (GS_TAB_CIRC, CIRC_COLUMNS, ["due_date"]),
+    "task": (GS_TAB_TASK, TASK_COLUMNS, ["due_date"]),
+}
+# Dataset → (Parquet store, CSV) for the file backend
+LOCAL_FILES = {"ops": (OPS_STORE, OPS_CSV), "circ": (CIRC_STORE, CIRC_CSV), "task": (TASK_STORE, TASK_CSV)}
+
+
+def as_categories(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    df with the CATEGORIES[name] columns as ordered Categoricals. Values
+    outside the vocabulary become extra categories after it. Columns that
+    are already in shape are left alone; df itself is not modified.
+    """
+    converted = {}
+    for col, vocab in CATEGORIES[name].items():
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            if s.cat.ordered and list(s.cat.categories[:len(vocab)]) == vocab:
+                continue
+            extra = sorted(c for c in s.cat.categories.astype(str) if c not in vocab)
+            # set_categories only remaps the codes
+            converted[col] = s.cat.rename_categories(s.cat.categories.astype(str)) \
+                              .cat.set_categories(vocab + extra, ordered=True)
+        else:
+            s = s.astype(str).where(s.notna())
+            extra = sorted(v for v in pd.unique(s.dropna()) if v not in vocab)
+            converted[col] = pd.Categorical(s, categories=vocab + extra, ordered=True)
+    return df.assign(**converted) if converted else df
+
+
+def append_row(df: pd.DataFrame, row: dict, name: str) -> pd.DataFrame:
+    """df plus one new record; categorical columns stay categorical without a rebuild."""
+    row = {**row, ID_COL: new_ids(1)[0]}
+    same = {c: df[c].dtype for c, v in row.items()
+            if isinstance(df[c].dtype, pd.CategoricalDtype) and v in df[c].cat.categories}
+    new = pd.DataFrame([row]).astype(same)
+    if "_urgency" in df.columns:
+        new = with_urgency(new)
+    return as_categories(pd.concat([df, new], ignore_index=True), name)
+
+
+def isin_mask(s: pd.Series, values) -> np.ndarray:
+    """Boolean mask of s in values — compared on the integer codes for Categoricals."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.categories.get_indexer(list(values))
+        return np.isin(s.cat.codes.to_numpy(), codes[codes >= 0])
+    return s.isin(values).to_numpy()
+
+
+# ─── Value index (per-value bitmaps over the filter columns) ─────────────────
+# {"rows": n, "bitmaps": {column: {value: bool array of length n}}}; rows
+# with a missing value sit under None. An index is never modified: the
+# index_* edits return a new one sharing the untouched arrays, so the same
+# index can be handed to every session and to the dashboard.
+INDEX_COLS = ["team", "task", "severity", "status", "_urgency"]
+
+
+def build_value_index(df: pd.DataFrame) -> dict:
+    """One pass over the codes of each INDEX_COLS column of df."""
+    bitmaps = {}
+    for col in INDEX_COLS:
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            codes, values = s.cat.codes.to_numpy(), list(s.cat.categories)
+        else:
+            codes, values = pd.factorize(s)
+        bitmaps[col] = {v: codes == i for i, v in enumerate(values)}
+        bitmaps[col][None] = codes < 0
+    return {"rows": len(df), "bitmaps": bitmaps}
+
+
+def index_mask(index: dict, col: str, values) -> np.ndarray:
+    """Rows whose col is any of values — an OR of their bitmaps."""
+    mask = np.zeros(index["rows"], dtype=bool)
+    for v in values:
+        bits = index["bitmaps"][col].get(v)
+        if bits is not None:
+            mask |= bits
+    return mask
+
+
+def filter_rows(index: dict, filters: dict) -> np.ndarray:
+    """
+    Positions of the rows matching every non-empty {column: [values]}
+    filter: one OR of bitmaps per column, ANDed together. No frame is
+    built — callers take .iloc of just the rows they render or export.
+    """
+    mask = np.ones(index["rows"], dtype=bool)
+    for col, values in filters.items():
+        if values:
+            mask &= index_mask(index, col, values)
+    return np.flatnonzero(mask)
+
+
+def index_counts(index: dict, col: str, within: np.ndarray = None,
+                 include_missing: bool = False) -> pd.Series:
+    """
+    Rows per value of col (popcounts), optionally within a mask; values
+    with no rows left out. Blank / unknown values (the None bitmap) are
+    not a category and are only counted with include_missing, as NaN.
+    """
+    counts = {v: int(np.count_nonzero(bits if within is None else bits & within))
+              for v, bits in index["bitmaps"][col].items()
+              if v is not None or include_missing}
+    return pd.Series({v: n for v, n in counts.items() if n}, dtype="int64")
+
+
+def index_append(index: dict, row: dict) -> dict:
+    """The index with row appended."""
+    bitmaps = {}
+    for col, by_value in index["bitmaps"].items():
+        v = row.get(col)
+        v = None if pd.isna(v) else v
+        by_value = {value: np.append(bits, value == v) for value, bits in by_value.items()}
+        if v not in by_value:
+            by_value[v] = np.append(np.zeros(index["rows"], dtype=bool), True)
+        bitmaps[col] = by_value
+    return {"rows": index["rows"] + 1, "bitmaps": bitmaps}
+
+
+def index_set(index: dict, pos: int, values: dict) -> dict:
+    """The index with row pos's columns set to {column: value} (unindexed columns ignored)."""
+    bitmaps = dict(index["bitmaps"])
+    for col, value in values.items():
+        if col not in bitmaps:
+            continue
+        by_value = dict(bitmaps[col])
+        for v, bits in by_value.items():
+            if bits[pos] or v == value:
+                by_value[v] = bits.copy()
+                by_value[v][pos] = v == value
+        if value not in by_value:
+            by_value[value] = np.zeros(index["rows"], dtype=bool)
+            by_value[value][pos] = True
+        bitmaps[col] = by_value
+    return {"rows": index["rows"], "bitmaps": bitmaps}
+
+
+def index_keep(index: dict, keep: np.ndarray) -> dict:
+    """The index of only the rows where keep is True, in order."""
+    return {"rows": int(np.count_nonzero(keep)),
+            "bitmaps": {col: {v: bits[keep] for v, bits in by_value.items()}
+                        for col, by_value in index["bitmaps"].items()}}
+
+
+# ─── Task urgency (derived columns, rolled over at midnight IST) ────────────
+# Tasks carry three derived columns, computed vectorised when the frame is
+# loaded, merged or edited — never per row while rendering:
+#   _status_norm  status stripped and lower-cased
+#   _days_left    whole days from today (IST) to the due date, NaN without one
+#   _urgency      closed / overdue / today / soon (due within URGENCY_SOON_DAYS) / open
+# _days_left and _urgency depend on the day; the roll-over thread recomputes
+# them for the shared frame at each midnight IST. They are never persisted.
+IST = timezone(timedelta(hours=5, minutes=30))
+URGENCY_SOON_DAYS = 3
+URGENCY_CLASSES   = ["overdue", "today", "soon", "open", "closed"]
+URGENCY_COLS      = ["_status_norm", "_days_left", "_urgency"]
+
+
+def ist_today() -> date:
+    return datetime.now(IST).date()
+
+
+def with_urgency(df: pd.DataFrame, today: date = None) -> pd.DataFrame:
+    """Task frame df with URGENCY_COLS (re)computed for today (default: today in IST)."""
+    status_norm = df["status"].astype(str).str.strip().str.lower()
+    days_left = (pd.to_datetime(df["due_date"], errors="coerce").dt.normalize()
+                 - pd.Timestamp(today or ist_today())).dt.days
+    closed = (status_norm == "closed").to_numpy()
+    urgency = np.select([closed, days_left < 0, days_left == 0, days_left <= URGENCY_SOON_DAYS],
+                        ["closed", "overdue", "today", "soon"], "open")
+    return df.assign(_status_norm=status_norm, _days_left=days_left,
+                     _urgency=pd.Categorical(urgency, categories=URGENCY_CLASSES))
+
+
+def refresh_urgency(df: pd.DataFrame, pos: int):
+    """Recompute row pos's urgency columns in place; no-op for frames without them."""
+    if "_urgency" not in df.columns:
+        return
+    row = with_urgency(df.iloc[[pos]])
+    for col in URGENCY_COLS:
+        df.iloc[pos, df.columns.get_loc(col)] = row[col].iat[0]
+
+
+# ─── Date parsing (format-aware, memoised) ───────────────────────────────────
+# Formats accepted for day-first dates, in order of preference. None of them
+# can read the same string two ways, so a parsed string can be memoised
+# regardless of which column it came from.
+DATE_FORMATS = [DATE_FMT, "%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y", "%Y/%m/%d",
+                "%d-%m-%y", "%d/%m/%y", "%d-%b-%Y", "%d %b %Y", "%Y-%m-%d %H:%M:%S"]
+DATE_SNIFF_ROWS = 200       # distinct values sampled to rank the formats
+DATE_MEMO_MAX   = 200_000   # memoised strings before the memo is reset
+_BLANK_DATES    = ["", "nan", "NaN", "NaT", "None", "none"]
+
+
+@st.cache_resource(show_spinner=False)
+def _date_memo() -> dict:
+    """date string → numpy datetime64 (NaT if unparseable), shared process-wide."""
+    return {}
+
+
+def _parse_date_strings(text: pd.Series) -> np.ndarray:
+    """
+    Parse distinct date strings. The format that reads most of a sample is
+    applied to everything first; the remaining formats only see what is
+    still unparsed, and day-first inference only what no format could read.
+    """
+    out = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    left = text[~text.isin(_BLANK_DATES)]
+    if not left.empty:
+        sample = left.head(DATE_SNIFF_ROWS)
+        # sorted() is stable: ties keep DATE_FORMATS order
+        ranked = sorted(DATE_FORMATS,
+                        key=lambda f: -pd.to_datetime(sample, format=f, errors="coerce").notna().sum())
+        for fmt in ranked:
+            got = pd.to_datetime(left, format=fmt, errors="coerce")
+            hit = got.notna()
+            out[hit[hit].index] = got[hit]
+            left = left[~hit]
+            if left.empty:
+                break
+        if not left.empty:
+            out[left.index] = pd.to_datetime(left, dayfirst=True, errors="coerce", format="mixed")
+    return out.to_numpy()
+
+
+def parse_dates(s: pd.Series) -> pd.Series:
+    """
+    Day-first date column → datetime64 Series (NaT where unparseable).
+    Each distinct string is parsed once — and only once per process, via
+    the memo — then mapped back onto the rows.
+    """
+    s = pd.Series(s)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    codes, uniques = pd.factorize(s)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    memo = _date_memo()
+    values = np.empty(len(text) + 1, dtype="datetime64[ns]")
+    values[-1] = np.datetime64("NaT")   # code -1: missing value
+    todo = []
+    for i, t in enumerate(text):
+        v = memo.get(t)
+        if v is None:
+            todo.append(i)
+        else:
+            values[i] = v
+    if todo:
+        fresh = _parse_date_strings(text.iloc[todo].reset_index(drop=True))
+        if len(memo) + len(todo) > DATE_MEMO_MAX:
+            memo.clear()
+        for i, v in zip(todo, fresh):
+            values[i] = v
+            memo[text.iat[i]] = v
+    return pd.Series(values[codes], index=s.index, name=s.name)
+
 
 # ─── Google Sheets connection (optional — falls back to CSV if not configured) ─
+GS_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+@st.cache_resource(show_spinner=False)
+def _gsheet_pool() -> dict:
+    """
+    Process-wide Google Sheets handle, shared by every session and rerun.
+    Holds the authorised credentials, the opened Spreadsheet and one
+    Worksheet per tab so each read/write skips the OAuth + open_by_key trip.
+    "synced" keeps the rows last read from / written to each tab, which is
+    what _gsheet_write diffs against. "prefetched" holds tab → (fetched at,
+    cell values) from a batched read, for the _gsheet_read that follows.
+    """
+    return {"lock": threading.RLock(), "creds": None, "sheet": None, "tabs": {}, "synced": {},
+            "prefetched": {}}
+
+
+def _reset_gsheet():
+    """Drop the pooled connection — the next call re-authenticates."""
+    pool = _gsheet_pool()
+    with pool["lock"]:
+        pool["creds"] = None
+        pool["sheet"] = None
+        pool["tabs"]  = {}
+        pool["prefetched"] = {}
+
+
+def _is_auth_error(exc: Exception) -> bool:
+    """True for expired/revoked credentials (401/403 or a failed token refresh)."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status in (401, 403) or type(exc).__name__ in ("RefreshError", "UnauthenticatedError")
+
+
 def _get_gsheet():
     """
     Returns a gspread.Spreadsheet object if Google Sheets credentials are
     configured in st.secrets, otherwise returns None (CSV fallback mode).
+    The handle is pooled process-wide; the token is refreshed only once it
+    has expired.
 
     To enable Google Sheets:
     1. Go to console.cloud.google.com → create a Service Account
@@ -594,22 +1034,34 @@ def _get_gsheet():
 
     5. On Streamlit Cloud: paste these into App Settings → Secrets
     """
-    try:
-        import gspread
-        from google.oauth2.service_account import Credentials
-
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        sheet_id   = st.secrets["google_sheets"]["spreadsheet_id"]
-
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
-        creds  = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-        client = gspread.authorize(creds)
-        return client.open_by_key(sheet_id)
-    except Exception:
-        return None  # secrets not set or gspread not installed → use CSV
+    pool = _gsheet_pool()
+    with pool["lock"]:
+        try:
+            if pool["sheet"] is not None:
+                creds = pool["creds"]
+                if creds is not None and not creds.valid:
+                    from google.auth.transport.requests import Request
+                    creds.refresh(Request())
+                return pool["sheet"]
+
+            # Secrets first: without them gspread/google-auth are never imported
+            creds_dict = dict(st.secrets["gcp_service_account"])
+            sheet_id   = st.secrets["google_sheets"]["spreadsheet_id"]
+
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            creds  = Credentials.from_service_account_info(creds_dict, scopes=GS_SCOPES)
+            client = gspread.authorize(creds)
+            pool["sheet"] = client.open_by_key(sheet_id)
+            pool["creds"] = creds
+            pool["tabs"]  = {}
+            return pool["sheet"]
+        except Exception:
+            pool["sheet"] = None
+            pool["creds"] = None
+            pool["tabs"]  = {}
+            return None  # secrets not set or gspread not installed → use CSV
 
 
 def _ensure_tab(sheet, tab_name: str, headers: list):
@@ -622,400 +1074,2753 @@ def _ensure_tab(sheet, tab_name: str, headers: list):
     return ws
 
 
-def _gsheet_read(tab_name: str, columns: list, date_cols: list) -> pd.DataFrame:
-    """Read a sheet tab into a DataFrame. Returns empty DF on any failure."""
+def _get_worksheet(tab_name: str, headers: list):
+    """Pooled Worksheet for tab_name, or None when Sheets is not configured."""
+    sh = _get_gsheet()
+    if sh is None:
+        return None
+    pool = _gsheet_pool()
+    with pool["lock"]:
+        ws = pool["tabs"].get(tab_name)
+        if ws is None:
+            ws = _ensure_tab(sh, tab_name, headers)
+            pool["tabs"][tab_name] = ws
+        return ws
+
+
+def _with_worksheet(tab_name: str, headers: list, fn):
+    """
+    Run fn(ws) against the pooled worksheet. On an auth error the pool is
+    dropped and the call retried once on a fresh connection.
+    Returns None when Sheets is not configured.
+    """
+    for attempt in range(2):
+        ws = _get_worksheet(tab_name, headers)
+        if ws is None:
+            return None
+        try:
+            return fn(ws)
+        except Exception as e:
+            if attempt == 0 and _is_auth_error(e):
+                _reset_gsheet()
+                continue
+            raise
+
+
+def _gsheet_rows(df: pd.DataFrame, columns: list, date_fmt_cols: dict) -> list:
+    """DataFrame → list of row tuples exactly as they are sent to the sheet."""
+    out = df[columns].astype(object)
+    for col, fmt in date_fmt_cols.items():
+        out[col] = pd.to_datetime(out[col], errors="coerce").dt.strftime(fmt).fillna("")
+    return [tuple(r) for r in out.fillna("").values.tolist()]
+
+
+GS_PREFETCH_MAX_AGE = 10   # seconds a batched read stays usable for _gsheet_read
+
+
+def _gsheet_prefetch(tabs: dict):
+    """
+    Fetch several tabs ({tab: headers}) in one values_batch_get round trip
+    and stash their cells for the _gsheet_read calls that follow. Best
+    effort: on any failure nothing is stashed and each read fetches its
+    own tab, failing (and falling back to CSV) on its own.
+    """
     try:
         sh = _get_gsheet()
         if sh is None:
+            return
+        pool = _gsheet_pool()
+        with pool["lock"]:
+            missing = [t for t in tabs if t not in pool["tabs"]]
+            if missing:
+                existing = {ws.title: ws for ws in sh.worksheets()}
+                for t in missing:
+                    pool["tabs"][t] = existing.get(t) or _ensure_tab(sh, t, tabs[t])
+        resp = sh.values_batch_get([f"'{t}'" for t in tabs])
+        fetched_at = time.monotonic()
+        with pool["lock"]:
+            for t, value_range in zip(tabs, resp.get("valueRanges", [])):
+                pool["prefetched"][t] = (fetched_at, value_range.get("values", []))
+    except Exception as e:
+        if _is_auth_error(e):
+            _reset_gsheet()
+
+
+def _sheet_records(values: list, expected_headers: list) -> list:
+    """Cell values, header row first → records, as Worksheet.get_all_records returns them."""
+    from gspread.utils import fill_gaps, numericise_all, to_records
+
+    if not values or values == [[]]:
+        return []
+    keys = values[0]
+    if not all(h in keys for h in expected_headers):
+        raise ValueError(f"unknown headers: {set(expected_headers) - set(keys)}")
+    text_cols = [keys.index(ID_COL) + 1] if ID_COL in keys else []   # record ids stay strings
+    return to_records(keys, [numericise_all(row, ignore=text_cols)
+                             for row in fill_gaps(values[1:], cols=len(keys))])
+
+
+def _gsheet_read(tab_name: str, columns: list, date_cols: list) -> pd.DataFrame:
+    """Read a sheet tab into a DataFrame. Returns empty DF on any failure."""
+    try:
+        pool = _gsheet_pool()
+        with pool["lock"]:
+            fetched_at, values = pool["prefetched"].pop(tab_name, (0.0, None))
+        if time.monotonic() - fetched_at > GS_PREFETCH_MAX_AGE:
+            values = _with_worksheet(tab_name, columns, lambda ws: ws.get(pad_values=True))
+        if values is None:
             return None  # signal: use CSV
-        ws = _ensure_tab(sh, tab_name, columns)
-        records = ws.get_all_records(expected_headers=columns)
+        # Tabs written before record ids lack that header; the ids are then backfilled
+        records = _sheet_records(values, [c for c in columns if c != ID_COL])
         if not records:
-            return pd.DataFrame(columns=columns)
-        df = pd.DataFrame(records)
-        for col in columns:
-            if col not in df.columns:
-                df[col] = ""
-        df = df[columns].copy()
-        for dc in date_cols:
-            df[dc] = pd.to_datetime(df[dc], dayfirst=True, errors="coerce")
+            df = pd.DataFrame(columns=columns)
+        else:
+            df = pd.DataFrame(records)
+            for col in columns:
+                if col not in df.columns:
+                    df[col] = ""
+            df = df[columns].copy()
+            for dc in date_cols:
+                df[dc] = parse_dates(df[dc])
+        if records and ID_COL in records[0]:
+            _gsheet_pool()["synced"][tab_name] = _gsheet_rows(df, columns, {dc: DATE_FMT for dc in date_cols})
+        else:
+            # No snapshot: the next write rewrites the tab, header included
+            _gsheet_pool()["synced"].pop(tab_name, None)
         return df
     except Exception:
         return None  # signal: use CSV
 
 
+def _diff_rows(old_rows: list, new_rows: list) -> list:
+    """
+    Row-level edit script turning old_rows into new_rows, in old-row order
+    (quadratic in the row count — rows with record ids use _diff_records):
+        ("update", i, j, cols)  old row i becomes new row j; cols = changed positions
+        ("delete", i1, i2)      old rows i1..i2-1 removed
+        ("insert", i, rows)     rows inserted before old row i (i == len(old_rows): appended)
+    """
+    script = []
+    opcodes = SequenceMatcher(None, old_rows, new_rows, autojunk=False).get_opcodes()
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        overlap = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for k in range(overlap):
+            cols = [c for c, (ov, nv) in enumerate(zip(old_rows[i1 + k], new_rows[j1 + k])) if ov != nv]
+            script.append(("update", i1 + k, j1 + k, cols))
+        if i2 - i1 > overlap:
+            script.append(("delete", i1 + overlap, i2))
+        if j2 - j1 > overlap:
+            script.append(("insert", i2, new_rows[j1 + overlap:j2]))
+    return script
+
+
+def _diff_records(old_rows: list, new_rows: list, id_pos: int):
+    """
+    The _diff_rows edit script, matching rows on the record id at id_pos
+    rather than on position and content: a record is updated in place,
+    deleted, or inserted before the next record it precedes. None when the
+    ids are missing or repeated, or the kept records changed order.
+    """
+    old_pos = {r[id_pos]: i for i, r in enumerate(old_rows)}
+    new_ids = [r[id_pos] for r in new_rows]
+    if "" in old_pos or "" in new_ids or len(old_pos) < len(old_rows) or len(set(new_ids)) < len(new_ids):
+        return None
+    kept = [old_pos[rid] for rid in new_ids if rid in old_pos]
+    if any(a > b for a, b in zip(kept, kept[1:])):
+        return None
+
+    structural, updates = [], []
+    kept_set = set(kept)
+    i = 0
+    while i < len(old_rows):
+        if i in kept_set:
+            i += 1
+            continue
+        start = i
+        while i < len(old_rows) and i not in kept_set:
+            i += 1
+        structural.append(("delete", start, i))
+    run = []
+    for j, row in enumerate(new_rows):
+        i = old_pos.get(row[id_pos])
+        if i is None:
+            run.append(row)
+            continue
+        if run:
+            structural.append(("insert", i, run))
+            run = []
+        cols = [c for c, (ov, nv) in enumerate(zip(old_rows[i], row)) if ov != nv]
+        if cols:
+            updates.append(("update", i, j, cols))
+    if run:
+        structural.append(("insert", len(old_rows), run))
+    return sorted(structural, key=lambda op: op[1]) + updates
+
+
+def _merge_rows(base_rows: list, our_rows: list, their_rows: list, id_pos: int) -> tuple:
+    """
+    Three-way merge of row tuples keyed on the record id at id_pos: base is
+    the common ancestor, ours and theirs two edits of it. A change made on
+    one side only is kept. Where both sides changed a cell differently, or
+    one side edited a record the other deleted, theirs wins and the clash
+    is reported. Row order: theirs, then records new in ours.
+    Returns (rows, conflicts); a conflict is (record_id, column position,
+    our value, their value), with position None and the whole row (or None
+    where deleted) for an edit/delete clash.
+    """
+    base = {r[id_pos]: r for r in base_rows}
+    ours = {r[id_pos]: r for r in our_rows}
+    rows, conflicts = [], []
+    for t in their_rows:
+        rid = t[id_pos]
+        b, o = base.get(rid), ours.get(rid)
+        if b is None or o == b or o == t:
+            rows.append(t)
+        elif o is None:               # deleted here
+            if t != b:
+                conflicts.append((rid, None, None, t))
+                rows.append(t)
+        elif t == b:
+            rows.append(o)
+        else:
+            cells = list(t)
+            for c, (bv, ov, tv) in enumerate(zip(b, o, t)):
+                if ov != bv:
+                    if tv == bv:
+                        cells[c] = ov
+                    elif tv != ov:
+                        conflicts.append((rid, c, ov, tv))
+            rows.append(tuple(cells))
+    theirs = {r[id_pos] for r in their_rows}
+    for o in our_rows:
+        rid = o[id_pos]
+        if rid in theirs:
+            continue
+        b = base.get(rid)
+        if b is None:
+            rows.append(o)
+        elif o != b:                  # edited here, deleted there
+            conflicts.append((rid, None, o, None))
+    return rows, conflicts
+
+
+def _gsheet_diff_apply(ws, old_rows: list, new_rows: list, columns: list) -> bool:
+    """
+    Bring the sheet from old_rows to new_rows with the fewest calls:
+    changed cells via one batch_update, new rows via append_rows/insert_rows,
+    removed rows via delete_rows. Rows are matched on record id, and the
+    sheet's id column is read first: if it no longer lists old_rows' ids
+    (another process or a person edited the tab), nothing is sent.
+    Returns False (nothing sent) in that case, or when the change is big
+    enough that a full rewrite is cheaper.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    id_pos = columns.index(ID_COL)
+    script = _diff_records(old_rows, new_rows, id_pos)
+    if script is None:
+        return False
+    sheet_ids = ws.col_values(id_pos + 1)[1:]
+    if sheet_ids != [r[id_pos] for r in old_rows]:
+        return False
+    structural = [op for op in script if op[0] != "update"]
+    # +2: sheet rows are 1-based and row 1 is the header
+    cell_updates = [{"range": rowcol_to_a1(j + 2, c + 1), "values": [[new_rows[j][c]]]}
+                    for kind, _, j, cols in (op for op in script if op[0] == "update")
+                    for c in cols]
+
+    if len(structural) > 10 or len(cell_updates) > max(len(new_rows), 1) * len(columns) // 2:
+        return False
+
+    # Structural changes bottom-up so the old row numbers above stay valid
+    for op in reversed(structural):
+        if op[0] == "delete":
+            ws.delete_rows(op[1] + 2, op[2] + 1)
+        elif op[1] >= len(old_rows):
+            ws.append_rows([list(r) for r in op[2]], value_input_option="USER_ENTERED")
+        else:
+            ws.insert_rows([list(r) for r in op[2]], row=op[1] + 2, value_input_option="USER_ENTERED")
+    if cell_updates:
+        ws.batch_update(cell_updates, value_input_option="USER_ENTERED")
+    return True
+
+
 def _gsheet_write(df: pd.DataFrame, tab_name: str, columns: list, date_fmt_cols: dict):
     """
-    Overwrite an entire sheet tab with current DataFrame.
+    Sync a sheet tab with the current DataFrame.
+    Sends only the difference against the last synced snapshot; falls back to
+    overwriting the whole tab when there is no snapshot, the tab has changed
+    since (its record ids differ from the snapshot's) or the diff is large.
+    Returns True on success, False on failure, None if Sheets is not configured.
     date_fmt_cols: {col_name: strftime_format}  e.g. {"issue_date": "%d-%m-%Y"}
     """
     try:
-        sh = _get_gsheet()
-        if sh is None:
-            return False
-        ws = _ensure_tab(sh, tab_name, columns)
-
-        out = df[columns].copy()
-        for col, fmt in date_fmt_cols.items():
-            out[col] = pd.to_datetime(out[col], errors="coerce").dt.strftime(fmt).fillna("")
-
-        # Clear and rewrite — faster than cell-by-cell for small datasets
-        ws.clear()
-        ws.append_row(columns, value_input_option="USER_ENTERED")
-        if len(out) > 0:
-            rows = out.fillna("").values.tolist()
-            ws.append_rows(rows, value_input_option="USER_ENTERED")
-        return True
+        new_rows = _gsheet_rows(df, columns, date_fmt_cols)
+        synced = _gsheet_pool()["synced"]
+
+        def _sync(ws):
+            old_rows = synced.pop(tab_name, None)  # dropped until the write succeeds
+            if old_rows is None or not _gsheet_diff_apply(ws, old_rows, new_rows, columns):
+                # Clear and rewrite
+                ws.clear()
+                ws.append_row(columns, value_input_option="USER_ENTERED")
+                if new_rows:
+                    ws.append_rows([list(r) for r in new_rows], value_input_option="USER_ENTERED")
+            synced[tab_name] = new_rows
+            return True
+
+        return _with_worksheet(tab_name, columns, _sync)
     except Exception:
         return False
 
 
-# ─── Load functions (Google Sheets → CSV fallback) ───────────────────────────
-def load_ops():
-    df = _gsheet_read(GS_TAB_OPS, OPS_COLUMNS, ["issue_date"])
-    if df is not None:
-        return df
-    # CSV fallback
-    if os.path.exists(OPS_CSV):
-        try:
-            df = pd.read_csv(OPS_CSV)
-            for col in OPS_COLUMNS:
-                if col not in df.columns:
-                    df[col] = ""
-            df = df[OPS_COLUMNS].copy()
-            df["issue_date"] = pd.to_datetime(df["issue_date"], dayfirst=True, errors="coerce")
-            return df
-        except Exception:
-            pass
-    return pd.DataFrame(columns=OPS_COLUMNS)
+# ─── Local file store (Parquet, CSV fallback) ────────────────────────────────
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
 
 
-def load_circ():
-    df = _gsheet_read(GS_TAB_CIRC, CIRC_COLUMNS, ["due_date"])
-    if df is not None:
-        return df
-    # CSV fallback
-    if os.path.exists(CIRC_CSV):
-        try:
-            df = pd.read_csv(CIRC_CSV)
-            for col in CIRC_COLUMNS:
-                if col not in df.columns:
-                    df[col] = ""
-            df = df[CIRC_COLUMNS].copy()
-            df["due_date"] = pd.to_datetime(df["due_date"], dayfirst=True, errors="coerce")
+def _read_csv_file(csv_path: str, columns: list, date_cols: list) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+    for col in columns:
+        if col not in df.columns:
+            df[col] = ""
+    df = df[columns].copy()
+    for dc in date_cols:
+        df[dc] = parse_dates(df[dc])
+    return df
+
+
+def _write_store_file(df: pd.DataFrame, store_path: str, columns: list, date_cols: list):
+    """Write df as Parquet: native datetimes, categoricals for CATEGORY_COLS."""
+    out = df[columns].copy()
+    for col in columns:
+        if col in date_cols:
+            out[col] = pd.to_datetime(out[col], errors="coerce")
+        else:
+            out[col] = out[col].astype(object).fillna("").astype(str)
+            if col in CATEGORY_COLS:
+                out[col] = out[col].astype("category")
+    tmp = store_path + ".tmp"
+    out.to_parquet(tmp, index=False)
+    os.replace(tmp, store_path)   # atomic: readers never see a half-written file
+
+
+def _file_read(store_path: str, csv_path: str, columns: list, date_cols: list) -> pd.DataFrame:
+    """Load from the Parquet store; migrate from CSV the first time."""
+    if _parquet_available():
+        if os.path.exists(store_path):
+            try:
+                df = pd.read_parquet(store_path)
+                for col in columns:
+                    if col not in df.columns:
+                        df[col] = ""
+                return df[columns]
+            except Exception:
+                pass
+        if os.path.exists(csv_path):
+            try:
+                df = _read_csv_file(csv_path, columns, date_cols)
+            except Exception:
+                return pd.DataFrame(columns=columns)
+            try:
+                _write_store_file(df, store_path, columns, date_cols)
+            except Exception:
+                pass
             return df
+    elif os.path.exists(csv_path):
+        try:
+            return _read_csv_file(csv_path, columns, date_cols)
         except Exception:
             pass
-    return pd.DataFrame(columns=CIRC_COLUMNS)
+    return pd.DataFrame(columns=columns)
 
 
-def load_task():
-    df = _gsheet_read(GS_TAB_TASK, TASK_COLUMNS, ["due_date"])
-    if df is not None:
-        return df
-    # CSV fallback
-    if os.path.exists(TASK_CSV):
+def _file_write(df: pd.DataFrame, store_path: str, csv_path: str, columns: list, date_cols: list):
+    """Persist to the Parquet store, or to CSV when pyarrow is missing."""
+    if _parquet_available():
         try:
-            df = pd.read_csv(TASK_CSV)
-            for col in TASK_COLUMNS:
-                if col not in df.columns:
-                    df[col] = ""
-            df = df[TASK_COLUMNS].copy()
-            df["due_date"] = pd.to_datetime(df["due_date"], dayfirst=True, errors="coerce")
-            return df
+            _write_store_file(df, store_path, columns, date_cols)
+            return
         except Exception:
             pass
-    return pd.DataFrame(columns=TASK_COLUMNS)
-
-
-# ─── Save functions (Google Sheets + CSV backup) ─────────────────────────────
-def save_ops(df):
-    # Always write CSV as local backup
     out = df.copy()
-    out["issue_date"] = pd.to_datetime(out["issue_date"], errors="coerce").dt.strftime("%d-%m-%Y")
+    for dc in date_cols:
+        out[dc] = pd.to_datetime(out[dc], errors="coerce").dt.strftime(DATE_FMT)
     try:
-        out.to_csv(OPS_CSV, index=False)
+        out.to_csv(csv_path, index=False)
     except Exception:
         pass
-    # Write to Google Sheets if connected
-    _gsheet_write(df, GS_TAB_OPS, OPS_COLUMNS, {"issue_date": "%d-%m-%Y"})
 
 
-def save_circ(df):
-    out = df.copy()
-    out["due_date"] = pd.to_datetime(out["due_date"], errors="coerce").dt.strftime("%d-%m-%Y")
-    try:
-        out.to_csv(CIRC_CSV, index=False)
-    except Exception:
-        pass
-    _gsheet_write(df, GS_TAB_CIRC, CIRC_COLUMNS, {"due_date": "%d-%m-%Y"})
+# ─── Local SQLite store ───────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def _sqlite_state() -> dict:
+    """
+    Process-wide SQLite bookkeeping. One connection per thread ("local");
+    "synced" maps table → (version, row ids, rows) as last read/written by
+    this process, so a save can be turned into row-level statements and a
+    re-read can fetch only what changed since.
+    """
+    return {"local": threading.local(), "synced": {}, "schema_ready": False}
+
+
+def _sqlite_conn() -> sqlite3.Connection:
+    state = _sqlite_state()
+    tls = state["local"]
+    con = getattr(tls, "con", None)
+    if con is None:
+        con = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)  # explicit BEGIN/COMMIT
+        con.execute("PRAGMA synchronous=NORMAL")
+        if not state["schema_ready"]:
+            _sqlite_init(con)
+            state["schema_ready"] = True
+        tls.con = con
+    return con
+
+
+def _sqlite_init(con):
+    con.execute("PRAGMA journal_mode=WAL")   # persistent: set once per database file
+    con.execute("CREATE TABLE IF NOT EXISTS _meta (dataset TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    # Record ids deleted per version, so readers can catch up incrementally
+    con.execute("CREATE TABLE IF NOT EXISTS _tombstones (dataset TEXT NOT NULL, record_id TEXT, version INTEGER NOT NULL)")
+    con.execute("CREATE INDEX IF NOT EXISTS ix__tombstones ON _tombstones (dataset, version)")
+    # Append-only event log, and the last event each local snapshot includes
+    con.execute("CREATE TABLE IF NOT EXISTS _journal (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "dataset TEXT NOT NULL, at TEXT NOT NULL, kind TEXT NOT NULL, record_ids TEXT, payload TEXT)")
+    con.execute("CREATE INDEX IF NOT EXISTS ix__journal ON _journal (dataset, seq)")
+    con.execute("CREATE TABLE IF NOT EXISTS _snapshots (dataset TEXT PRIMARY KEY, seq INTEGER NOT NULL)")
+    # Last dashboard aggregates per dataset, shown on a cold start while it loads
+    con.execute("CREATE TABLE IF NOT EXISTS _summaries (dataset TEXT PRIMARY KEY, day TEXT NOT NULL, payload BLOB NOT NULL)")
+    # Latest reminder digest, and which reminders have gone out (once per record, class and day)
+    con.execute("CREATE TABLE IF NOT EXISTS _digest (name TEXT PRIMARY KEY, at TEXT NOT NULL, payload TEXT NOT NULL)")
+    con.execute("CREATE TABLE IF NOT EXISTS _notified (dataset TEXT NOT NULL, record_id TEXT NOT NULL, "
+                "urgency TEXT NOT NULL, day TEXT NOT NULL, PRIMARY KEY (dataset, record_id, urgency, day))")
+    for table, columns, date_cols in SQL_DATASETS.values():
+        cols_sql = ", ".join(f"{c} TEXT" for c in columns)
+        # rev: the _meta version that last wrote the row
+        con.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"(id INTEGER PRIMARY KEY, {cols_sql}, rev INTEGER NOT NULL DEFAULT 0)")
+        have = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+        for c in columns:
+            if c not in have:   # database from before the column existed
+                con.execute(f"ALTER TABLE {table} ADD COLUMN {c} TEXT")
+        if "rev" not in have:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN rev INTEGER NOT NULL DEFAULT 0")
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{ID_COL} ON {table} ({ID_COL})")
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_rev ON {table} (rev)")
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_status_sev ON {table} (status, severity)")
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_team ON {table} (team)")
+        for dc in date_cols:
+            con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{dc} ON {table} ({dc})")
 
 
-# ─── Bulk upload helpers ───────────────────────────────────────────────────────
+def _sqlite_version(con, table: str) -> int:
+    row = con.execute("SELECT version FROM _meta WHERE dataset = ?", (table,)).fetchone()
+    return row[0] if row else 0
 
-def make_ops_template() -> bytes:
-    sample = pd.DataFrame([
-        {"team": "DP",      "issue_description": "Settlement mismatch detected in morning run",
-         "issue_date": date.today().strftime("%d-%m-%Y"), "reported_to": "Tech Excel", "severity": "High",   "status": "Open"},
-        {"team": "BROKING", "issue_description": "Client account showing FO capital shortfall post EOD",
-         "issue_date": date.today().strftime("%d-%m-%Y"), "reported_to": "CDSL",       "severity": "Medium", "status": "In Progress"},
-        {"team": "EAGLE",   "issue_description": "EOD reconciliation failed for BSE segment",
-         "issue_date": (date.today() - timedelta(days=2)).strftime("%d-%m-%Y"), "reported_to": "BSE", "severity": "Low", "status": "Closed"},
-    ])
-    return sample.to_csv(index=False).encode()
 
+def _sqlite_rows(df: pd.DataFrame, columns: list, date_cols: list) -> list:
+    """DataFrame → row tuples as stored: text columns as str, dates as ISO text or NULL."""
+    out = df[columns].copy()
+    for col in columns:
+        if col in date_cols:
+            out[col] = pd.to_datetime(out[col], errors="coerce").dt.strftime("%Y-%m-%d")
+            out[col] = out[col].astype(object).where(out[col].notna(), None)
+        else:
+            out[col] = out[col].astype(object).fillna("").astype(str)
+    return [tuple(r) for r in out.astype(object).values.tolist()]
 
-def make_circ_template() -> bytes:
-    """Template matching revised circular format: Team, Circular_No_description, Due_date, reported_to, severity, status"""
-    sample = pd.DataFrame([
-        {"Team": "DP",         "Circular_No_description": "Nomination",          "Due_date": date.today().strftime("%d-%m-%Y"), "reported_to": "Techexcel", "severity": "High",   "status": "Open"},
-        {"Team": "BROKING",    "Circular_No_description": "Settlement Holidays",  "Due_date": date.today().strftime("%d-%m-%Y"), "reported_to": "Tech",      "severity": "Medium", "status": "In Progress"},
-        {"Team": "EAGLE",      "Circular_No_description": "Risk Metrics",         "Due_date": (date.today() - timedelta(days=3)).strftime("%d-%m-%Y"), "reported_to": "CDSL", "severity": "Low", "status": "Closed"},
-        {"Team": "COMPLIANCE", "Circular_No_description": "RMS",                  "Due_date": (date.today() - timedelta(days=3)).strftime("%d-%m-%Y"), "reported_to": "CDSL", "severity": "Low", "status": "Closed"},
-    ])
-    return sample.to_csv(index=False).encode()
 
+def _sqlite_frame(rows: list, columns: list, date_cols: list) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=columns)
+    for dc in date_cols:
+        df[dc] = pd.to_datetime(df[dc], format="%Y-%m-%d", errors="coerce")
+    return df
 
-def validate_ops_bulk(df_raw: pd.DataFrame):
-    """Validate OPS CSV upload. Returns (clean_df, errors_list)."""
-    errors = []
-    df = df_raw.copy()
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
 
-    REQUIRED = ["team", "issue_description", "issue_date", "reported_to", "severity", "status"]
-    missing = [c for c in REQUIRED if c not in df.columns]
-    if missing:
-        errors.append(f"Missing required columns: {missing}")
-        errors.append(f"Your file columns: {list(df.columns)}")
-        errors.append(f"Required: {REQUIRED}")
-        return None, errors
-
-    df["team"]              = df["team"].astype(str).str.strip().str.upper()
-    df["severity"]          = df["severity"].astype(str).str.strip().str.title()
-    df["status"]            = df["status"].astype(str).str.strip().str.title()
-    df["reported_to"]       = df["reported_to"].astype(str).str.strip()
-    df["issue_description"] = df["issue_description"].astype(str).str.strip()
-
-    bad_team = df[~df["team"].isin(OPS_TEAMS)]["team"].unique().tolist()
-    if bad_team:
-        errors.append(f"Invalid team(s): {bad_team} — must be one of {OPS_TEAMS}")
-
-    bad_sev = df[~df["severity"].isin(SEVERITIES)]["severity"].unique().tolist()
-    if bad_sev:
-        errors.append(f"Invalid severity: {bad_sev} — must be one of {SEVERITIES}")
-
-    bad_stat = df[~df["status"].isin(STATUSES)]["status"].unique().tolist()
-    if bad_stat:
-        errors.append(f"Invalid status: {bad_stat} — must be one of {STATUSES}")
-
-    parsed_dates = pd.to_datetime(df["issue_date"], dayfirst=True, errors="coerce")
-    null_dates = int(parsed_dates.isna().sum())
-    if null_dates:
-        errors.append(f"{null_dates} invalid date(s). Use DD-MM-YYYY or YYYY-MM-DD.")
-    df["issue_date"] = parsed_dates
-
-    empty_desc = int((df["issue_description"].str.len() == 0).sum())
-    if empty_desc:
-        errors.append(f"{empty_desc} row(s) have empty issue_description.")
+def _sqlite_snapshot(con, table: str, columns: list) -> tuple:
+    cur = con.execute(f"SELECT id, {', '.join(columns)} FROM {table} ORDER BY id")
+    fetched = cur.fetchall()
+    return [r[0] for r in fetched], [tuple(r[1:]) for r in fetched]
 
-    if errors:
-        return None, errors
 
-    return df[OPS_COLUMNS], []
+def _sqlite_changes(con, table: str, columns: list, synced: tuple) -> tuple:
+    """
+    (row ids, rows) of table now, built from a synced (version, ids, rows)
+    copy plus only the rows written and record ids deleted since that
+    version — no full table scan.
+    """
+    since, ids, rows = synced
+    pos = columns.index(ID_COL)
+    changed = con.execute(f"SELECT id, {', '.join(columns)} FROM {table} WHERE rev > ?", (since,)).fetchall()
+    gone = {r[0] for r in con.execute(
+        "SELECT record_id FROM _tombstones WHERE dataset = ? AND version > ?", (table, since))}
+    gone.update(r[1 + pos] for r in changed)   # a rewrite may have moved a record to a new row id
+    current = {rid: row for rid, row in zip(ids, rows) if row[pos] not in gone}
+    current.update((r[0], tuple(r[1:])) for r in changed)
+    order = sorted(current)
+    return order, [current[rid] for rid in order]
+
+
+def _sqlite_read(table: str, columns: list, date_cols: list):
+    """
+    Whole table as a DataFrame, or None if the table has never been written.
+    Once this process has synced the table, a re-read fetches only the
+    changes since (nothing at all while the version is unchanged).
+    """
+    state = _sqlite_state()
+    con = _sqlite_conn()
+    con.execute("BEGIN")
+    try:
+        version = _sqlite_version(con, table)
+        synced = state["synced"].get(table)
+        if synced is not None and synced[0] == version:
+            ids, rows = synced[1], synced[2]
+        elif synced is not None and synced[0] < version:
+            ids, rows = _sqlite_changes(con, table, columns, synced)
+        else:
+            ids, rows = _sqlite_snapshot(con, table, columns)
+    finally:
+        con.execute("COMMIT")
+    if version == 0:
+        return None
+    state["synced"][table] = (version, ids, rows)
+    return _sqlite_frame(rows, columns, date_cols)
 
 
-def validate_circ_bulk(df_raw: pd.DataFrame):
-    """Validate Circular CSV upload. Returns (clean_df, errors_list).
-    Accepts: Team, Circular_No_description, Due_date, reported_to, severity, status"""
-    errors = []
-    df = df_raw.copy()
+def _sqlite_write(df: pd.DataFrame, table: str, columns: list, date_cols: list) -> list:
+    """
+    Persist df as the new content of table. The change is diffed against the
+    rows last synced by this process, matched on record id, and applied as
+    single-row UPDATE / DELETE / INSERT statements; a wholesale change (or
+    rows without unique ids) is rewritten in one transaction. If another process has written since that sync, df is
+    three-way merged (_merge_rows) with the stored rows, read incrementally,
+    instead of overwriting them. Returns the merge conflicts, which kept the
+    stored values.
+    """
+    new_rows = _sqlite_rows(df, columns, date_cols)
+    state = _sqlite_state()
+    con = _sqlite_conn()
+    cols_sql = ", ".join(columns)
+    insert_sql = f"INSERT INTO {table} ({cols_sql}, rev) VALUES ({', '.join('?' * (len(columns) + 1))})"
+    pos = columns.index(ID_COL)
+    conflicts = []
+
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        version = _sqlite_version(con, table)
+        rev = version + 1
+        synced = state["synced"].get(table)
+        if synced is not None and synced[0] == version:
+            old_ids, old_rows = synced[1], synced[2]
+        elif synced is not None and synced[0] < version:
+            old_ids, old_rows = _sqlite_changes(con, table, columns, synced)
+            new_rows, conflicts = _merge_rows(synced[2], new_rows, old_rows, pos)
+        else:
+            old_ids, old_rows = _sqlite_snapshot(con, table, columns)
+
+        script = _diff_records(old_rows, new_rows, pos)
+        mid_insert = script is not None and any(op[0] == "insert" and op[1] < len(old_rows) for op in script)
+        if script is None or mid_insert or len(script) > max(len(new_rows) // 2, 50):
+            con.execute(f"DELETE FROM {table}")
+            con.executemany(insert_sql, [row + (rev,) for row in new_rows])
+            new_ids = [r[0] for r in con.execute(f"SELECT id FROM {table} ORDER BY id")]
+        else:
+            kept, appended = list(old_ids), []
+            for op in script:
+                if op[0] == "update":
+                    _, i, j, cols = op
+                    sets = ", ".join(f"{columns[c]} = ?" for c in cols)
+                    con.execute(f"UPDATE {table} SET {sets}, rev = ? WHERE id = ?",
+                                [new_rows[j][c] for c in cols] + [rev, old_ids[i]])
+                elif op[0] == "delete":
+                    con.executemany(f"DELETE FROM {table} WHERE id = ?",
+                                    [(rid,) for rid in old_ids[op[1]:op[2]]])
+                    kept[op[1]:op[2]] = [None] * (op[2] - op[1])
+                else:
+                    appended += [con.execute(insert_sql, row + (rev,)).lastrowid for row in op[2]]
+            new_ids = [rid for rid in kept if rid is not None] + appended
+
+        gone = {r[pos] for r in old_rows} - {r[pos] for r in new_rows}
+        con.executemany("INSERT INTO _tombstones (dataset, record_id, version) VALUES (?, ?, ?)",
+                        [(table, rid, rev) for rid in gone if rid])
+        con.execute(
+            "INSERT INTO _meta (dataset, version) VALUES (?, 1) "
+            "ON CONFLICT(dataset) DO UPDATE SET version = version + 1", (table,))
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        state["synced"].pop(table, None)
+        raise
+    state["synced"][table] = (rev, new_ids, new_rows)
+    if synced is not None and synced[0] < version:
+        # Sessions are showing df, not the merge: have the shared copy re-read
+        for name, (tab, _, _) in SQL_DATASETS.items():
+            if tab == table:
+                _cache_entry(name)["loaded_at"] = 0.0
+    return conflicts
+
+
+def _local_read(table: str, store_path: str, csv_path: str, columns: list, date_cols: list) -> pd.DataFrame:
+    """The local snapshot with the journal tail replayed on top."""
+    df = _local_snapshot(table, store_path, csv_path, columns, date_cols)
+    try:
+        tail = _journal_tail(_sqlite_conn(), table)
+    except sqlite3.Error:
+        return df
+    return apply_events(df, tail, columns, date_cols) if tail else df
 
-    # Normalize column names
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
 
-    # Accept aliases for circular description column
-    col_aliases = {
-        "circular_no_description": "circular_description",
-        "circular_no/description": "circular_description",
-        "description": "circular_description",
-        "issue_description": "circular_description",
-        "circular": "circular_description",
-    }
-    for alias, canonical in col_aliases.items():
-        if alias in df.columns and canonical not in df.columns:
-            df.rename(columns={alias: canonical}, inplace=True)
+def _local_snapshot(table: str, store_path: str, csv_path: str, columns: list, date_cols: list) -> pd.DataFrame:
+    if LOCAL_BACKEND == "sqlite":
+        try:
+            df = _sqlite_read(table, columns, date_cols)
+            if df is None:
+                # First run on SQLite: migrate the Parquet / CSV store
+                df = _file_read(store_path, csv_path, columns, date_cols)
+                _sqlite_write(df, table, columns, date_cols)
+            return df
+        except Exception:
+            pass
+    return _file_read(store_path, csv_path, columns, date_cols)
 
-    # Accept due_date or issue_date
-    if "issue_date" in df.columns and "due_date" not in df.columns:
-        df.rename(columns={"issue_date": "due_date"}, inplace=True)
 
-    REQUIRED = ["team", "circular_description", "due_date", "reported_to", "severity", "status"]
-    missing = [c for c in REQUIRED if c not in df.columns]
-    if missing:
-        errors.append(f"Missing required columns: {missing}")
-        errors.append(f"Your file columns: {list(df.columns)}")
-        errors.append(f"Required: Team, Circular_No_description, Due_date, reported_to, severity, status")
-        return None, errors
-
-    df["team"]                 = df["team"].astype(str).str.strip().str.upper()
-    df["severity"]             = df["severity"].astype(str).str.strip().str.title()
-    df["status"]               = df["status"].astype(str).str.strip().str.title()
-    df["reported_to"]          = df["reported_to"].astype(str).str.strip()
-    df["circular_description"] = df["circular_description"].astype(str).str.strip()
-
-    bad_team = df[~df["team"].isin(CIRC_TEAMS)]["team"].unique().tolist()
-    if bad_team:
-        errors.append(f"Invalid team(s): {bad_team} — must be one of {CIRC_TEAMS}")
-
-    bad_sev = df[~df["severity"].isin(SEVERITIES)]["severity"].unique().tolist()
-    if bad_sev:
-        errors.append(f"Invalid severity: {bad_sev} — must be one of {SEVERITIES}")
-
-    bad_stat = df[~df["status"].isin(STATUSES)]["status"].unique().tolist()
-    if bad_stat:
-        errors.append(f"Invalid status: {bad_stat} — must be one of {STATUSES}")
-
-    parsed_dates = pd.to_datetime(df["due_date"], dayfirst=True, errors="coerce")
-    null_dates = int(parsed_dates.isna().sum())
-    if null_dates:
-        errors.append(f"{null_dates} invalid date(s) in 'due_date'. Use DD-MM-YYYY or YYYY-MM-DD.")
-    df["due_date"] = parsed_dates
-
-    empty_desc = int((df["circular_description"].str.len() == 0).sum())
-    if empty_desc:
-        errors.append(f"{empty_desc} row(s) have empty Circular_No_description.")
+def _local_write(df: pd.DataFrame, table: str, store_path: str, csv_path: str, columns: list, date_cols: list):
+    """SQLite errors propagate so the save queue retries the write."""
+    if LOCAL_BACKEND == "sqlite":
+        _sqlite_write(df, table, columns, date_cols)  # conflicts there keep the stored values
+    else:
+        _file_write(df, store_path, csv_path, columns, date_cols)
 
-    if errors:
-        return None, errors
 
-    return df[CIRC_COLUMNS], []
+# ─── Journal (append-only event log) ─────────────────────────────────────────
+# Events, keyed on record ids:
+#   "create"  one record   payload {"row": {column: stored value}}
+#   "status"  one record   payload {"from": status, "to": status}
+#   "delete"  records      payload {"rows": [{column: stored value}, ...]}
+#   "import"  none         payload {"rows": n, "replace": bool, "file": name}
+# Imports write the snapshot directly; their event is for the audit trail.
+def journal_append(table: str, kind: str, ids: list, payload: dict, con=None) -> int:
+    """Append one event and return its seq. Pass con to join an open transaction."""
+    con = con or _sqlite_conn()
+    cur = con.execute(
+        "INSERT INTO _journal (dataset, at, kind, record_ids, payload) VALUES (?, ?, ?, ?, ?)",
+        (table, datetime.now(IST).isoformat(timespec="seconds"), kind, json.dumps(ids), json.dumps(payload)))
+    return cur.lastrowid
 
 
-def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=False).encode()
+def _journal_mark(con, table: str, seq: int):
+    """Record that the local snapshot of table includes every event up to seq."""
+    con.execute("INSERT INTO _snapshots (dataset, seq) VALUES (?, ?) "
+                "ON CONFLICT(dataset) DO UPDATE SET seq = max(seq, excluded.seq)", (table, seq))
 
 
-def load_task():
-    if os.path.exists(TASK_CSV):
-        try:
-            df = pd.read_csv(TASK_CSV)
-            for col in TASK_COLUMNS:
-                if col not in df.columns:
-                    df[col] = ""
-            df = df[TASK_COLUMNS].copy()
-            df["due_date"] = pd.to_datetime(df["due_date"], dayfirst=True, errors="coerce")
-            return df
-        except Exception:
-            pass
-    return pd.DataFrame(columns=TASK_COLUMNS)
+def _journal_tail(con, table: str) -> list:
+    """Events not yet in the local snapshot, as (seq, kind, ids, payload)."""
+    row = con.execute("SELECT seq FROM _snapshots WHERE dataset = ?", (table,)).fetchone()
+    since = row[0] if row else 0
+    cur = con.execute("SELECT seq, kind, record_ids, payload FROM _journal "
+                      "WHERE dataset = ? AND seq > ? ORDER BY seq", (table, since))
+    return [(seq, kind, json.loads(ids), json.loads(payload)) for seq, kind, ids, payload in cur]
 
 
-def save_task(df):
-    out = df.copy()
-    out["due_date"] = pd.to_datetime(out["due_date"], errors="coerce").dt.strftime("%d-%m-%Y")
+def apply_events(df: pd.DataFrame, events: list, columns: list, date_cols: list) -> pd.DataFrame:
+    """
+    Replay journal events onto a snapshot frame. Events are idempotent, so
+    replaying some the snapshot already includes is harmless.
+    """
+    created, status, deleted = {}, {}, set()
+    for _, kind, ids, payload in events:
+        if kind == "create":
+            created[ids[0]] = dict(payload["row"])
+        elif kind == "status":
+            for rid in ids:
+                if rid in created:
+                    created[rid]["status"] = payload["to"]
+                else:
+                    status[rid] = payload["to"]
+        elif kind == "delete":
+            for rid in ids:
+                created.pop(rid, None)
+                status.pop(rid, None)
+                deleted.add(rid)
+    if deleted:
+        df = df[~df[ID_COL].isin(list(deleted))]
+    if status:
+        df = df.copy()
+        hit = df[ID_COL].isin(list(status)).to_numpy()
+        df["status"] = df["status"].astype(object)
+        df.loc[hit, "status"] = df.loc[hit, ID_COL].map(status)
+    have = set(df[ID_COL])
+    rows = [[row.get(c) for c in columns] for rid, row in created.items() if rid not in have]
+    if rows:
+        df = pd.concat([df, _sqlite_frame(rows, columns, date_cols)], ignore_index=True)
+    return df.reset_index(drop=True)
+
+
+def _sqlite_fold(con, table: str, columns: list, rev: int) -> int:
+    """
+    Apply the journal tail to the SQLite table as row-level statements
+    stamped rev, inside the caller's transaction, and mark it folded.
+    Returns the number of events applied.
+    """
+    insert_sql = (f"INSERT INTO {table} ({', '.join(columns)}, rev) SELECT {', '.join('?' * (len(columns) + 1))} "
+                  f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {ID_COL} = ?)")
+    tail = _journal_tail(con, table)
+    for _, kind, ids, payload in tail:
+        if kind == "create":
+            con.execute(insert_sql, [payload["row"].get(c) for c in columns] + [rev, ids[0]])
+        elif kind == "status":
+            con.executemany(f"UPDATE {table} SET status = ?, rev = ? WHERE {ID_COL} = ?",
+                            [(payload["to"], rev, rid) for rid in ids])
+        elif kind == "delete":
+            con.executemany(f"DELETE FROM {table} WHERE {ID_COL} = ?", [(rid,) for rid in ids])
+            con.executemany("INSERT INTO _tombstones (dataset, record_id, version) VALUES (?, ?, ?)",
+                            [(table, rid, rev) for rid in ids])
+    if tail:
+        _journal_mark(con, table, tail[-1][0])
+    return len(tail)
+
+
+def _sqlite_compact(table: str, columns: list):
+    """Fold the journal tail into the SQLite table in one transaction."""
+    state = _sqlite_state()
+    con = _sqlite_conn()
+    fresh = None
+    con.execute("BEGIN IMMEDIATE")
     try:
-        out.to_csv(TASK_CSV, index=False)
+        version = _sqlite_version(con, table)
+        if _sqlite_fold(con, table, columns, version + 1):
+            con.execute(
+                "INSERT INTO _meta (dataset, version) VALUES (?, 1) "
+                "ON CONFLICT(dataset) DO UPDATE SET version = version + 1", (table,))
+            synced = state["synced"].get(table)
+            if synced is not None and synced[0] == version:
+                fresh = (version + 1,) + _sqlite_changes(con, table, columns, synced)
+        con.execute("COMMIT")
     except Exception:
-        pass
-    _gsheet_write(df, GS_TAB_TASK, TASK_COLUMNS, {"due_date": "%d-%m-%Y"})
+        con.execute("ROLLBACK")
+        raise
+    if fresh is not None:
+        state["synced"][table] = fresh
 
 
-def make_task_template() -> bytes:
-    sample = pd.DataFrame([
-        {"team": "DP",      "issue_description": "SEBI circular SEBI/HO/MRD/2026/001 — settlement cycle update",
-         "Due Date": date.today().strftime("%d-%m-%Y"), "Task": "MNRL",          "severity": "High",   "status": "Open"},
-        {"team": "BROKING", "issue_description": "NSE circular implementation — peak margin reporting change",
-         "Due Date": date.today().strftime("%d-%m-%Y"), "Task": "Closure Email", "severity": "Medium", "status": "In Progress"},
-        {"team": "EAGLE",   "issue_description": "CDSL circular — KYC re-validation for dormant accounts",
-         "Due Date": (date.today() - timedelta(days=3)).strftime("%d-%m-%Y"), "Task": "Testing", "severity": "Low", "status": "Closed"},
-    ])
-    return sample.to_csv(index=False).encode()
+def compact_journal(name: str, force: bool = False):
+    """
+    Fold the journal tail into the local snapshot: always on SQLite, where
+    that costs one statement per event; on Parquet once the tail reaches
+    JOURNAL_COMPACT_EVERY events (or with force), as it rewrites the file.
+    The events stay in the journal as the audit trail.
+    """
+    table, columns, date_cols = SQL_DATASETS[name]
+    if LOCAL_BACKEND == "sqlite":
+        _sqlite_compact(table, columns)
+        return
+    con = _sqlite_conn()
+    tail = _journal_tail(con, table)
+    if not tail or (len(tail) < JOURNAL_COMPACT_EVERY and not force):
+        return
+    store_path, csv_path = LOCAL_FILES[name]
+    df = _file_read(store_path, csv_path, columns, date_cols)
+    _file_write(apply_events(df, tail, columns, date_cols), store_path, csv_path, columns, date_cols)
+    _journal_mark(con, table, tail[-1][0])
+
+
+def _event_details(kind: str, payload: dict, desc_col: str) -> str:
+    if kind == "create":
+        row = payload["row"]
+        return f"{row.get('team')} | {row.get(desc_col)} | {row.get('status')}"
+    if kind == "status":
+        return f"{payload['from']} → {payload['to']}"
+    if kind == "delete":
+        return "; ".join(f"{row.get('team')} | {row.get(desc_col)}" for row in payload["rows"])
+    return (f"{payload['rows']} row(s) from {payload['file'] or 'upload'}"
+            + (", replacing all records" if payload["replace"] else ""))
+
+
+def journal_frame(name: str) -> pd.DataFrame:
+    """A dataset's journal as an audit trail, oldest event first."""
+    cur = _sqlite_conn().execute("SELECT seq, at, kind, record_ids, payload FROM _journal "
+                                 "WHERE dataset = ? ORDER BY seq", (SQL_DATASETS[name][0],))
+    rows = [(seq, at, kind, " ".join(json.loads(ids)), _event_details(kind, json.loads(payload), DESC_COLS[name]))
+            for seq, at, kind, ids, payload in cur]
+    return pd.DataFrame(rows, columns=["seq", "at", "event", "record_ids", "details"])
+
+
+# ─── Record ids ───────────────────────────────────────────────────────────────
+def new_ids(n: int) -> list:
+    # The letter prefix keeps Sheets (USER_ENTERED) from reading an id such
+    # as '9646798933564471' or '40780338e8124310' as a number
+    return ["r" + uuid.uuid4().hex[:15] for _ in range(n)]
+
+
+def _with_ids(df: pd.DataFrame, writer) -> pd.DataFrame:
+    """Give records from before record ids one, and persist them once via writer."""
+    missing = df[ID_COL].isna().to_numpy() | (df[ID_COL].astype(str).str.strip() == "").to_numpy()
+    if not missing.any():
+        return df
+    df = df.copy()
+    df.loc[missing, ID_COL] = new_ids(int(missing.sum()))
+    try:
+        writer(df)
+    except Exception:
+        pass   # ids are re-issued on the next load; the first save persists them
+    return df
 
 
-def validate_task_bulk(df_raw: pd.DataFrame):
-    """Validate Task CSV upload. Returns (clean_df, errors_list).
-    Accepts: team, issue_description, Due Date, Task, severity, status"""
-    errors = []
-    df = df_raw.copy()
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+def record_position(key: str, rid):
+    """
+    Row position of record rid in st.session_state[key], or None. The hash
+    map over the ids is built once per frame object, then carried through
+    handler edits and saves like the value index.
+    """
+    df = st.session_state[key]
+    cached = st.session_state.get(f"{key}_ids")
+    if cached is None or cached[0] is not df:
+        cached = (df, {rid: pos for pos, rid in enumerate(df[ID_COL])})
+        st.session_state[f"{key}_ids"] = cached
+    return cached[1].get(rid)
+
+
+def _carry_ids(key: str, old_df: pd.DataFrame, new_df: pd.DataFrame, edit=None):
+    """Re-key the session's id map from old_df to new_df; edit(ids) updates it in place."""
+    cached = st.session_state.get(f"{key}_ids")
+    if cached is not None and cached[0] is old_df:
+        if edit is not None:
+            edit(cached[1])
+        st.session_state[f"{key}_ids"] = (new_df, cached[1])
+    else:
+        st.session_state.pop(f"{key}_ids", None)
+
+
+def session_index(key: str) -> dict:
+    """
+    Value index of st.session_state[key]. Normally handed over with the
+    frame and carried through each handler edit; built here only when
+    neither happened.
+    """
+    df = st.session_state[key]
+    cached = st.session_state.get(f"{key}_index")
+    if cached is None or cached[0] is not df:
+        cached = (df, build_value_index(df))
+        st.session_state[f"{key}_index"] = cached
+    return cached[1]
+
+
+def _carry_index(key: str, old_df: pd.DataFrame, new_df: pd.DataFrame, edit=None):
+    """Re-key the session's index from old_df to new_df, applying edit(index) on the way."""
+    cached = st.session_state.get(f"{key}_index")
+    if cached is not None and cached[0] is old_df:
+        st.session_state[f"{key}_index"] = (new_df, edit(cached[1]) if edit else cached[1])
+    else:
+        st.session_state.pop(f"{key}_index", None)
+
+
+def add_record(key: str, row: dict, name: str):
+    """Append row to st.session_state[key]; returns the new record's id."""
+    df = st.session_state[key]
+    st.session_state[key] = append_row(df, row, name)
+    added = st.session_state[key].iloc[-1]
+    _carry_index(key, df, st.session_state[key], lambda index: index_append(index, added.to_dict()))
+    _carry_ids(key, df, st.session_state[key], lambda ids: ids.__setitem__(added[ID_COL], len(df)))
+    return added[ID_COL]
+
+
+def set_record_status(key: str, rid, status: str) -> bool:
+    """Set one record's status in place. False if the record no longer exists."""
+    pos = record_position(key, rid)
+    if pos is None:
+        return False
+    df = st.session_state[key]
+    df.iloc[pos, df.columns.get_loc("status")] = status
+    refresh_urgency(df, pos)
+    values = {col: df[col].iat[pos] for col in ("status", "_urgency") if col in df.columns}
+    _carry_index(key, df, df, lambda index: index_set(index, pos, values))
+    return True
 
-    # Accept 'due_date' alias
-    if "due_date" not in df.columns and "issue_date" in df.columns:
-        df.rename(columns={"issue_date": "due_date"}, inplace=True)
 
-    REQUIRED = ["team", "issue_description", "due_date", "task", "severity", "status"]
-    missing = [c for c in REQUIRED if c not in df.columns]
-    if missing:
-        errors.append(f"Missing required columns: {missing}")
-        errors.append(f"Your file columns: {list(df.columns)}")
-        errors.append(f"Required: team, issue_description, Due Date, Task, severity, status")
-        return None, errors
-
-    df["team"]              = df["team"].astype(str).str.strip().str.upper()
-    df["severity"]          = df["severity"].astype(str).str.strip().str.title()
-    df["status"]            = df["status"].astype(str).str.strip().str.title()
-    df["task"]              = df["task"].astype(str).str.strip()
-    df["issue_description"] = df["issue_description"].astype(str).str.strip()
-
-    bad_team = df[~df["team"].isin(TASK_TEAMS)]["team"].unique().tolist()
-    if bad_team:
-        errors.append(f"Invalid team(s): {bad_team} — must be one of {TASK_TEAMS}")
-
-    bad_sev = df[~df["severity"].isin(SEVERITIES)]["severity"].unique().tolist()
-    if bad_sev:
-        errors.append(f"Invalid severity: {bad_sev} — must be one of {SEVERITIES}")
-
-    bad_stat = df[~df["status"].isin(STATUSES)]["status"].unique().tolist()
-    if bad_stat:
-        errors.append(f"Invalid status: {bad_stat} — must be one of {STATUSES}")
-
-    parsed_dates = pd.to_datetime(df["due_date"], dayfirst=True, errors="coerce")
-    null_dates = int(parsed_dates.isna().sum())
-    if null_dates:
-        errors.append(f"{null_dates} invalid date(s) in 'Due Date'. Use DD-MM-YYYY or YYYY-MM-DD.")
-    df["due_date"] = parsed_dates
-
-    empty_desc = int((df["issue_description"].str.len() == 0).sum())
-    if empty_desc:
-        errors.append(f"{empty_desc} row(s) have empty issue_description.")
+def drop_records(key: str, ids: list):
+    """Remove records ids from st.session_state[key]."""
+    df = st.session_state[key]
+    keep = ~isin_mask(df[ID_COL], ids)
+    st.session_state[key] = df[keep].reset_index(drop=True)
+    _carry_index(key, df, st.session_state[key], lambda index: index_keep(index, keep))
+    st.session_state.pop(f"{key}_ids", None)   # positions shift: rebuilt on the next lookup
 
-    if errors:
-        return None, errors
 
-    return df[TASK_COLUMNS], []
+def record_labels(df: pd.DataFrame, desc_col: str, width: int = 50) -> dict:
+    """record id → "[id] TEAM | description… | Status" for the delete pickers."""
+    labels = ("[" + df[ID_COL].astype(str).str[:6] + "] " + df["team"].astype(str)
+              + " | " + df[desc_col].astype(str).str[:width] + " | " + df["status"].astype(str))
+    return dict(zip(df[ID_COL], labels))
 
 
-# ── Session state ─────────────────────────────────────────────────────────────
-if "ops_data" not in st.session_state:
-    st.session_state["ops_data"] = load_ops()
-if "circ_data" not in st.session_state:
-    st.session_state["circ_data"] = load_circ()
-if "task_data" not in st.session_state:
-    st.session_state["task_data"] = load_task()
+# ─── Load functions (Google Sheets → local fallback) ───────────────────────────
+def load_ops():
+    df = _gsheet_read(GS_TAB_OPS, OPS_COLUMNS, ["issue_date"])
+    if df is None:
+        # Local fallback
+        df = _local_read(GS_TAB_OPS, OPS_STORE, OPS_CSV, OPS_COLUMNS, ["issue_date"])
+    return _with_ids(as_categories(df, "ops"), _write_ops)
 
-# Flash message state
-if "flash" not in st.session_state:
-    st.session_state["flash"] = None
 
-# Active tab tracking — used to return to the correct tab after rerun
-# Values: "ops", "circ", "task", None (defaults to dashboard on ops import)
-if "active_tab" not in st.session_state:
-    st.session_state["active_tab"] = None
+def load_circ():
+    df = _gsheet_read(GS_TAB_CIRC, CIRC_COLUMNS, ["due_date"])
+    if df is None:
+        # Local fallback
+        df = _local_read(GS_TAB_CIRC, CIRC_STORE, CIRC_CSV, CIRC_COLUMNS, ["due_date"])
+    return _with_ids(as_categories(df, "circ"), _write_circ)
 
-df_ops  = st.session_state["ops_data"]
-df_circ = st.session_state["circ_data"]
-df_task = st.session_state["task_data"]
 
-# ─── Header ───────────────────────────────────────────────────────────────────
-now_str = datetime.now().strftime("%d %b %Y  %H:%M")
-st.markdown(f"""
-<div class="ops-header">
-    <div class="ops-logo">⚡ DELTA <span>OPS</span></div>
-    <div class="ops-timestamp">LAST REFRESH · {now_str} IST</div>
-</div>
-""", unsafe_allow_html=True)
+def load_task():
+    df = _gsheet_read(GS_TAB_TASK, TASK_COLUMNS, ["due_date"])
+    if df is None:
+        # Local fallback
+        df = _local_read(GS_TAB_TASK, TASK_STORE, TASK_CSV, TASK_COLUMNS, ["due_date"])
+    return with_urgency(_with_ids(as_categories(df, "task"), _write_task))
 
-# Flash message is displayed per-tab below (so it appears in the right context)
+
+# ─── Save functions (Google Sheets + CSV backup) ─────────────────────────────
+# commit_edits only journals the change and queues the frame; the write-behind
+# worker performs the _write_* calls off the request path. journaled: the
+# change is in the journal, so the local store is brought up to date from it
+# instead of being rewritten.
+def _write_ops(df, journaled: bool = False):
+    # Always write the local store as backup
+    if journaled:
+        compact_journal("ops")
+    else:
+        _local_write(df, GS_TAB_OPS, OPS_STORE, OPS_CSV, OPS_COLUMNS, ["issue_date"])
+    # Write to Google Sheets if connected
+    if _gsheet_write(df, GS_TAB_OPS, OPS_COLUMNS, {"issue_date": "%d-%m-%Y"}) is False:
+        raise RuntimeError(f"Google Sheets write failed ({GS_TAB_OPS})")
+
+
+def _write_circ(df, journaled: bool = False):
+    if journaled:
+        compact_journal("circ")
+    else:
+        _local_write(df, GS_TAB_CIRC, CIRC_STORE, CIRC_CSV, CIRC_COLUMNS, ["due_date"])
+    if _gsheet_write(df, GS_TAB_CIRC, CIRC_COLUMNS, {"due_date": "%d-%m-%Y"}) is False:
+        raise RuntimeError(f"Google Sheets write failed ({GS_TAB_CIRC})")
+
+
+# ─── Write-behind save queue ──────────────────────────────────────────────────
+SAVE_RETRY_MAX_DELAY = 60   # seconds between retries of a failing save, at most
+SAVE_MAX_ATTEMPTS = 5       # a save failing this often is dropped until the dataset is saved again
+
+
+@st.cache_resource(show_spinner=False)
+def _save_queue() -> dict:
+    """
+    Process-wide write-behind queue drained by one background thread.
+    "pending" maps dataset → (writer, frame, journaled) in first-queued
+    order; a newer save of the same dataset replaces the queued frame but
+    keeps its place, and stays a full (non-journaled) write if either was.
+    "failed" maps dataset → (error, attempts, journaled) for saves that
+    failed last time they were tried; "retry_at" holds their backoff.
+    """
+    q = {"cond": threading.Condition(), "pending": {}, "busy": None,
+         "failed": {}, "retry_at": {}}
+    threading.Thread(target=_save_worker, args=(q,), name="delta-ops-save", daemon=True).start()
+    atexit.register(_wait_drained, q, 10)
+    return q
+
+
+def _next_save(q: dict):
+    """First pending dataset whose backoff has passed, else seconds to wait. Caller holds cond."""
+    now = time.monotonic()
+    wait = None
+    for name in q["pending"]:
+        due = q["retry_at"].get(name, 0) - now
+        if due <= 0:
+            return name
+        wait = due if wait is None else min(wait, due)
+    return wait
+
+
+def _save_worker(q: dict):
+    """
+    Write queued saves one at a time. A failing save goes back behind the
+    others with a growing delay, so one dataset cannot hold up the rest;
+    after SAVE_MAX_ATTEMPTS it is dropped and stays SYNC FAILED until the
+    dataset is saved again.
+    """
+    cond = q["cond"]
+    while True:
+        with cond:
+            while True:
+                name = _next_save(q)
+                if isinstance(name, str):
+                    break
+                cond.wait(name)
+            writer, df, journaled = q["pending"].pop(name)
+            q["busy"] = name
+
+        try:
+            writer(df, journaled=journaled)
+            error = None
+        except Exception as e:
+            error = f"{name}: {e}"
+
+        with cond:
+            q["busy"] = None
+            if error is None:
+                q["failed"].pop(name, None)
+                q["retry_at"].pop(name, None)
+            else:
+                attempts = q["failed"].get(name, (None, 0))[1] + 1
+                q["failed"][name] = (error, attempts, journaled)
+                newer = q["pending"].pop(name, None)
+                if newer is not None:
+                    # A newer save of this dataset supersedes the failing one
+                    writer, df, journaled = newer[0], newer[1], newer[2] and journaled
+                if newer is not None or attempts < SAVE_MAX_ATTEMPTS:
+                    q["pending"][name] = (writer, df, journaled)
+                    q["retry_at"][name] = time.monotonic() + min(2 ** (attempts - 1), SAVE_RETRY_MAX_DELAY)
+                else:
+                    q["retry_at"].pop(name, None)
+            cond.notify_all()
+
+
+def _enqueue_save(name: str, writer, df: pd.DataFrame, journaled: bool = False,
+                  publish: bool = True) -> pd.DataFrame:
+    """
+    Queue df for persistence by writer(df, journaled=...), publish it to
+    other sessions (unless the caller does that itself), return the queued
+    copy immediately. journaled: the change is in the journal, so folding
+    the journal is enough locally — unless a queued save it replaces was not.
+    """
+    q = _save_queue()
+    # Copy: handlers update session frames in place after queueing
+    snapshot = df.copy()
+    with q["cond"]:
+        queued = q["pending"].get(name)
+        if queued is not None:
+            journaled = journaled and queued[2]
+        elif name in q["failed"]:
+            # The dropped save may not have reached the local store either
+            journaled = journaled and q["failed"][name][2]
+        q["pending"][name] = (writer, snapshot, journaled)
+        q["cond"].notify_all()
+    if publish:
+        _publish_shared(name, snapshot)
+    return snapshot
+
+
+def _save_in_flight(name: str) -> bool:
+    q = _save_queue()
+    with q["cond"]:
+        return name in q["pending"] or q["busy"] == name
+
+
+def save_status() -> tuple:
+    """(number of datasets waiting to be written, errors of failing saves or None)."""
+    q = _save_queue()
+    with q["cond"]:
+        error = "; ".join(err for err, _, _ in q["failed"].values()) or None
+        return len(q["pending"]) + (q["busy"] is not None), error
+
+
+def save_failed(name: str) -> bool:
+    """True while the last save of a dataset failed (it is retrying or was dropped)."""
+    q = _save_queue()
+    with q["cond"]:
+        return name in q["failed"]
+
+
+def _wait_drained(q: dict, timeout: float = None) -> bool:
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with q["cond"]:
+        while q["pending"] or q["busy"] is not None:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            q["cond"].wait(remaining)
+    return True
+
+
+def flush_saves(timeout: float = None) -> bool:
+    """Block until every queued save has been written. False on timeout."""
+    return _wait_drained(_save_queue(), timeout)
+
+
+# ─── Shared data cache (all sessions) ─────────────────────────────────────────
+DATA_CACHE_TTL = 300   # seconds before a dataset is re-read from Sheets / CSV
+
+
+@st.cache_resource(show_spinner=False)
+def _data_cache() -> dict:
+    """
+    Process-wide copy of each dataset, shared by every session.
+    entries: name → {"lock", "df", "version", "loaded_at"}. The version is
+    bumped whenever the content changes; sessions compare it on each rerun.
+    """
+    return {"lock": threading.Lock(), "entries": {}}
+
+
+def _cache_entry(name: str) -> dict:
+    cache = _data_cache()
+    with cache["lock"]:
+        return cache["entries"].setdefault(
+            name, {"lock": threading.Lock(), "df": None, "version": 0, "loaded_at": 0.0})
+
+
+def _load_due(name: str, entry: dict) -> bool:
+    """True when shared_data would (re)load the dataset rather than serve the cached copy."""
+    fresh = time.monotonic() - entry["loaded_at"] < DATA_CACHE_TTL
+    return entry["df"] is None or not (fresh or _save_in_flight(name))
+
+
+def shared_data(name: str, loader) -> tuple:
+    """
+    (frame, version) for a dataset. Loads on first use and re-reads once
+    DATA_CACHE_TTL has passed — unless a save is still queued, in which case
+    the cached copy is newer than storage. The frame is shared: copy before
+    mutating.
+    """
+    entry = _cache_entry(name)
+    with entry["lock"]:
+        if _load_due(name, entry):
+            df = loader()
+            if entry["df"] is None or not df.equals(entry["df"]):
+                entry["df"] = df
+                entry["version"] += 1
+            entry["loaded_at"] = time.monotonic()
+        return entry["df"], entry["version"]
+
+
+def shared_index(name: str, df: pd.DataFrame) -> dict:
+    """Value index of the shared frame df — built once, then shared by every session."""
+    entry = _cache_entry(name)
+    with entry["lock"]:
+        cached = entry.get("index")
+        if cached is None or cached[0] is not df:
+            cached = (df, build_value_index(df))
+            entry["index"] = cached
+        return cached[1]
+
+
+def roll_over_urgency():
+    """Recompute the shared task frame's urgency columns for the new IST day (bumps its version)."""
+    entry = _cache_entry("task")
+    with entry["lock"]:
+        if entry["df"] is None:
+            return
+        entry["df"] = with_urgency(entry["df"])
+        entry["version"] += 1
+
+
+@st.cache_resource(show_spinner=False)
+def _urgency_clock() -> threading.Thread:
+    """Process-wide thread calling roll_over_urgency just after each midnight IST."""
+    def _run():
+        while True:
+            now = datetime.now(IST)
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=IST)
+            time.sleep((midnight - now).total_seconds() + 1)
+            try:
+                roll_over_urgency()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=_run, name="delta-ops-urgency", daemon=True)
+    thread.start()
+    return thread
+
+
+def _publish_shared(name: str, df: pd.DataFrame):
+    """Write-through on save: replace the cached frame and bump its version."""
+    entry = _cache_entry(name)
+    with entry["lock"]:
+        entry["df"] = df
+        entry["version"] += 1
+        entry["loaded_at"] = time.monotonic()
+
+
+# ─── Concurrent edits (optimistic versioning) ────────────────────────────────
+# A session edits a private copy of the shared frame at some version. On
+# save the version is checked again; if another session has saved since,
+# the edit is three-way merged with the shared frame instead of replacing it.
+DESC_COLS = {"ops": "issue_description", "circ": "circular_description", "task": "issue_description"}
+CONFLICT_REPORT_MAX = 3   # conflicts spelled out in the flash message
+
+
+def merge_records(name: str, base: pd.DataFrame, ours: pd.DataFrame, theirs: pd.DataFrame) -> tuple:
+    """
+    Three-way merge of ours and theirs, both edited from base, compared as
+    stored rows (see _merge_rows). Returns (merged frame, conflicts) with
+    conflicts as (record id, description, column or None, our value, their value);
+    for a record deleted on one side the values say whether it still
+    exists on ours / theirs.
+    """
+    _, columns, date_cols = SQL_DATASETS[name]
+    rows, clashes = _merge_rows(*(_sqlite_rows(df, columns, date_cols) for df in (base, ours, theirs)),
+                                columns.index(ID_COL))
+    labels = dict(zip(base[ID_COL], base[DESC_COLS[name]].astype(str)))
+    conflicts = [(rid, labels.get(rid, rid), columns[c], ov, tv) if c is not None
+                 else (rid, labels.get(rid, rid), None, ov is not None, tv is not None)
+                 for rid, c, ov, tv in clashes]
+    merged = as_categories(_sqlite_frame(rows, columns, date_cols), name)
+    return (with_urgency(merged) if "_urgency" in ours.columns else merged), conflicts
+
+
+def _event_payload(kind: str, ids: list, prev: pd.DataFrame, merged: pd.DataFrame,
+                   columns: list, date_cols: list, positions: list = None) -> dict:
+    """
+    Journal payload for an edit of records ids that turned prev into merged.
+    positions: where ids sit in merged, if known — used for either frame
+    when the ids are found there, so a single-record edit scans nothing.
+    """
+    def stored(df):
+        at = positions is not None and all(
+            p is not None and p < len(df) and df[ID_COL].iat[p] == rid for p, rid in zip(positions, ids))
+        rows = _sqlite_rows(df.iloc[positions] if at else df[isin_mask(df[ID_COL], ids)], columns, date_cols)
+        return [dict(zip(columns, row)) for row in rows]
+    if kind == "create":
+        return {"row": stored(merged)[0]}
+    if kind == "status":
+        return {"from": stored(prev)[0]["status"], "to": stored(merged)[0]["status"]}
+    return {"rows": stored(prev)}
+
+
+def commit_edits(key: str, kind: str, ids: list) -> list:
+    """
+    Save st.session_state[key], the session's edited copy, after a kind
+    ("create" / "status" / "delete") edit of records ids. If the shared
+    version is still the one the copy was taken from, it is saved as is;
+    otherwise it is merged with the shared frame first, so neither side's
+    changes are lost. The edit is journaled (minus any conflicting records)
+    and the frame queued for Sheets. Either way the session then holds the
+    saved frame. Returns the merge conflicts (empty when everything was applied).
+    """
+    name, writer = {"ops_data":  ("ops",  _write_ops),
+                    "circ_data": ("circ", _write_circ),
+                    "task_data": ("task", _write_task)}[key]
+    table, columns, date_cols = SQL_DATASETS[name]
+    ours = st.session_state[key]
+    entry = _cache_entry(name)
+    with entry["lock"]:
+        prev = entry["df"] if entry["df"] is not None else st.session_state[f"{key}_base"]
+        if entry["df"] is None or entry["version"] == st.session_state.get(f"{key}_version"):
+            merged, conflicts = ours, []
+        else:
+            merged, conflicts = merge_records(name, st.session_state[f"{key}_base"], ours, prev)
+        clashed = {c[0] for c in conflicts}
+        ids = [rid for rid in ids if rid not in clashed]
+        journaled = False
+        positions = [record_position(key, rid) for rid in ids] if merged is ours else None
+        try:
+            if ids:
+                journal_append(table, kind, ids,
+                               _event_payload(kind, ids, prev, merged, columns, date_cols, positions))
+            journaled = True
+        except sqlite3.Error:
+            pass   # journal unavailable: the worker rewrites the local store instead
+        snapshot = _enqueue_save(name, writer, merged, journaled=journaled, publish=False)
+        entry["df"] = snapshot
+        entry["version"] += 1
+        entry["loaded_at"] = time.monotonic()
+        version = entry["version"]
+        index = st.session_state.get(f"{key}_index")
+        if merged is ours and index is not None and index[0] is ours:
+            entry["index"] = (snapshot, index[1])
+    # The session keeps editing its own frame (the queue holds a copy), so
+    # its value index and id map stay valid without being rebuilt
+    st.session_state[key] = merged
+    if merged is not ours:
+        st.session_state.pop(f"{key}_index", None)
+        st.session_state.pop(f"{key}_ids", None)
+    st.session_state[f"{key}_base"] = snapshot
+    st.session_state[f"{key}_version"] = version
+    return conflicts
+
+
+def save_flash(conflicts: list, ok_msg: str) -> tuple:
+    """Flash message for a commit_edits result: ok_msg, or what was not applied."""
+    if not conflicts:
+        return ("success", ok_msg)
+    parts = []
+    for _, desc, col, ov, tv in conflicts[:CONFLICT_REPORT_MAX]:
+        desc = _html.escape(desc[:40])
+        if col is not None:
+            parts.append(f"“{desc}” {col.replace('_', ' ')}: yours {_html.escape(str(ov))}, "
+                         f"kept {_html.escape(str(tv))}")
+        elif tv:
+            parts.append(f"“{desc}” was edited in another session, so it was not deleted")
+        else:
+            parts.append(f"“{desc}” was deleted in another session before your change")
+    more = len(conflicts) - CONFLICT_REPORT_MAX
+    if more > 0:
+        parts.append(f"{more} more")
+    return ("error", f"Saved, but another session changed the same records first — "
+                     f"{len(conflicts)} change(s) not applied: " + "; ".join(parts) + ".")
+
+
+# ─── Bulk upload helpers ───────────────────────────────────────────────────────
+
+def make_ops_template() -> bytes:
+    sample = pd.DataFrame([
+        {"team": "DP",      "issue_description": "Settlement mismatch detected in morning run",
+         "issue_date": date.today().strftime("%d-%m-%Y"), "reported_to": "Tech Excel", "severity": "High",   "status": "Open"},
+        {"team": "BROKING", "issue_description": "Client account showing FO capital shortfall post EOD",
+         "issue_date": date.today().strftime("%d-%m-%Y"), "reported_to": "CDSL",       "severity": "Medium", "status": "In Progress"},
+        {"team": "EAGLE",   "issue_description": "EOD reconciliation failed for BSE segment",
+         "issue_date": (date.today() - timedelta(days=2)).strftime("%d-%m-%Y"), "reported_to": "BSE", "severity": "Low", "status": "Closed"},
+    ])
+    return sample.to_csv(index=False).encode()
+
+
+def make_circ_template() -> bytes:
+    """Template matching revised circular format: Team, Circular_No_description, Due_date, reported_to, severity, status"""
+    sample = pd.DataFrame([
+        {"Team": "DP",         "Circular_No_description": "Nomination",          "Due_date": date.today().strftime("%d-%m-%Y"), "reported_to": "Techexcel", "severity": "High",   "status": "Open"},
+        {"Team": "BROKING",    "Circular_No_description": "Settlement Holidays",  "Due_date": date.today().strftime("%d-%m-%Y"), "reported_to": "Tech",      "severity": "Medium", "status": "In Progress"},
+        {"Team": "EAGLE",      "Circular_No_description": "Risk Metrics",         "Due_date": (date.today() - timedelta(days=3)).strftime("%d-%m-%Y"), "reported_to": "CDSL", "severity": "Low", "status": "Closed"},
+        {"Team": "COMPLIANCE", "Circular_No_description": "RMS",                  "Due_date": (date.today() - timedelta(days=3)).strftime("%d-%m-%Y"), "reported_to": "CDSL", "severity": "Low", "status": "Closed"},
+    ])
+    return sample.to_csv(index=False).encode()
+
+
+# Upload schema per dataset. Header names are matched after strip / lower /
+# " " → "_"; "aliases" then map alternative headers onto the stored column.
+# Text columns are stripped, and cased where "case" says so; "enums" limit
+# the allowed values, "dates" are parsed day-first and "non_empty" columns
+# must not be blank. "labels" name columns in messages as the template does.
+# Record ids are not part of an upload: every imported row gets a new one.
+UPLOAD_SCHEMAS = {
+    "ops": {
+        "columns":   [c for c in OPS_COLUMNS if c != ID_COL],
+        "aliases":   {},
+        "case":      {"team": "upper", "severity": "title", "status": "title"},
+        "enums":     {"team": OPS_TEAMS, "severity": SEVERITIES, "status": STATUSES},
+        "dates":     ["issue_date"],
+        "non_empty": ["issue_description"],
+        "labels":    {},
+        "header":    "team, issue_description, issue_date, reported_to, severity, status",
+    },
+    "circ": {
+        "columns":   [c for c in CIRC_COLUMNS if c != ID_COL],
+        "aliases":   {"circular_no_description": "circular_description",
+                      "circular_no/description": "circular_description",
+                      "description":             "circular_description",
+                      "issue_description":       "circular_description",
+                      "circular":                "circular_description",
+                      "issue_date":              "due_date"},
+        "case":      {"team": "upper", "severity": "title", "status": "title"},
+        "enums":     {"team": CIRC_TEAMS, "severity": SEVERITIES, "status": STATUSES},
+        "dates":     ["due_date"],
+        "non_empty": ["circular_description"],
+        "labels":    {"circular_description": "Circular_No_description"},
+        "header":    "Team, Circular_No_description, Due_date, reported_to, severity, status",
+    },
+    "task": {
+        "columns":   [c for c in TASK_COLUMNS if c != ID_COL],
+        "aliases":   {"issue_date": "due_date"},
+        "case":      {"team": "upper", "severity": "title", "status": "title"},
+        "enums":     {"team": TASK_TEAMS, "severity": SEVERITIES, "status": STATUSES},
+        "dates":     ["due_date"],
+        "non_empty": ["issue_description"],
+        "labels":    {"due_date": "Due Date"},
+        "header":    "team, issue_description, Due Date, Task, severity, status",
+    },
+}
+UPLOAD_SAMPLE_LIMIT = 5   # offending values / rows quoted per error line
+PROBLEM_COLUMNS = ["row", "column", "value", "problem"]
+
+
+def validate_bulk(name: str, df_raw: pd.DataFrame, first_row: int = 2) -> tuple:
+    """
+    Validate and normalise an upload (or one chunk of it) against
+    UPLOAD_SCHEMAS[name] in one vectorised pass; each column is normalised
+    once, over its distinct values.
+    Returns (clean_df, errors, problems). clean_df is None unless every row
+    passed. problems has one line per offending cell (row, column, value,
+    problem) with spreadsheet row numbers — header on row 1, so df_raw's
+    first row is first_row.
+    """
+    schema = UPLOAD_SCHEMAS[name]
+    columns = schema["columns"]
+    df = df_raw.rename(columns=lambda c: str(c).strip().lower().replace(" ", "_"))
+    for alias, canonical in schema["aliases"].items():
+        if alias in df.columns and canonical not in df.columns:
+            df = df.rename(columns={alias: canonical})
+
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        return None, [f"Missing required columns: {missing}",
+                      f"Your file columns: {list(df.columns)}",
+                      f"Required: {schema['header']}"], pd.DataFrame(columns=PROBLEM_COLUMNS)
+
+    rows = np.arange(first_row, first_row + len(df))
+    out, problems = {}, []
+    for col in columns:
+        # codes index the distinct values; -1 (missing) picks the "" appended last
+        codes, uniques = pd.factorize(df[col])
+        text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+        if col in schema["dates"]:
+            parsed = parse_dates(text)
+            out[col] = np.append(parsed.to_numpy(), np.datetime64("NaT"))[codes]
+            values = np.append(text.to_numpy(dtype=object), "")
+            bad, kind = np.append(parsed.isna().to_numpy(), True), "date"
+        else:
+            case = schema["case"].get(col)
+            if case == "upper":
+                text = text.str.upper()
+            elif case == "title":
+                text = text.str.title()
+            values = np.append(text.to_numpy(dtype=object), "")
+            out[col] = values[codes]
+            if col in schema["enums"]:
+                bad, kind = np.append(~text.isin(schema["enums"][col]).to_numpy(), True), "enum"
+            elif col in schema["non_empty"]:
+                bad, kind = values == "", "empty"
+            else:
+                continue
+        bad_rows = bad[codes]
+        if bad_rows.any():
+            problems.append(pd.DataFrame({"row": rows[bad_rows], "column": col,
+                                          "value": values[codes][bad_rows], "problem": kind}))
+
+    if problems:
+        problems = pd.concat(problems, ignore_index=True)
+        return None, _problem_lines(name, _fold_problems({}, problems)), problems
+    out[ID_COL] = new_ids(len(df))
+    return as_categories(pd.DataFrame(out, index=df.index), name), [], pd.DataFrame(columns=PROBLEM_COLUMNS)
+
+
+def _fold_problems(summary: dict, problems: pd.DataFrame) -> dict:
+    """Merge problems into {(column, problem): {"count", "values": {value: first row}, "rows"}}."""
+    for (col, kind), grp in problems.groupby(["column", "problem"], sort=False):
+        entry = summary.setdefault((col, kind), {"count": 0, "values": {}, "rows": []})
+        entry["count"] += len(grp)
+        entry["rows"] += grp["row"].head(UPLOAD_SAMPLE_LIMIT - len(entry["rows"])).tolist()
+        firsts = grp.drop_duplicates("value")
+        for v, r in zip(firsts["value"], firsts["row"]):
+            if len(entry["values"]) >= UPLOAD_SAMPLE_LIMIT:
+                break
+            entry["values"].setdefault(v, int(r))
+    return summary
+
+
+def _problem_lines(name: str, summary: dict) -> list:
+    """One error line per (column, problem), quoting a few values and rows."""
+    schema = UPLOAD_SCHEMAS[name]
+    lines = []
+    for (col, kind), e in summary.items():
+        label = schema["labels"].get(col, col)
+        if kind == "empty":
+            rows = ", ".join(str(r) for r in e["rows"])
+            more = ", …" if e["count"] > len(e["rows"]) else ""
+            lines.append(f"{e['count']} row(s) have empty {label} — row(s) {rows}{more}.")
+            continue
+        shown = ", ".join(f"'{v}' (row {r})" for v, r in e["values"].items())
+        more = ", …" if len(e["values"]) >= UPLOAD_SAMPLE_LIMIT else ""
+        if kind == "date":
+            lines.append(f"{e['count']} invalid date(s) in '{label}': {shown}{more}. "
+                         f"Use DD-MM-YYYY or YYYY-MM-DD.")
+        else:
+            lines.append(f"Invalid {label} in {e['count']} row(s): {shown}{more} — "
+                         f"must be one of {schema['enums'][col]}")
+    return lines
+
+
+def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+
+
+def _write_task(df, journaled: bool = False):
+    if journaled:
+        compact_journal("task")
+    else:
+        _local_write(df, GS_TAB_TASK, TASK_STORE, TASK_CSV, TASK_COLUMNS, ["due_date"])
+    if _gsheet_write(df, GS_TAB_TASK, TASK_COLUMNS, {"due_date": "%d-%m-%Y"}) is False:
+        raise RuntimeError(f"Google Sheets write failed ({GS_TAB_TASK})")
+
+
+def make_task_template() -> bytes:
+    sample = pd.DataFrame([
+        {"team": "DP",      "issue_description": "SEBI circular SEBI/HO/MRD/2026/001 — settlement cycle update",
+         "Due Date": date.today().strftime("%d-%m-%Y"), "Task": "MNRL",          "severity": "High",   "status": "Open"},
+        {"team": "BROKING", "issue_description": "NSE circular implementation — peak margin reporting change",
+         "Due Date": date.today().strftime("%d-%m-%Y"), "Task": "Closure Email", "severity": "Medium", "status": "In Progress"},
+        {"team": "EAGLE",   "issue_description": "CDSL circular — KYC re-validation for dormant accounts",
+         "Due Date": (date.today() - timedelta(days=3)).strftime("%d-%m-%Y"), "Task": "Testing", "severity": "Low", "status": "Closed"},
+    ])
+    return sample.to_csv(index=False).encode()
+
+
+# ─── Chunked bulk import ──────────────────────────────────────────────────────
+# Uploads are parsed, validated and written IMPORT_CHUNK_ROWS rows at a time,
+# so a backfill never holds more than one chunk of the file in memory.
+IMPORT_CHUNK_ROWS   = 20_000   # rows per chunk
+IMPORT_PROBLEM_ROWS = 50_000   # offending cells kept for the error download
+IMPORT_PREVIEW_ROWS = 10
+
+
+def iter_upload_chunks(upload, chunk_rows: int = IMPORT_CHUNK_ROWS):
+    """(spreadsheet row of the first line, raw chunk) for an uploaded CSV, read as text."""
+    if hasattr(upload, "seek"):
+        upload.seek(0)
+    first = 2   # row 1 is the header
+    for chunk in pd.read_csv(upload, dtype=str, chunksize=chunk_rows):
+        yield first, chunk
+        first += len(chunk)
+
+
+def validate_upload(upload, name: str, on_chunk=None, on_error=None,
+                    chunk_rows: int = IMPORT_CHUNK_ROWS) -> tuple:
+    """
+    Validate an upload against UPLOAD_SCHEMAS[name] chunk by chunk.
+    Returns (rows read, error lines, problems, raw preview, validated preview).
+    Error lines summarise every chunk per column; problems keeps the first
+    IMPORT_PROBLEM_ROWS offending cells. on_chunk(rows read so far) and
+    on_error(line) are called while the file is read, so the first failing
+    chunk is reported before the rest of the file is parsed.
+    """
+    n_rows, summary, kept, n_kept = 0, {}, [], 0
+    errors = raw_head = clean_head = None
+    for first, chunk in iter_upload_chunks(upload, chunk_rows):
+        n_rows += len(chunk)
+        if raw_head is None:
+            raw_head = chunk.head(IMPORT_PREVIEW_ROWS)
+        clean, errs, problems = validate_bulk(name, chunk, first)
+        if clean is not None and clean_head is None:
+            clean_head = clean.head(IMPORT_PREVIEW_ROWS)
+        if errs and problems.empty:
+            errors = errs   # header problem: the same for every chunk
+            if on_error is not None:
+                for e in errs:
+                    on_error(e)
+            break
+        if errs:
+            if not summary and on_error is not None:
+                for e in errs:
+                    on_error(e)
+            _fold_problems(summary, problems)
+            if n_kept < IMPORT_PROBLEM_ROWS:
+                kept.append(problems.head(IMPORT_PROBLEM_ROWS - n_kept))
+                n_kept += len(kept[-1])
+        if on_chunk is not None:
+            on_chunk(n_rows)
+    if errors is None:
+        errors = _problem_lines(name, summary)
+    problems = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=PROBLEM_COLUMNS)
+    return n_rows, errors, problems, raw_head, clean_head
+
+
+def _gsheet_append(df: pd.DataFrame, tab_name: str, columns: list, date_fmt_cols: dict):
+    """Append df's rows to a sheet tab. Same return values as _gsheet_write."""
+    try:
+        new_rows = _gsheet_rows(df, columns, date_fmt_cols)
+        synced = _gsheet_pool()["synced"]
+
+        def _append(ws):
+            old_rows = synced.pop(tab_name, None)
+            if new_rows:
+                ws.append_rows([list(r) for r in new_rows], value_input_option="USER_ENTERED")
+            if old_rows is not None:
+                old_rows.extend(new_rows)
+                synced[tab_name] = old_rows
+            return True
+
+        return _with_worksheet(tab_name, columns, _append)
+    except Exception:
+        return False
+
+
+def _gsheet_stage(tab_name: str, columns: list):
+    """
+    A fresh staging tab (header row only) to build a full replacement of
+    tab_name in, or None when Sheets is not configured. A staging tab left
+    over from a failed import is dropped first.
+    """
+    sh = _get_gsheet()
+    if sh is None:
+        return None
+    title = f"{tab_name}__staging"
+    try:
+        sh.del_worksheet(sh.worksheet(title))
+    except Exception:
+        pass
+    ws = sh.add_worksheet(title=title, rows=1, cols=len(columns))
+    ws.append_row(columns, value_input_option="USER_ENTERED")
+    return ws
+
+
+def _gsheet_swap(tab_name: str, staged):
+    """
+    Put the staged tab in place of tab_name — the old tab is deleted and the
+    staged one renamed in one batch_update, so readers never see the tab
+    missing or half written.
+    """
+    sh = _get_gsheet()
+    pool = _gsheet_pool()
+    with pool["lock"]:
+        old = pool["tabs"].pop(tab_name, None) or sh.worksheet(tab_name)
+        sh.batch_update({"requests": [
+            {"deleteSheet": {"sheetId": old.id}},
+            {"updateSheetProperties": {"properties": {"sheetId": staged.id, "title": tab_name,
+                                                      "index": old.index},
+                                       "fields": "title,index"}},
+        ]})
+        staged._properties["title"] = tab_name
+        pool["tabs"][tab_name] = staged
+
+
+def _gsheet_unstage(staged):
+    """Best-effort removal of a staging tab after a failed import."""
+    try:
+        _get_gsheet().del_worksheet(staged)
+    except Exception:
+        pass
+
+
+def _gsheet_import(table: str, columns: list, gs_fmt: dict, chunks, replace: bool):
+    """
+    Send imported rows (an iterable of frames, already in the local store)
+    to the sheet tab. replace: built in a staging tab that takes the live
+    tab's place at the end. Append: added to the live tab; if a chunk fails,
+    the rows appended so far are deleted again. Either way a failure leaves
+    the tab as it was (snapshot dropped) and is raised.
+    Returns None when Sheets is not configured, else True.
+    """
+    ws = _with_worksheet(table, columns, lambda ws: ws)
+    if ws is None:
+        return None
+    synced = _gsheet_pool()["synced"]
+    if replace:
+        staged, rows = _gsheet_stage(table, columns), []
+        try:
+            for chunk in chunks:
+                chunk_rows = _gsheet_rows(chunk, columns, gs_fmt)
+                staged.append_rows([list(r) for r in chunk_rows], value_input_option="USER_ENTERED")
+                rows += chunk_rows
+            _gsheet_swap(table, staged)
+        except Exception:
+            _gsheet_unstage(staged)
+            synced.pop(table, None)
+            raise
+        synced[table] = rows
+        return True
+    n_before = len(ws.col_values(1))   # header included
+    try:
+        for chunk in chunks:
+            if _gsheet_append(chunk, table, columns, gs_fmt) is False:
+                raise RuntimeError(f"Google Sheets write failed ({table})")
+    except Exception:
+        synced.pop(table, None)
+        try:
+            n_after = len(ws.col_values(1))
+            if n_after > n_before:
+                ws.delete_rows(n_before + 1, n_after)
+        except Exception:
+            pass   # no snapshot: the next save rewrites the tab in full
+        raise
+    return True
+
+
+def _local_dataset(name: str) -> pd.DataFrame:
+    """The dataset as a loader returns it, read from the local store only."""
+    table, columns, date_cols = SQL_DATASETS[name]
+    store_path, csv_path = LOCAL_FILES[name]
+    df = as_categories(_local_read(table, store_path, csv_path, columns, date_cols), name)
+    return with_urgency(df) if name == "task" else df
+
+
+def import_upload(name: str, upload, replace: bool, chunk_rows: int = IMPORT_CHUNK_ROWS,
+                  publish: bool = True, checked: bool = False) -> tuple:
+    """
+    Stream the rows of an upload into storage and refresh the shared copy
+    of the dataset (unless publish is False, as in the command line, where
+    the total is counted in storage instead of reloading the dataset).
+    Returns (rows imported, total rows).
+    The whole upload is validated first (unless checked: the caller just
+    did). The rows then go to the local store — on SQLite in one
+    transaction — and only once that is committed to Sheets, streamed back
+    from the store (_gsheet_import). If the Sheets step fails, the tab is
+    left as it was and a full save of the dataset is queued, so the save
+    queue brings Sheets up to date (SYNC FAILED shows meanwhile).
+    The dataset's shared entry is locked throughout, so a commit_edits made
+    meanwhile waits and then merges with the imported frame.
+    The Parquet / CSV store cannot be appended to, so with that backend the
+    chunks are still collected and written in one go.
+    The import is journaled as one "import" event; the journal tail before
+    it is folded into the snapshot first.
+    """
+    table, columns, date_cols = SQL_DATASETS[name]
+    writer = {"ops": _write_ops, "circ": _write_circ, "task": _write_task}[name]
+    store_path, csv_path = LOCAL_FILES[name]
+    gs_fmt = {dc: DATE_FMT for dc in date_cols}
+    event = {"rows": 0, "replace": replace, "file": getattr(upload, "name", "")}
+    entry = _cache_entry(name)
+
+    if not checked:
+        errors = validate_upload(upload, name, chunk_rows=chunk_rows)[1]
+        if errors:
+            raise ValueError(errors[0])
+
+    with entry["lock"]:
+        # A queued save of the pre-import frame must not land on top of the import
+        if not flush_saves(timeout=60):
+            raise RuntimeError("earlier saves are still pending — try again shortly")
+
+        use_sqlite = LOCAL_BACKEND == "sqlite"
+        state = _sqlite_state()
+        held, n_imported = [], 0
+        if use_sqlite:
+            con = _sqlite_conn()
+            insert_sql = (f"INSERT INTO {table} ({', '.join(columns)}, rev) "
+                          f"VALUES ({', '.join('?' * (len(columns) + 1))})")
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                rev = _sqlite_version(con, table) + 1
+                _sqlite_fold(con, table, columns, rev)
+                if replace:
+                    con.execute(f"INSERT INTO _tombstones (dataset, record_id, version) "
+                                f"SELECT ?, {ID_COL}, ? FROM {table} WHERE {ID_COL} IS NOT NULL", (table, rev))
+                    con.execute(f"DELETE FROM {table}")
+                # Rows past this id are the imported ones
+                last_id = con.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                for first, chunk in iter_upload_chunks(upload, chunk_rows):
+                    clean, errs, _ = validate_bulk(name, chunk, first)
+                    if errs:
+                        raise ValueError(errs[0])
+                    con.executemany(insert_sql, [row + (rev,) for row in _sqlite_rows(clean, columns, date_cols)])
+                    n_imported += len(clean)
+                event["rows"] = n_imported
+                n_total = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                _journal_mark(con, table, journal_append(table, "import", [], event, con=con))
+                con.execute(
+                    "INSERT INTO _meta (dataset, version) VALUES (?, 1) "
+                    "ON CONFLICT(dataset) DO UPDATE SET version = version + 1", (table,))
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+            finally:
+                state["synced"].pop(table, None)
+
+            def imported():
+                cur = con.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id", (last_id,))
+                while rows := cur.fetchmany(chunk_rows):
+                    yield _sqlite_frame(rows, columns, date_cols)
+        else:
+            for first, chunk in iter_upload_chunks(upload, chunk_rows):
+                clean, errs, _ = validate_bulk(name, chunk, first)
+                if errs:
+                    raise ValueError(errs[0])
+                held.append(clean)
+                n_imported += len(clean)
+            base = [] if replace else [_local_read(table, store_path, csv_path, columns, date_cols)]
+            merged = pd.concat(base + held, ignore_index=True)
+            _file_write(merged, store_path, csv_path, columns, date_cols)
+            n_total = len(merged)
+            event["rows"] = n_imported
+            _journal_mark(_sqlite_conn(), table, journal_append(table, "import", [], event))
+            imported = lambda: iter(held)
+
+        try:
+            # An append on top of a tab a failed save never reached would
+            # keep it behind: leave that to the queued full save
+            if not replace and save_failed(name):
+                raise RuntimeError("Sheets is behind the local store")
+            _gsheet_import(table, columns, gs_fmt, imported(), replace)
+            synced = True
+        except Exception:
+            synced = False
+
+        if publish or not synced:
+            df = _local_dataset(name)
+            if not synced:
+                # The local store has the import: the save queue retries Sheets
+                _enqueue_save(name, writer, df, journaled=True, publish=False)
+            if publish:
+                # As _publish_shared, under the lock already held
+                entry["df"] = df
+                entry["version"] += 1
+                entry["loaded_at"] = time.monotonic()
+        return n_imported, n_total
+
+
+def render_upload_check(upload, file_key: str, name: str, plain: bool = False) -> tuple:
+    """
+    Validate an upload, showing the row count, raw preview and errors as
+    they are found, plus a CSV of every failing cell. The result is kept in
+    session state under file_key, so reruns (e.g. picking the import mode)
+    do not parse the file again. plain drops the icons, matching the Task tab.
+    Returns (rows read, error lines, validated preview).
+    """
+    status = st.empty()
+    preview_box = st.container()
+    error_box = st.empty()
+    err_icon, file_icon = ("Error:", "File: ") if plain else ("❌", "📄 ")
+
+    def _err(e, target=st):
+        target.markdown(f'<div class="upload-result upload-err">{err_icon} {_html.escape(e)}</div>',
+                        unsafe_allow_html=True)
+
+    def _progress(n):
+        status.markdown(
+            f'<div class="upload-result upload-warn">{file_icon}<b>{_html.escape(upload.name)}</b> &nbsp;·&nbsp; '
+            f'validating… <b>{n}</b> rows read</div>', unsafe_allow_html=True)
+
+    check = st.session_state.get(f"{file_key}_check")
+    if check is None:
+        live = error_box.container()
+        check = validate_upload(upload, name, on_chunk=_progress, on_error=lambda e: _err(e, live))
+        st.session_state[f"{file_key}_check"] = check
+    n_rows, errors, problems, raw_head, clean_head = check
+
+    status.markdown(
+        f'<div class="upload-result upload-ok">{file_icon}<b>{_html.escape(upload.name)}</b> &nbsp;·&nbsp; '
+        f'<b>{n_rows}</b> rows detected</div>', unsafe_allow_html=True)
+    if raw_head is not None:
+        with preview_box:
+            with st.expander("Preview uploaded rows" if plain else "👁 Preview uploaded rows", expanded=False):
+                st.dataframe(raw_head, width="stretch")
+    with error_box.container():
+        for e in errors:
+            _err(e)
+        if not problems.empty:
+            st.download_button(
+                "Download failing rows (CSV)" if plain else "📥 Download failing rows (CSV)",
+                data=df_to_csv_bytes(problems),
+                file_name=f"DELTA_OPS_{name}_upload_errors.csv",
+                mime="text/csv",
+                key=f"{file_key}_problems",
+            )
+    return n_rows, errors, clean_head
+
+
+# ─── HTML rendering (vectorised, cached per row) ─────────────────────────────
+SEV_PILL_CLS    = {"High": "high", "Medium": "medium", "Low": "low"}
+STATUS_PILL_CLS = {"Open": "open", "In Progress": "inprogress", "Closed": "closed"}
+ROW_HTML_CACHE_MAX = 50_000   # cached row fragments per kind before the cache is reset
+
+
+@st.cache_resource(show_spinner=False)
+def _row_html_cache() -> dict:
+    """kind → {row content hash: HTML fragment}, shared by all sessions."""
+    return {}
+
+
+def _esc(s: pd.Series) -> pd.Series:
+    """html.escape over a whole Series."""
+    s = s.astype(str)
+    for ch, ent in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")):
+        s = s.str.replace(ch, ent, regex=False)
+    return s
+
+
+def _pill_html(s: pd.Series, classes: dict, default: str) -> pd.Series:
+    cls = s.astype(str).map(classes).fillna(default)
+    return '<span class="pill pill-' + cls + '">' + _esc(s) + '</span>'
+
+
+def _date_html(s: pd.Series, fmt: str = "%d %b %Y") -> pd.Series:
+    return pd.to_datetime(s, errors="coerce").dt.strftime(fmt).fillna("—")
+
+
+def _cached_rows_html(kind: str, df: pd.DataFrame, build) -> str:
+    """
+    Concatenated HTML for every row of df. Fragments are cached by row
+    content hash; only rows not seen before go through build(df) → Series.
+    The fragments are picked out of the shared cache once, up front, so
+    another session resetting it mid-render cannot lose any.
+    """
+    if df.empty:
+        return ""
+    cache = _row_html_cache().setdefault(kind, {})
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    parts = [cache.get(k) for k in hashes.tolist()]
+    miss = np.fromiter((p is None for p in parts), dtype=bool, count=len(parts))
+    if miss.any():
+        built = build(df[miss]).tolist()
+        for pos, fragment in zip(np.flatnonzero(miss).tolist(), built):
+            parts[pos] = fragment
+        if len(cache) > ROW_HTML_CACHE_MAX:
+            cache.clear()
+        cache.update(zip(hashes[miss].tolist(), built))
+    return "".join(parts)
+
+
+def _ops_rows_html(df: pd.DataFrame) -> pd.Series:
+    return (
+        '<tr><td class="team-cell">' + _esc(df["team"]) + '</td>'
+        '<td>' + _esc(df["issue_description"]) + '</td>'
+        '<td>' + _date_html(df["issue_date"]) + '</td>'
+        '<td>' + _esc(df["reported_to"]) + '</td>'
+        '<td>' + _pill_html(df["severity"], SEV_PILL_CLS, "low") + '</td>'
+        '<td>' + _pill_html(df["status"], STATUS_PILL_CLS, "closed") + '</td></tr>'
+    )
+
+
+def _circ_cards_html(df: pd.DataFrame) -> pd.Series:
+    return (
+        '<div class="circ-card">'
+        '<div class="circ-card-title">' + _esc(df["circular_description"]) + '</div>'
+        '<div class="circ-card-meta">'
+        '<span class="card-team">' + _esc(df["team"]) + '</span>'
+        '<span class="card-meta-item">&#128197;&nbsp;' + _date_html(df["due_date"]) + '</span>'
+        '<span class="card-meta-item">&#128228;&nbsp;' + _esc(df["reported_to"]) + '</span>'
+        + _pill_html(df["severity"], SEV_PILL_CLS, "low")
+        + _pill_html(df["status"], STATUS_PILL_CLS, "closed")
+        + '</div></div>'
+    )
+
+
+def _task_cards_html(df: pd.DataFrame) -> pd.Series:
+    """Cards for task rows, styled from their urgency columns."""
+    urgency = df["_urgency"].astype(str)
+    card_cls = urgency.map({"closed": "task-card done", "overdue": "task-card overdue",
+                            "today": "task-card due-today"}).fillna("task-card")
+    soon_badge = ('<span class="task-badge today-badge">DUE IN '
+                  + df["_days_left"].fillna(0).astype(int).astype(str) + 'D</span>')
+    badge = urgency.map({"overdue": '<span class="task-badge overdue-badge">OVERDUE</span>',
+                         "today":   '<span class="task-badge today-badge">DUE TODAY</span>'}) \
+                   .fillna(soon_badge.where(urgency == "soon", ""))
+
+    return (
+        '<div class="' + card_cls + '">'
+        '<div class="task-card-title">' + _esc(df["issue_description"]) + '</div>'
+        '<div class="task-card-meta">'
+        '<span class="card-team">' + _esc(df["team"]) + '</span>'
+        '<span class="task-badge">' + _esc(df["task"]) + '</span>'
+        '<span class="card-meta-item">&#128197;&nbsp;Due:&nbsp;' + _date_html(df["due_date"]) + '</span>'
+        + _pill_html(df["severity"], SEV_PILL_CLS, "low")
+        + _pill_html(df["status"], STATUS_PILL_CLS, "closed")
+        + badge
+        + '</div></div>'
+    )
+
+
+# ─── Dashboard aggregates (memoised per dataset version) ─────────────────────
+# Every metric card and chart series is a popcount over the shared value
+# index (the one the filter tabs use; task due dates enter through the
+# _urgency column). The index argument is not hashed (leading underscore):
+# the dataset version from the shared cache identifies its content.
+def _ordered_teams(teams, known: list) -> list:
+    """Distinct teams, known ones first in their canonical order."""
+    teams = [t for t in pd.unique(pd.Series(teams, dtype=object)) if pd.notna(t)]
+    return [t for t in known if t in teams] + sorted(str(t) for t in teams if t not in known)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def ops_summary(_index: dict, version) -> dict:
+    by_status = index_counts(_index, "status").sort_values(ascending=False, kind="stable")
+    by_sev    = index_counts(_index, "severity")
+    by_team   = index_counts(_index, "team").sort_values(ascending=False, kind="stable")
+    hi_open   = index_mask(_index, "status", ["Open"]) & index_mask(_index, "severity", ["High"])
+    return {
+        "total":         _index["rows"],
+        "n_open":        int(by_status.get("Open", 0)),
+        "n_inprog":      int(by_status.get("In Progress", 0)),
+        "n_closed":      int(by_status.get("Closed", 0)),
+        "n_high":        int(by_sev.get("High", 0)),
+        "n_hi_open":     int(np.count_nonzero(hi_open)),
+        "hi_open_teams": _ordered_teams(index_counts(_index, "team", hi_open).index, OPS_TEAMS),
+        "status_counts": by_status,
+        "sev_counts":    by_sev.reindex(SEVERITIES).fillna(0),
+        "team_counts":   by_team,
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def circ_summary(_index: dict, version) -> dict:
+    by_status = index_counts(_index, "status").sort_values(ascending=False, kind="stable")
+    total = _index["rows"]
+    return {
+        "total":         total,
+        "n_high":        int(index_counts(_index, "severity").get("High", 0)),
+        "status_counts": by_status,
+        "pct_done":      int(by_status.get("Closed", 0) / total * 100) if total > 0 else 0,
+        "team_counts":   index_counts(_index, "team").sort_values(ascending=False, kind="stable"),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def task_summary(_index: dict, version) -> dict:
+    by_urgency = index_counts(_index, "_urgency")
+    by_status  = index_counts(_index, "status").sort_values(ascending=False, kind="stable")
+    overdue    = index_mask(_index, "_urgency", ["overdue"])
+    by_team    = index_counts(_index, "team")
+    teams_order = [t for t in TASK_TEAMS if t in by_team.index]
+    team_status = {stat: index_counts(_index, "team", index_mask(_index, "status", [stat])) for stat in STATUSES}
+    return {
+        "total":         _index["rows"],
+        "n_closed":      int(by_urgency.get("closed", 0)),
+        "n_due_today":   int(by_urgency.get("today", 0)),
+        "n_overdue":     int(by_urgency.get("overdue", 0)),
+        "overdue_teams": _ordered_teams(index_counts(_index, "team", overdue).index, TASK_TEAMS),
+        "status_counts": by_status,
+        "teams_order":   teams_order,
+        "team_status":   {stat: [int(counts.get(t, 0)) for t in teams_order] for stat, counts in team_status.items()},
+    }
+
+
+# ─── Dashboard figures (cached by aggregate fingerprint) ─────────────────────
+# Arguments are the aggregate values themselves, so Streamlit's argument hash
+# is the fingerprint: an unchanged chart is not rebuilt. cache_data hands each
+# caller its own copy, so a session cannot alter the Figure another one draws.
+# plotly is imported on first use — only the dashboard draws charts.
+STATUS_COLORS = {"Open": "#ff4466", "In Progress": "#ffaa00", "Closed": "#00dd88"}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def fig_status_donut(counts: pd.Series, total: int, default_color: str, hole: float = 0.62,
+                     text_size: int = 11, legend_size: int = 10, legend_y: float = -0.15,
+                     center_size: int = 22):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Pie(
+        labels=counts.index,
+        values=counts.values,
+        hole=hole,
+        marker_colors=[STATUS_COLORS.get(s, default_color) for s in counts.index],
+        textfont_size=text_size,
+        textfont_family="IBM Plex Mono",
+        showlegend=True,
+    ))
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#c8d8f0", height=220, margin=dict(t=10,b=10,l=10,r=10),
+        legend=dict(font=dict(family="IBM Plex Mono", size=legend_size), orientation="h",
+                    yanchor="bottom", y=legend_y, xanchor="center", x=0.5),
+        annotations=[dict(text=f"<b>{total}</b>", x=0.5, y=0.5,
+                          font_size=center_size, font_family="IBM Plex Mono",
+                          font_color="#c8d8f0", showarrow=False)]
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def fig_severity_bars(sev_counts: pd.Series):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(
+        x=sev_counts.values,
+        y=sev_counts.index,
+        orientation="h",
+        marker_color=["#ff4466","#ffaa00","#00dd88"],
+        text=sev_counts.values.astype(int),
+        textposition="outside",
+        textfont=dict(family="IBM Plex Mono", size=12, color="#c8d8f0"),
+    ))
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#c8d8f0", height=220,
+        margin=dict(t=10,b=10,l=10,r=40),
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(tickfont=dict(family="IBM Plex Mono", size=11)),
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def fig_team_bars(team_counts: pd.Series, color: str, x_grid: bool):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(
+        x=team_counts.index,
+        y=team_counts.values,
+        marker_color=color,
+        marker_opacity=0.75,
+        text=team_counts.values,
+        textposition="outside",
+        textfont=dict(family="IBM Plex Mono", size=11, color="#c8d8f0"),
+    ))
+    xaxis = dict(tickfont=dict(family="IBM Plex Mono", size=10))
+    if x_grid:
+        xaxis["gridcolor"] = "#1e2d4a"
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#c8d8f0", height=220,
+        margin=dict(t=30,b=10,l=10,r=10),
+        xaxis=xaxis,
+        yaxis=dict(showgrid=True, gridcolor="#1e2d4a", showticklabels=False,
+                   range=[0, team_counts.values.max() * 1.35]),
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def fig_progress_gauge(pct_done: int):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=pct_done,
+        number={"suffix": "%", "font": {"family": "IBM Plex Mono", "size": 32, "color": "#00dd88"}},
+        gauge=dict(
+            axis=dict(range=[0, 100], tickcolor="#4a6080",
+                      tickfont=dict(family="IBM Plex Mono", size=10)),
+            bar=dict(color="#00dd88", thickness=0.3),
+            bgcolor="#0c1020",
+            borderwidth=1, bordercolor="#1e2d4a",
+            steps=[
+                dict(range=[0, 40],  color="#1a0a0f"),
+                dict(range=[40, 70], color="#1a150a"),
+                dict(range=[70, 100], color="#0a1a12"),
+            ],
+            threshold=dict(line=dict(color="#aa66ff", width=3), thickness=0.8, value=75)
+        ),
+        title={"text": "Circulars Closed", "font": {"family": "IBM Plex Mono", "size": 11, "color": "#4a6080"}},
+    ))
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)", font_color="#c8d8f0",
+        height=220, margin=dict(t=30, b=10, l=30, r=30)
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def fig_task_overview(n_closed: int, n_due_today: int, n_overdue: int, total_tasks: int):
+    import plotly.graph_objects as go
+
+    def pct(n): return round(n / total_tasks * 100) if total_tasks > 0 else 0
+
+    categories = ["Closed",    "Due Today",  "Overdue"]
+    values     = [n_closed,    n_due_today,  n_overdue]
+    colors     = ["#00dd88",   "#ffaa00",    "#ff4466"]
+    borders    = ["#00ff99",   "#ffcc44",    "#ff6680"]
+    txt_dark   = ["#001a0d",   "#1a0f00",    "#1a000a"]
+
+    fig = go.Figure()
+    for cat, val, col, bord, tdark in zip(categories, values, colors, borders, txt_dark):
+        p     = pct(val)
+        label = f"  {val}  ({p}%)"
+        fig.add_trace(go.Bar(
+            name=cat,
+            x=[max(val, 0.12)],   # tiny stub so zero rows still render
+            y=[cat],
+            orientation="h",
+            marker=dict(color=col, opacity=0.90, line=dict(color=bord, width=1.5)),
+            text=[label],
+            textposition="inside" if val > 0 else "outside",
+            textfont=dict(
+                family="IBM Plex Mono", size=13,
+                color=tdark if val > 0 else col
+            ),
+            insidetextanchor="middle",
+            width=0.52,
+            showlegend=False,
+        ))
+
+    max_val = max(values + [1])
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#c8d8f0",
+        height=220,
+        margin=dict(t=10, b=28, l=82, r=40),
+        showlegend=False,
+        xaxis=dict(
+            showgrid=True, gridcolor="#1e2d4a",
+            showticklabels=False, zeroline=True,
+            zerolinecolor="#2a4070", zerolinewidth=1,
+            range=[0, max_val * 1.6],
+        ),
+        yaxis=dict(
+            tickfont=dict(family="IBM Plex Mono", size=12, color="#c8d8f0"),
+            tickcolor="#4a6080",
+            categoryorder="array",
+            categoryarray=["Overdue", "Due Today", "Closed"],
+        ),
+        bargap=0.30,
+    )
+    fig.add_annotation(
+        text=f"Total · {total_tasks} tasks",
+        xref="paper", yref="paper",
+        x=1.0, y=-0.16,
+        showarrow=False,
+        font=dict(family="IBM Plex Mono", size=9, color="#4a6080"),
+        xanchor="right",
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def fig_task_team_status(teams_order: list, team_status: dict):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for status_val, color in STATUS_COLORS.items():
+        counts = team_status[status_val]
+        fig.add_trace(go.Bar(
+            name=status_val,
+            y=teams_order,
+            x=counts,
+            orientation="h",
+            marker=dict(color=color, opacity=0.88),
+            text=[str(c) if c > 0 else "" for c in counts],
+            textposition="inside",
+            textfont=dict(family="IBM Plex Mono", size=11, color="#ffffff"),
+            insidetextanchor="middle",
+        ))
+    fig.update_layout(
+        barmode="stack",
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#c8d8f0", height=220,
+        margin=dict(t=10, b=10, l=10, r=30),
+        xaxis=dict(showgrid=True, gridcolor="#1e2d4a", showticklabels=False, zeroline=False),
+        yaxis=dict(tickfont=dict(family="IBM Plex Mono", size=11, color="#c8d8f0"), autorange="reversed"),
+        legend=dict(font=dict(family="IBM Plex Mono", size=9, color="#c8d8f0"), orientation="h",
+                    yanchor="bottom", y=-0.28, xanchor="center", x=0.5,
+                    bgcolor="rgba(0,0,0,0)"),
+        bargap=0.3,
+    )
+    return fig
+
+
+# ─── Pagination for status groups ────────────────────────────────────────────
+PAGE_SIZES = [25, 50, 100, 200]
+
+
+def _page_goto(key: str, page: int):
+    st.session_state[f"{key}_page"] = max(0, page)
+    st.session_state[f"{key}_more"] = 0
+
+
+def _page_more(key: str):
+    st.session_state[f"{key}_more"] = st.session_state.get(f"{key}_more", 0) + 1
+
+
+def _sort_order(s: pd.Series) -> np.ndarray:
+    """Values that sort like s.sort_values() (Categoricals by code, missing last)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        return np.where(codes < 0, len(s.cat.categories), codes)
+    return s.to_numpy()
+
+
+def status_groups(df: pd.DataFrame, index: dict, rows: np.ndarray, sort_col: str) -> dict:
+    """
+    {status: positions} splitting rows of df by status (via the status
+    bitmaps of index), each group in sort_col order (stable; NaT last).
+    Works on positions only — no frames.
+    """
+    order = rows[np.argsort(_sort_order(df[sort_col])[rows], kind="stable")]
+    return {status: order[index_mask(index, "status", [status])[order]] for status in STATUSES}
+
+
+def export_csv(df: pd.DataFrame, rows: np.ndarray, date_col: str) -> bytes:
+    """The given rows of df as CSV with day-first dates; used as a lazy download."""
+    out = df.iloc[rows].drop(columns=URGENCY_COLS, errors="ignore")
+    return out.assign(**{date_col: pd.to_datetime(out[date_col], errors="coerce").dt.strftime(DATE_FMT)}) \
+              .to_csv(index=False).encode()
+
+
+def render_paged(df: pd.DataFrame, rows: np.ndarray, key: str, page_size: int, render):
+    """
+    Render one page of df's rows (positions) via render(frame), followed by
+    PREV / LOAD MORE / NEXT controls. "Load more" widens the current page by
+    page_size rows. Only the visible slice is ever materialised.
+    """
+    total   = len(rows)
+    n_pages = max(1, -(-total // page_size))
+    page    = min(st.session_state.get(f"{key}_page", 0), n_pages - 1)
+    more    = st.session_state.get(f"{key}_more", 0)
+    start   = page * page_size
+    stop    = min(total, start + page_size * (1 + more))
+    render(df.iloc[rows[start:stop]])
+    if total <= page_size:
+        return
+
+    next_page = -(-stop // page_size)
+    nav_prev, nav_info, nav_more, nav_next = st.columns([1, 2, 1.2, 1])
+    with nav_prev:
+        st.button("◀ PREV", key=f"{key}_prev", disabled=page == 0,
+                  on_click=_page_goto, args=(key, page - 1), width="stretch")
+    with nav_info:
+        st.markdown(f'<div class="page-info">ROWS {start + 1}–{stop} OF {total} · PAGE {page + 1}/{n_pages}</div>',
+                    unsafe_allow_html=True)
+    with nav_more:
+        st.button("LOAD MORE", key=f"{key}_loadmore", disabled=stop >= total,
+                  on_click=_page_more, args=(key,), width="stretch")
+    with nav_next:
+        st.button("NEXT ▶", key=f"{key}_next", disabled=stop >= total,
+                  on_click=_page_goto, args=(key, next_page), width="stretch")
+
+
+# ── Session state ─────────────────────────────────────────────────────────────
+# Datasets load lazily: a tab asks for the ones it shows, so a dataset no
+# open tab needs is never fetched. Each session keeps a private copy and
+# refreshes it whenever the shared version moves on (another session saved,
+# or the TTL re-read found changes). Handlers save through commit_edits,
+# which merges if that happens mid-edit.
+DATASETS = {"ops":  ("ops_data",  load_ops,  ops_summary),
+            "circ": ("circ_data", load_circ, circ_summary),
+            "task": ("task_data", load_task, task_summary)}
+_synced_this_run = set()
+
+
+def session_data(name: str) -> pd.DataFrame:
+    """This session's copy of a dataset, loaded or refreshed on first use in a run."""
+    key, loader, _ = DATASETS[name]
+    if name not in _synced_this_run:
+        shared_df, shared_ver = shared_data(name, loader)
+        if st.session_state.get(f"{key}_version") != shared_ver:
+            st.session_state[key] = shared_df.copy()
+            st.session_state[f"{key}_index"] = (st.session_state[key], shared_index(name, shared_df))
+            st.session_state[f"{key}_base"] = shared_df   # merge base for commit_edits
+            st.session_state[f"{key}_version"] = shared_ver
+        _synced_this_run.add(name)
+    return st.session_state[key]
+
+
+@st.cache_resource(show_spinner=False)
+def _background_loads() -> dict:
+    """Datasets being loaded off the request path, and the version of each saved summary."""
+    return {"lock": threading.Lock(), "running": set(), "saved": {}}
+
+
+def load_shared(names: list):
+    """
+    Bring several shared datasets up to date together: the Sheets tabs of
+    those due a (re)load are fetched in one batched round trip, then each
+    is loaded as usual — with its own local fallback if its tab fails.
+    """
+    due = [n for n in names if _load_due(n, _cache_entry(n))]
+    if len(due) > 1:
+        _gsheet_prefetch({SQL_DATASETS[n][0]: SQL_DATASETS[n][1] for n in due})
+    for n in names:
+        shared_data(n, DATASETS[n][1])
+
+
+def _load_in_background(names: list):
+    bg = _background_loads()
+    with bg["lock"]:
+        names = [n for n in names if n not in bg["running"]]
+        if not names:
+            return
+        bg["running"].update(names)
+
+    def _run():
+        try:
+            load_shared(names)
+        except Exception:
+            pass
+        finally:
+            with bg["lock"]:
+                bg["running"].difference_update(names)
+
+    threading.Thread(target=_run, name="delta-ops-load", daemon=True).start()
+
+
+def _summary_json(agg: dict) -> str:
+    """Aggregates as JSON; each Series keeps its order and dtype."""
+    return json.dumps({k: {"series": v.index.tolist(), "values": v.tolist(), "dtype": str(v.dtype)}
+                       if isinstance(v, pd.Series) else v for k, v in agg.items()})
+
+
+def _summary_from_json(payload) -> dict:
+    return {k: pd.Series(v["values"], index=v["series"], dtype=v["dtype"])
+            if isinstance(v, dict) and "series" in v else v for k, v in json.loads(payload).items()}
+
+
+def _saved_summary(name: str):
+    """Today's (IST) aggregates saved by an earlier run, or None — also when unreadable."""
+    try:
+        row = _sqlite_conn().execute("SELECT day, payload FROM _summaries WHERE dataset = ?",
+                                     (SQL_DATASETS[name][0],)).fetchone()
+        if row is None or row[0] != ist_today().isoformat():
+            return None
+        return _summary_from_json(row[1])
+    except (sqlite3.Error, ValueError, TypeError, KeyError):
+        return None   # e.g. a payload written by an older release
+
+
+def dashboard_summaries(names: list) -> list:
+    """
+    Tab 1 aggregates per dataset, computed from the shared frames (memoised
+    per version) without making session copies; the frames still to load
+    are loaded together. On a cold start the aggregates saved by the last
+    run are returned instead while the frames load in the background.
+    """
+    saved = {n: _saved_summary(n) for n in names if _cache_entry(n)["df"] is None}
+    saved = {n: agg for n, agg in saved.items() if agg is not None}
+    if saved:
+        _load_in_background(list(saved))
+    load_shared([n for n in names if n not in saved])
+    return [saved[n] if n in saved else _summary(n) for n in names]
+
+
+def _summary(name: str) -> dict:
+    _, loader, summarise = DATASETS[name]
+    df, version = shared_data(name, loader)
+    agg = summarise(shared_index(name, df), version)
+    saved = _background_loads()["saved"]
+    today = ist_today()
+    if saved.get(name) != (version, today):
+        try:
+            _sqlite_conn().execute("INSERT OR REPLACE INTO _summaries (dataset, day, payload) VALUES (?, ?, ?)",
+                                   (SQL_DATASETS[name][0], today.isoformat(), _summary_json(agg)))
+            saved[name] = (version, today)
+        except sqlite3.Error:
+            pass
+    return agg
+
+
+@st.fragment(run_every=1)
+def _rerun_when_loaded():
+    """Polls while datasets load in the background, then reruns the app once."""
+    if not _background_loads()["running"]:
+        st.rerun(scope="app")
+
+
+# ─── Reminders (evaluated off the request path) ──────────────────────────────
+# A background thread evaluates task and circular due dates every
+# REMINDER_INTERVAL seconds. It stores a digest in SQLite, which is all the
+# page reads, and sends each new reminder once per record, class and day to
+# the configured sink. Without a [reminders] section only the digest is
+# kept. Configure the sink in .streamlit/secrets.toml:
+#
+#     [reminders]
+#     sink = "file"                      # "file", "smtp" or "none" (default)
+#     path = "DELTA_OPS_reminders.log"   # file sink (default: next to this file)
+#     host = "localhost"                 # smtp sink — e.g. a local debugging server
+#     port = 1025
+#     sender = "delta-ops@localhost"
+#     to = "ops-team@example.com"
+REMINDER_INTERVAL = 300
+REMINDER_DATASETS = ["task", "circ"]
+REMINDER_CLASSES  = ["overdue", "today", "soon"]
+REMINDER_LOG      = os.path.join(BASE_DIR, "DELTA_OPS_reminders.log")
+
+
+def _file_sink(cfg: dict):
+    path = cfg.get("path", REMINDER_LOG)
+
+    def send(subject: str, body: str):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"[{datetime.now(IST):%Y-%m-%d %H:%M:%S} IST] {subject}\n{body}\n\n")
+    return send
+
+
+def _smtp_sink(cfg: dict):
+    def send(subject: str, body: str):
+        import smtplib
+        from email.message import EmailMessage
+
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg["From"]    = cfg.get("sender", "delta-ops@localhost")
+        msg["To"]      = cfg["to"]
+        msg.set_content(body)
+        with smtplib.SMTP(cfg.get("host", "localhost"), int(cfg.get("port", 25)), timeout=30) as smtp:
+            smtp.send_message(msg)
+    return send
+
+
+# sink name → factory(config) returning send(subject, body)
+REMINDER_SINKS = {"file": _file_sink, "smtp": _smtp_sink, "none": lambda cfg: None}
+
+
+def reminder_sink():
+    """send(subject, body) for the configured sink, or None to only keep the digest."""
+    try:
+        cfg = dict(st.secrets["reminders"])
+    except Exception:
+        cfg = {}
+    return REMINDER_SINKS[cfg.get("sink", "none")](cfg)
+
+
+def _reminder_items(name: str, df: pd.DataFrame) -> list:
+    """Records of df due for a reminder, most urgent first."""
+    if "_urgency" not in df.columns:
+        df = with_urgency(df)   # circulars: same due-date rules, computed on the fly
+    due = df[df["_urgency"].isin(REMINDER_CLASSES)].sort_values(["_urgency", "_days_left"])
+    return [{"dataset": name, "record_id": rid, "urgency": str(u), "team": str(team),
+             "description": str(desc), "due": d.strftime(DATE_FMT), "days_left": int(n)}
+            for rid, u, team, desc, d, n in zip(due[ID_COL], due["_urgency"], due["team"],
+                                                due[DESC_COLS[name]], due["due_date"], due["_days_left"])]
+
+
+def _reminder_message(items: list) -> tuple:
+    counts = {u: sum(i["urgency"] == u for i in items) for u in REMINDER_CLASSES}
+    subject = "DELTA OPS reminders — " + ", ".join(f"{n} {u}" for u, n in counts.items() if n)
+    label = {"task": "TASK", "circ": "CIRCULAR"}
+    body = "\n".join(f"{i['urgency'].upper():<8} {label[i['dataset']]:<9} {i['team']:<10} "
+                     f"due {i['due']} ({i['days_left']:+d}d)  {i['description']}" for i in items)
+    return subject, body
+
+
+def run_reminders(sink=None) -> dict:
+    """
+    Evaluate reminders now: store the digest and send the reminders not yet
+    sent today (sink: send(subject, body), default reminder_sink()). A
+    reminder is claimed in _notified before sending — so concurrent runners
+    never send it twice — and released again if sending fails. Claims from
+    earlier days are pruned.
+    """
+    load_shared(list(REMINDER_DATASETS))
+    items = [item for name in REMINDER_DATASETS
+             for item in _reminder_items(name, shared_data(name, DATASETS[name][1])[0])]
+    day = ist_today().isoformat()
+    digest = {"day": day, "items": items,
+              "counts": {name: {u: sum(i["dataset"] == name and i["urgency"] == u for i in items)
+                                for u in REMINDER_CLASSES} for name in REMINDER_DATASETS}}
+    con = _sqlite_conn()
+    con.execute("INSERT OR REPLACE INTO _digest (name, at, payload) VALUES ('reminders', ?, ?)",
+                (datetime.now(IST).isoformat(timespec="seconds"), json.dumps(digest)))
+    con.execute("DELETE FROM _notified WHERE day < ?", (day,))
+    sink = sink if sink is not None else reminder_sink()
+    if sink is None:
+        return digest
+    keys = [(i["dataset"], i["record_id"], i["urgency"], day) for i in items]
+    claimed = [i for i, k in zip(items, keys)
+               if con.execute("INSERT OR IGNORE INTO _notified VALUES (?, ?, ?, ?)", k).rowcount]
+    if claimed:
+        try:
+            sink(*_reminder_message(claimed))
+        except Exception:
+            con.executemany("DELETE FROM _notified WHERE dataset = ? AND record_id = ? AND urgency = ? AND day = ?",
+                            [(i["dataset"], i["record_id"], i["urgency"], day) for i in claimed])
+            raise
+    return digest
+
+
+@st.cache_resource(show_spinner=False)
+def _reminder_scheduler() -> threading.Thread:
+    """Process-wide thread running run_reminders every REMINDER_INTERVAL seconds."""
+    def _run():
+        while True:
+            try:
+                run_reminders()
+            except Exception:
+                pass   # sink or storage down: the next run retries
+            time.sleep(REMINDER_INTERVAL)
+
+    thread = threading.Thread(target=_run, name="delta-ops-reminders", daemon=True)
+    thread.start()
+    return thread
+
+
+def reminder_digest():
+    """The latest reminder digest, or None before the first run."""
+    try:
+        row = _sqlite_conn().execute("SELECT payload FROM _digest WHERE name = 'reminders'").fetchone()
+    except sqlite3.Error:
+        return None
+    return json.loads(row[0]) if row else None
+
+
+# ─── Command line (python delta_ops.py <command>) ────────────────────────────
+# Batch imports, exports, validation and reports without a browser — for the
+# nightly NSE / BSE / CDSL reconciliation feeds — through the same validators
+# and storage functions as the page. Files are read and written in chunks of
+# IMPORT_CHUNK_ROWS rows. The running app picks up the changes on its next
+# DATA_CACHE_TTL re-read.
+#
+#     python delta_ops.py validate task feed.csv --problems errors.csv
+#     python delta_ops.py import task feed.csv [--replace]
+#     python delta_ops.py export circ -o circulars.csv
+#     python delta_ops.py report [ops circ task] [--json]
+#     python delta_ops.py remind
+REPORT_TITLES = {"ops": "OPERATIONAL ISSUES", "circ": "CIRCULAR IMPLEMENTATION", "task": "TASK REMINDERS"}
+
+
+def iter_export_chunks(name: str, chunk_rows: int = IMPORT_CHUNK_ROWS):
+    """
+    The dataset as frames of at most chunk_rows rows. When SQLite is the
+    source of truth (no Google Sheets), the journal tail is folded in and
+    the table is read through a cursor, chunk by chunk; otherwise the
+    dataset is loaded as the page loads it and sliced.
+    """
+    table, columns, date_cols = SQL_DATASETS[name]
+    if LOCAL_BACKEND == "sqlite" and _get_gsheet() is None:
+        compact_journal(name)
+        con = _sqlite_conn()
+        if _sqlite_version(con, table):
+            con.execute("BEGIN")
+            try:
+                cur = con.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+                while rows := cur.fetchmany(chunk_rows):
+                    yield _sqlite_frame(rows, columns, date_cols)
+            finally:
+                con.execute("COMMIT")
+            return
+    df = DATASETS[name][1]()
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_export(name: str, out) -> int:
+    """Write the dataset to the text stream out as CSV with day-first dates. Returns the row count."""
+    n_rows = 0
+    for chunk in iter_export_chunks(name):
+        chunk.drop(columns=URGENCY_COLS, errors="ignore") \
+             .to_csv(out, index=False, header=n_rows == 0, date_format=DATE_FMT)
+        n_rows += len(chunk)
+    if n_rows == 0:
+        out.write(",".join(SQL_DATASETS[name][1]) + "\n")
+    return n_rows
+
+
+def _report_value(value) -> str:
+    if isinstance(value, pd.Series):
+        return ", ".join(f"{k} {int(v)}" for k, v in value.items()) or "—"
+    if isinstance(value, list):
+        return ", ".join(map(str, value)) or "—"
+    return str(value)
+
+
+def summary_report(names: list, as_json: bool = False) -> str:
+    """The Tab 1 aggregates of each dataset, as plain text or JSON (chart-only series left out)."""
+    load_shared(names)
+    report = {name: {k: v for k, v in _summary(name).items() if not isinstance(v, dict)} for name in names}
+    if as_json:
+        return json.dumps({name: {k: v.astype(int).to_dict() if isinstance(v, pd.Series) else v
+                                  for k, v in agg.items()} for name, agg in report.items()}, indent=2)
+    lines = []
+    for name, agg in report.items():
+        lines.append(REPORT_TITLES[name])
+        lines += [f"  {k.removeprefix('n_').replace('_', ' '):<16}{_report_value(v)}" for k, v in agg.items()]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _cli_check(args) -> tuple:
+    """Validate args.file; print its error lines and write the failing cells to args.problems."""
+    with open(args.file, "rb") as f:
+        n_rows, errors, problems, _, _ = validate_upload(f, args.dataset)
+    for e in errors:
+        print(f"{args.file}: {e}", file=sys.stderr)
+    if args.problems and not problems.empty:
+        with open(args.problems, "wb") as f:
+            f.write(df_to_csv_bytes(problems))
+    return n_rows, errors
+
+
+def _cli_validate(args) -> int:
+    n_rows, errors = _cli_check(args)
+    if errors:
+        return 1
+    print(f"{args.file}: {n_rows} rows OK")
+    return 0
+
+
+def _cli_import(args) -> int:
+    n_rows, errors = _cli_check(args)
+    if errors:
+        print(f"{args.file}: nothing imported", file=sys.stderr)
+        return 1
+    with open(args.file, "rb") as f:
+        n_imported, n_total = import_upload(args.dataset, f, replace=args.replace,
+                                            publish=False, checked=True)
+    print(f"{args.file}: {n_imported} rows imported ({'replaced' if args.replace else 'appended'}). "
+          f"Total: {n_total} rows.")
+    # A failed Sheets step is retried by the save queue: wait for it here
+    flush_saves(timeout=120)
+    n_pending, error = save_status()
+    if n_pending or error:
+        print(f"{args.file}: Google Sheets not updated: {error or 'still pending'}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _cli_export(args) -> int:
+    if args.out == "-":
+        n_rows = write_export(args.dataset, sys.stdout)
+    else:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            n_rows = write_export(args.dataset, f)
+        print(f"{args.out}: {n_rows} rows exported")
+    return 0
+
+
+def _cli_report(args) -> int:
+    print(summary_report(args.datasets or list(DATASETS), as_json=args.json))
+    return 0
+
+
+def _cli_remind(args) -> int:
+    digest = run_reminders()
+    for name, counts in digest["counts"].items():
+        print(f"{REPORT_TITLES[name]:<26}" + "  ".join(f"{u} {n}" for u, n in counts.items()))
+    return 0
+
+
+def cli_main(argv: list) -> int:
+    """Run one command line command; returns the exit status (1 on invalid data or a failed write)."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="delta_ops.py", description="DELTA OPS batch commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for cmd, run, text in (("validate", _cli_validate, "check a CSV against the upload schema"),
+                           ("import", _cli_import, "validate a CSV, then import it")):
+        p = commands.add_parser(cmd, help=text)
+        p.add_argument("dataset", choices=list(DATASETS))
+        p.add_argument("file")
+        p.add_argument("--problems", metavar="CSV", help="write every failing cell to this file")
+        if cmd == "import":
+            p.add_argument("--replace", action="store_true", help="clear the dataset first (default: append)")
+        p.set_defaults(run=run)
+    p = commands.add_parser("export", help="write a dataset as CSV")
+    p.add_argument("dataset", choices=list(DATASETS))
+    p.add_argument("-o", "--out", default="-", help="output file (default: stdout)")
+    p.set_defaults(run=_cli_export)
+    p = commands.add_parser("report", help="print the dashboard figures")
+    p.add_argument("datasets", nargs="*", metavar="dataset", help=f"any of {list(DATASETS)} (default: all)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=_cli_report)
+    p = commands.add_parser("remind", help="evaluate reminders and notify the configured sink once")
+    p.set_defaults(run=_cli_remind)
+
+    args = parser.parse_args(argv)
+    unknown = [n for n in getattr(args, "datasets", []) if n not in DATASETS]
+    if unknown:
+        parser.error(f"unknown dataset(s) {unknown}; choose from {list(DATASETS)}")
+    try:
+        return args.run(args)
+    except (OSError, ValueError, RuntimeError, sqlite3.Error, pd.errors.ParserError) as exc:
+        print(f"{args.command}: {exc}", file=sys.stderr)
+        return 1
+
+
+if HEADLESS:
+    sys.exit(cli_main(sys.argv[1:]))
+
+_urgency_clock()
+_reminder_scheduler()
+
+
+# Flash message state
+if "flash" not in st.session_state:
+    st.session_state["flash"] = None
+
+# Active tab tracking — used to return to the correct tab after rerun
+# Values: "ops", "circ", "task", None (defaults to dashboard on ops import)
+if "active_tab" not in st.session_state:
+    st.session_state["active_tab"] = None
+
+profile_phase("definitions")
+
+# ─── Header ───────────────────────────────────────────────────────────────────
+now_str = datetime.now().strftime("%d %b %Y  %H:%M")
+n_unsynced, sync_err = save_status()
+if sync_err:
+    sync_label = "SYNC FAILED · RETRYING" if n_unsynced else "SYNC FAILED"
+    sync_html = f'<span class="ops-sync err" title="{_html.escape(sync_err)}">{sync_label}</span>'
+elif n_unsynced:
+    sync_html = f'<span class="ops-sync">PENDING SYNC · {n_unsynced}</span>'
+else:
+    sync_html = ""
+st.markdown(f"""
+<div class="ops-header">
+    <div class="ops-logo">⚡ DELTA <span>OPS</span></div>
+    <div class="ops-timestamp">{sync_html}LAST REFRESH · {now_str} IST</div>
+</div>
+""", unsafe_allow_html=True)
+
+# Flash message is displayed per-tab below (so it appears in the right context)
 _flash_snapshot = st.session_state.get("flash")
 if _flash_snapshot:
     st.session_state["flash"] = None  # consume immediately
@@ -1031,469 +3836,251 @@ def show_flash():
             st.markdown(f'<div class="alert-bar alert-hi">❌ &nbsp; {fmsg}</div>', unsafe_allow_html=True)
 
 
+profile_phase("header")
+
 # ─── TABS ─────────────────────────────────────────────────────────────────────
+# Only the selected tab's body runs (on_change="rerun" + .open), so a tab's
+# datasets and widgets cost nothing until it is opened.
 _tab_index_map = {"dashboard": 0, "ops": 1, "circ": 2, "task": 3}
 _default_tab = _tab_index_map.get(st.session_state.get("active_tab", "dashboard"), 0)
+TAB_LABELS = ["01  DASHBOARD", "02  OPERATIONAL ISSUES", "03  CIRCULAR IMPLEMENTATION", "04  TASK REMINDERS"]
 
-tab1, tab2, tab3, tab4 = st.tabs(["01  DASHBOARD", "02  OPERATIONAL ISSUES", "03  CIRCULAR IMPLEMENTATION", "04  TASK REMINDERS"])
+tab1, tab2, tab3, tab4 = st.tabs(TAB_LABELS, key="main_tab", on_change="rerun", default=TAB_LABELS[0])
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  TAB 1 — DASHBOARD
 # ══════════════════════════════════════════════════════════════════════════════
-with tab1:
-    st.markdown('<div class="tab-body">', unsafe_allow_html=True)
-    if st.session_state.get("active_tab") == "dashboard":
-        show_flash()
-        st.session_state["active_tab"] = None
-
-    # ── Alert bar for open high-severity ─────────────────────────────────────
-    hi_open = df_ops[(df_ops["severity"] == "High") & (df_ops["status"] == "Open")]
-    if len(hi_open) > 0:
-        teams_aff = ", ".join(hi_open["team"].unique())
-        st.markdown(f'<div class="alert-bar alert-hi">⚠ &nbsp; {len(hi_open)} HIGH severity operational issue(s) open — Teams: {teams_aff}</div>', unsafe_allow_html=True)
-
-    # ── Alert bar for overdue tasks ───────────────────────────────────────────
-    today_ts = pd.Timestamp(date.today())
-    if not df_task.empty:
-        overdue_tasks = df_task[
-            (df_task["due_date"] < today_ts) &
-            (~df_task["status"].str.strip().str.lower().isin(["closed"]))
-        ]
-        if len(overdue_tasks) > 0:
-            ot_teams = ", ".join(overdue_tasks["team"].unique())
-            st.markdown(f'<div class="alert-bar alert-hi">🔔 &nbsp; {len(overdue_tasks)} OVERDUE task(s) — Teams: {ot_teams}</div>', unsafe_allow_html=True)
-
-    # ── Metric cards ─────────────────────────────────────────────────────────
-    total_ops  = len(df_ops)
-    n_open     = (df_ops["status"] == "Open").sum()
-    n_inprog   = (df_ops["status"] == "In Progress").sum()
-    n_closed   = (df_ops["status"] == "Closed").sum()
-    n_high     = (df_ops["severity"] == "High").sum()
-    n_circ     = len(df_circ)
-    n_task     = len(df_task)
-    n_task_overdue = 0 if df_task.empty else int((
-        (df_task["due_date"] < today_ts) &
-        (~df_task["status"].str.strip().str.lower().isin(["closed"]))
-    ).sum())
-
-    c1, c2, c3, c4, c5 = st.columns(5)
-    with c1:
-        st.markdown(f"""
-        <div class="metric-card hi">
-            <div class="metric-label">Open Issues</div>
-            <div class="metric-value">{n_open}</div>
-            <div class="metric-sub">of {total_ops} total ops</div>
-        </div>""", unsafe_allow_html=True)
-    with c2:
-        st.markdown(f"""
-        <div class="metric-card med">
-            <div class="metric-label">In Progress</div>
-            <div class="metric-value">{n_inprog}</div>
-            <div class="metric-sub">being actioned</div>
-        </div>""", unsafe_allow_html=True)
-    with c3:
-        st.markdown(f"""
-        <div class="metric-card lo">
-            <div class="metric-label">Closed</div>
-            <div class="metric-value">{n_closed}</div>
-            <div class="metric-sub">resolved</div>
-        </div>""", unsafe_allow_html=True)
-    with c4:
-        st.markdown(f"""
-        <div class="metric-card circ">
-            <div class="metric-label">Circular Items</div>
-            <div class="metric-value">{n_circ}</div>
-            <div class="metric-sub">{(df_circ["severity"]=="High").sum() if not df_circ.empty else 0} high severity</div>
-        </div>""", unsafe_allow_html=True)
-    with c5:
-        st.markdown(f"""
-        <div class="metric-card task">
-            <div class="metric-label">Task Reminders</div>
-            <div class="metric-value">{n_task}</div>
-            <div class="metric-sub">{n_task_overdue} overdue</div>
-        </div>""", unsafe_allow_html=True)
-
-    st.markdown("<br>", unsafe_allow_html=True)
-
-    # ── Helper pills (defined here for dashboard use) ─────────────────────────
-    def sev_pill(s):
-        cls = {"High": "high", "Medium": "medium", "Low": "low"}.get(s, "low")
-        return f'<span class="pill pill-{cls}">{s}</span>'
-
-    def status_pill(s):
-        cls = {"Open": "open", "In Progress": "inprogress", "Closed": "closed"}.get(s, "closed")
-        return f'<span class="pill pill-{cls}">{s}</span>'
-
-    # ── Row 1: Ops charts ─────────────────────────────────────────────────────
-    st.markdown('<p class="section-title">Operational Issues</p>', unsafe_allow_html=True)
-    col_a, col_b, col_c = st.columns([1.2, 1, 1])
-
-    with col_a:
-        st.markdown('<p class="section-title">Status Breakdown</p>', unsafe_allow_html=True)
-        if not df_ops.empty:
-            status_counts = df_ops["status"].value_counts()
-            colors_status = {"Open": "#ff4466", "In Progress": "#ffaa00", "Closed": "#00dd88"}
-            fig_donut = go.Figure(go.Pie(
-                labels=status_counts.index,
-                values=status_counts.values,
-                hole=0.62,
-                marker_colors=[colors_status.get(s, "#4a6080") for s in status_counts.index],
-                textfont_size=11,
-                textfont_family="IBM Plex Mono",
-                showlegend=True,
-            ))
-            fig_donut.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0", height=220, margin=dict(t=10,b=10,l=10,r=10),
-                legend=dict(font=dict(family="IBM Plex Mono", size=10), orientation="h",
-                            yanchor="bottom", y=-0.15, xanchor="center", x=0.5),
-                annotations=[dict(text=f"<b>{total_ops}</b>", x=0.5, y=0.5,
-                                  font_size=22, font_family="IBM Plex Mono",
-                                  font_color="#c8d8f0", showarrow=False)]
-            )
-            st.plotly_chart(fig_donut, use_container_width=True, config={"displayModeBar": False}, key="db_donut")
-        else:
-            st.markdown('<div class="alert-bar alert-info">No ops data yet.</div>', unsafe_allow_html=True)
-
-    with col_b:
-        st.markdown('<p class="section-title">Severity Distribution</p>', unsafe_allow_html=True)
-        if not df_ops.empty:
-            sev_counts = df_ops["severity"].value_counts().reindex(["High", "Medium", "Low"]).fillna(0)
-            fig_sev = go.Figure(go.Bar(
-                x=sev_counts.values,
-                y=sev_counts.index,
-                orientation="h",
-                marker_color=["#ff4466","#ffaa00","#00dd88"],
-                text=sev_counts.values.astype(int),
-                textposition="outside",
-                textfont=dict(family="IBM Plex Mono", size=12, color="#c8d8f0"),
-            ))
-            fig_sev.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0", height=220,
-                margin=dict(t=10,b=10,l=10,r=40),
-                xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                yaxis=dict(tickfont=dict(family="IBM Plex Mono", size=11)),
-            )
-            st.plotly_chart(fig_sev, use_container_width=True, config={"displayModeBar": False}, key="db_sev")
-
-    with col_c:
-        st.markdown('<p class="section-title">Issues by Team</p>', unsafe_allow_html=True)
-        if not df_ops.empty:
-            team_counts = df_ops["team"].value_counts()
-            fig_team = go.Figure(go.Bar(
-                x=team_counts.index,
-                y=team_counts.values,
-                marker_color="#00c2ff",
-                marker_opacity=0.75,
-                text=team_counts.values,
-                textposition="outside",
-                textfont=dict(family="IBM Plex Mono", size=11, color="#c8d8f0"),
-            ))
-            fig_team.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0", height=220,
-                margin=dict(t=30,b=10,l=10,r=10),
-                xaxis=dict(tickfont=dict(family="IBM Plex Mono", size=10), gridcolor="#1e2d4a"),
-                yaxis=dict(showgrid=True, gridcolor="#1e2d4a", showticklabels=False,
-                           range=[0, team_counts.values.max() * 1.35]),
-            )
-            st.plotly_chart(fig_team, use_container_width=True, config={"displayModeBar": False}, key="db_team")
-
-    st.markdown("<br>", unsafe_allow_html=True)
-
-    # ── Row 2: Circular Implementation charts ────────────────────────────────
-    st.markdown('<p class="section-title">Circular Implementation</p>', unsafe_allow_html=True)
-    circ_col1, circ_col2, circ_col3 = st.columns([1.2, 1, 1])
-
-    with circ_col1:
-        st.markdown('<p class="section-title">Status Breakdown</p>', unsafe_allow_html=True)
-        if not df_circ.empty:
-            circ_status_counts2 = df_circ["status"].value_counts()
-            colors_cs = {"Open": "#ff4466", "In Progress": "#ffaa00", "Closed": "#00dd88"}
-            fig_circ_donut = go.Figure(go.Pie(
-                labels=circ_status_counts2.index,
-                values=circ_status_counts2.values,
-                hole=0.62,
-                marker_colors=[colors_cs.get(s, "#aa66ff") for s in circ_status_counts2.index],
-                textfont_size=11, textfont_family="IBM Plex Mono", showlegend=True,
-            ))
-            fig_circ_donut.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0", height=220, margin=dict(t=10,b=10,l=10,r=10),
-                legend=dict(font=dict(family="IBM Plex Mono", size=10), orientation="h",
-                            yanchor="bottom", y=-0.15, xanchor="center", x=0.5),
-                annotations=[dict(text=f"<b>{len(df_circ)}</b>", x=0.5, y=0.5,
-                                  font_size=22, font_family="IBM Plex Mono",
-                                  font_color="#c8d8f0", showarrow=False)]
-            )
-            st.plotly_chart(fig_circ_donut, use_container_width=True, config={"displayModeBar": False}, key="db_circ_donut")
+if tab1.open:
+    with tab1:
+        st.markdown('<div class="tab-body">', unsafe_allow_html=True)
+        if st.session_state.get("active_tab") == "dashboard":
+            show_flash()
+            st.session_state["active_tab"] = None
+
+        ops_agg, circ_agg, task_agg = dashboard_summaries(["ops", "circ", "task"])
+        if _background_loads()["running"]:
+            st.markdown('<div class="alert-bar alert-info">Loading the latest data — showing the figures saved last time.</div>',
+                        unsafe_allow_html=True)
+            _rerun_when_loaded()
+
+        # ── Alert bar for open high-severity ─────────────────────────────────────
+        if ops_agg["n_hi_open"] > 0:
+            teams_aff = ", ".join(ops_agg["hi_open_teams"])
+            st.markdown(f'<div class="alert-bar alert-hi">⚠ &nbsp; {ops_agg["n_hi_open"]} HIGH severity operational issue(s) open — Teams: {teams_aff}</div>', unsafe_allow_html=True)
+
+        # ── Alert bars, from the reminder digest ──────────────────────────────────
+        digest = reminder_digest()
+        if digest is None:   # before the first reminder run
+            n_task_late, late_teams = task_agg["n_overdue"], task_agg["overdue_teams"]
         else:
-            st.markdown('<div class="alert-bar alert-info">No circular data yet.</div>', unsafe_allow_html=True)
-
-    with circ_col2:
-        st.markdown('<p class="section-title">Completion Progress</p>', unsafe_allow_html=True)
-        if not df_circ.empty:
-            circ_status_counts = df_circ["status"].value_counts()
-            total_c = circ_status_counts.sum()
-            pct_done = int(circ_status_counts.get("Closed", 0) / total_c * 100) if total_c > 0 else 0
-            fig_prog_db = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=pct_done,
-                number={"suffix": "%", "font": {"family": "IBM Plex Mono", "size": 32, "color": "#00dd88"}},
-                gauge=dict(
-                    axis=dict(range=[0, 100], tickcolor="#4a6080",
-                              tickfont=dict(family="IBM Plex Mono", size=10)),
-                    bar=dict(color="#00dd88", thickness=0.3),
-                    bgcolor="#0c1020",
-                    borderwidth=1, bordercolor="#1e2d4a",
-                    steps=[
-                        dict(range=[0, 40],  color="#1a0a0f"),
-                        dict(range=[40, 70], color="#1a150a"),
-                        dict(range=[70, 100], color="#0a1a12"),
-                    ],
-                    threshold=dict(line=dict(color="#aa66ff", width=3), thickness=0.8, value=75)
-                ),
-                title={"text": "Circulars Closed", "font": {"family": "IBM Plex Mono", "size": 11, "color": "#4a6080"}},
-            ))
-            fig_prog_db.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", font_color="#c8d8f0",
-                height=220, margin=dict(t=30, b=10, l=30, r=30)
-            )
-            st.plotly_chart(fig_prog_db, use_container_width=True, config={"displayModeBar": False}, key="db_prog")
-
-    with circ_col3:
-        st.markdown('<p class="section-title">By Team</p>', unsafe_allow_html=True)
-        if not df_circ.empty:
-            circ_team = df_circ["team"].value_counts()
-            fig_ct_db = go.Figure(go.Bar(
-                x=circ_team.index, y=circ_team.values,
-                marker_color="#aa66ff", marker_opacity=0.75,
-                text=circ_team.values, textposition="outside",
-                textfont=dict(family="IBM Plex Mono", size=11, color="#c8d8f0"),
-            ))
-            fig_ct_db.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0", height=220,
-                margin=dict(t=30, b=10, l=10, r=10),
-                xaxis=dict(tickfont=dict(family="IBM Plex Mono", size=10)),
-                yaxis=dict(showgrid=True, gridcolor="#1e2d4a", showticklabels=False,
-                           range=[0, circ_team.values.max() * 1.35]),
-            )
-            st.plotly_chart(fig_ct_db, use_container_width=True, config={"displayModeBar": False}, key="db_ct")
-
-    st.markdown("<br>", unsafe_allow_html=True)
-
-    # ── Row 3: Task Reminder charts ───────────────────────────────────────────
-    st.markdown('<p class="section-title">Task Reminders</p>', unsafe_allow_html=True)
-    task_col1, task_col2, task_col3 = st.columns([1.2, 1, 1])
-
-    with task_col1:
-        st.markdown('<p class="section-title">By Status</p>', unsafe_allow_html=True)
-        if not df_task.empty:
-            task_stat_counts = df_task["status"].value_counts()
-            colors_ts = {"Open": "#ff4466", "In Progress": "#ffaa00", "Closed": "#00dd88"}
-            fig_ts_db = go.Figure(go.Pie(
-                labels=task_stat_counts.index,
-                values=task_stat_counts.values,
-                hole=0.55,
-                marker_colors=[colors_ts.get(s, "#ff9933") for s in task_stat_counts.index],
-                textfont_size=10, textfont_family="IBM Plex Mono", showlegend=True,
-            ))
-            fig_ts_db.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0", height=220, margin=dict(t=10,b=10,l=10,r=10),
-                legend=dict(font=dict(family="IBM Plex Mono", size=9), orientation="h",
-                            yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
-                annotations=[dict(text=f"<b>{len(df_task)}</b>", x=0.5, y=0.5,
-                                  font_size=20, font_family="IBM Plex Mono",
-                                  font_color="#c8d8f0", showarrow=False)]
-            )
-            st.plotly_chart(fig_ts_db, use_container_width=True, config={"displayModeBar": False}, key="db_ts")
-        else:
-            st.markdown('<div class="alert-bar alert-info">No task data yet.</div>', unsafe_allow_html=True)
-
-    with task_col2:
-        st.markdown('<p class="section-title">Task Status Overview</p>', unsafe_allow_html=True)
-        if not df_task.empty:
-            today_norm = pd.Timestamp(date.today()).normalize()
-            due_norm   = pd.to_datetime(df_task["due_date"], errors="coerce").dt.normalize()
-            is_closed    = df_task["status"].str.strip().str.lower() == "closed"
-            is_overdue   = (due_norm < today_norm) & (~is_closed)
-            is_due_today = (due_norm == today_norm) & (~is_closed)
-
-            n_closed    = int(is_closed.sum())
-            n_due_today = int(is_due_today.sum())
-            n_overdue   = int(is_overdue.sum())
-            total_tasks = len(df_task)
-            def pct(n): return round(n / total_tasks * 100) if total_tasks > 0 else 0
-
-            categories = ["Closed",    "Due Today",  "Overdue"]
-            values     = [n_closed,    n_due_today,  n_overdue]
-            colors     = ["#00dd88",   "#ffaa00",    "#ff4466"]
-            borders    = ["#00ff99",   "#ffcc44",    "#ff6680"]
-            txt_dark   = ["#001a0d",   "#1a0f00",    "#1a000a"]
-
-            fig_ot = go.Figure()
-            for cat, val, col, bord, tdark in zip(categories, values, colors, borders, txt_dark):
-                p     = pct(val)
-                label = f"  {val}  ({p}%)"
-                fig_ot.add_trace(go.Bar(
-                    name=cat,
-                    x=[max(val, 0.12)],   # tiny stub so zero rows still render
-                    y=[cat],
-                    orientation="h",
-                    marker=dict(color=col, opacity=0.90, line=dict(color=bord, width=1.5)),
-                    text=[label],
-                    textposition="inside" if val > 0 else "outside",
-                    textfont=dict(
-                        family="IBM Plex Mono", size=13,
-                        color=tdark if val > 0 else col
-                    ),
-                    insidetextanchor="middle",
-                    width=0.52,
-                    showlegend=False,
-                ))
-
-            max_val = max(values + [1])
-            fig_ot.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0",
-                height=220,
-                margin=dict(t=10, b=28, l=82, r=40),
-                showlegend=False,
-                xaxis=dict(
-                    showgrid=True, gridcolor="#1e2d4a",
-                    showticklabels=False, zeroline=True,
-                    zerolinecolor="#2a4070", zerolinewidth=1,
-                    range=[0, max_val * 1.6],
-                ),
-                yaxis=dict(
-                    tickfont=dict(family="IBM Plex Mono", size=12, color="#c8d8f0"),
-                    tickcolor="#4a6080",
-                    categoryorder="array",
-                    categoryarray=["Overdue", "Due Today", "Closed"],
-                ),
-                bargap=0.30,
-            )
-            fig_ot.add_annotation(
-                text=f"Total · {total_tasks} tasks",
-                xref="paper", yref="paper",
-                x=1.0, y=-0.16,
-                showarrow=False,
-                font=dict(family="IBM Plex Mono", size=9, color="#4a6080"),
-                xanchor="right",
-            )
-            st.plotly_chart(fig_ot, use_container_width=True, config={"displayModeBar": False}, key="db_ot")
-
-    with task_col3:
-        st.markdown('<p class="section-title">Tasks by Team &amp; Status</p>', unsafe_allow_html=True)
-        if not df_task.empty:
-            teams_order_db = [t for t in TASK_TEAMS if t in df_task["team"].values]
-            status_colors_db = [("Open", "#ff4466"), ("In Progress", "#ffaa00"), ("Closed", "#00dd88")]
-            fig_tts_db = go.Figure()
-            for status_val, color in status_colors_db:
-                counts = [len(df_task[(df_task["team"] == t) & (df_task["status"] == status_val)]) for t in teams_order_db]
-                fig_tts_db.add_trace(go.Bar(
-                    name=status_val,
-                    y=teams_order_db,
-                    x=counts,
-                    orientation="h",
-                    marker=dict(color=color, opacity=0.88),
-                    text=[str(c) if c > 0 else "" for c in counts],
-                    textposition="inside",
-                    textfont=dict(family="IBM Plex Mono", size=11, color="#ffffff"),
-                    insidetextanchor="middle",
-                ))
-            fig_tts_db.update_layout(
-                barmode="stack",
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font_color="#c8d8f0", height=220,
-                margin=dict(t=10, b=10, l=10, r=30),
-                xaxis=dict(showgrid=True, gridcolor="#1e2d4a", showticklabels=False, zeroline=False),
-                yaxis=dict(tickfont=dict(family="IBM Plex Mono", size=11, color="#c8d8f0"), autorange="reversed"),
-                legend=dict(font=dict(family="IBM Plex Mono", size=9, color="#c8d8f0"), orientation="h",
-                            yanchor="bottom", y=-0.28, xanchor="center", x=0.5,
-                            bgcolor="rgba(0,0,0,0)"),
-                bargap=0.3,
-            )
-            st.plotly_chart(fig_tts_db, use_container_width=True, config={"displayModeBar": False}, key="db_tts")
+            late = [i["team"] for i in digest["items"] if i["dataset"] == "task" and i["urgency"] == "overdue"]
+            n_task_late, late_teams = len(late), _ordered_teams(late, TASK_TEAMS)
+        if n_task_late > 0:
+            ot_teams = ", ".join(late_teams)
+            st.markdown(f'<div class="alert-bar alert-hi">🔔 &nbsp; {n_task_late} OVERDUE task(s) — Teams: {ot_teams}</div>', unsafe_allow_html=True)
+        if digest is not None:
+            n_task_soon = digest["counts"]["task"]["today"] + digest["counts"]["task"]["soon"]
+            n_circ_due  = sum(digest["counts"]["circ"].values())
+            if n_task_soon or n_circ_due:
+                st.markdown(f'<div class="alert-bar alert-info">⏰ &nbsp; {n_task_soon} task(s) due within '
+                            f'{URGENCY_SOON_DAYS} days · {n_circ_due} circular item(s) overdue or due within '
+                            f'{URGENCY_SOON_DAYS} days</div>', unsafe_allow_html=True)
+
+        # ── Metric cards ─────────────────────────────────────────────────────────
+        total_ops  = ops_agg["total"]
+        n_open     = ops_agg["n_open"]
+        n_inprog   = ops_agg["n_inprog"]
+        n_closed   = ops_agg["n_closed"]
+        n_high     = ops_agg["n_high"]
+        n_circ     = circ_agg["total"]
+        n_task     = task_agg["total"]
+        n_task_overdue = task_agg["n_overdue"]
+
+        c1, c2, c3, c4, c5 = st.columns(5)
+        with c1:
+            st.markdown(f"""
+            <div class="metric-card hi">
+                <div class="metric-label">Open Issues</div>
+                <div class="metric-value">{n_open}</div>
+                <div class="metric-sub">of {total_ops} total ops</div>
+            </div>""", unsafe_allow_html=True)
+        with c2:
+            st.markdown(f"""
+            <div class="metric-card med">
+                <div class="metric-label">In Progress</div>
+                <div class="metric-value">{n_inprog}</div>
+                <div class="metric-sub">being actioned</div>
+            </div>""", unsafe_allow_html=True)
+        with c3:
+            st.markdown(f"""
+            <div class="metric-card lo">
+                <div class="metric-label">Closed</div>
+                <div class="metric-value">{n_closed}</div>
+                <div class="metric-sub">resolved</div>
+            </div>""", unsafe_allow_html=True)
+        with c4:
+            st.markdown(f"""
+            <div class="metric-card circ">
+                <div class="metric-label">Circular Items</div>
+                <div class="metric-value">{n_circ}</div>
+                <div class="metric-sub">{circ_agg["n_high"]} high severity</div>
+            </div>""", unsafe_allow_html=True)
+        with c5:
+            st.markdown(f"""
+            <div class="metric-card task">
+                <div class="metric-label">Task Reminders</div>
+                <div class="metric-value">{n_task}</div>
+                <div class="metric-sub">{n_task_overdue} overdue</div>
+            </div>""", unsafe_allow_html=True)
+
+        st.markdown("<br>", unsafe_allow_html=True)
+
+        # ── Helper pills (defined here for dashboard use) ─────────────────────────
+        def sev_pill(s):
+            cls = {"High": "high", "Medium": "medium", "Low": "low"}.get(s, "low")
+            return f'<span class="pill pill-{cls}">{s}</span>'
+
+        def status_pill(s):
+            cls = {"Open": "open", "In Progress": "inprogress", "Closed": "closed"}.get(s, "closed")
+            return f'<span class="pill pill-{cls}">{s}</span>'
+
+        # ── Row 1: Ops charts ─────────────────────────────────────────────────────
+        st.markdown('<p class="section-title">Operational Issues</p>', unsafe_allow_html=True)
+        col_a, col_b, col_c = st.columns([1.2, 1, 1])
+
+        with col_a:
+            st.markdown('<p class="section-title">Status Breakdown</p>', unsafe_allow_html=True)
+            if ops_agg["total"]:
+                fig_donut = fig_status_donut(ops_agg["status_counts"], total_ops, "#4a6080")
+                st.plotly_chart(fig_donut, width="stretch", config={"displayModeBar": False}, key="db_donut")
+            else:
+                st.markdown('<div class="alert-bar alert-info">No ops data yet.</div>', unsafe_allow_html=True)
+
+        with col_b:
+            st.markdown('<p class="section-title">Severity Distribution</p>', unsafe_allow_html=True)
+            if ops_agg["total"]:
+                fig_sev = fig_severity_bars(ops_agg["sev_counts"])
+                st.plotly_chart(fig_sev, width="stretch", config={"displayModeBar": False}, key="db_sev")
+
+        with col_c:
+            st.markdown('<p class="section-title">Issues by Team</p>', unsafe_allow_html=True)
+            if ops_agg["total"]:
+                fig_team = fig_team_bars(ops_agg["team_counts"], "#00c2ff", x_grid=True)
+                st.plotly_chart(fig_team, width="stretch", config={"displayModeBar": False}, key="db_team")
+
+        st.markdown("<br>", unsafe_allow_html=True)
+
+        # ── Row 2: Circular Implementation charts ────────────────────────────────
+        st.markdown('<p class="section-title">Circular Implementation</p>', unsafe_allow_html=True)
+        circ_col1, circ_col2, circ_col3 = st.columns([1.2, 1, 1])
+
+        with circ_col1:
+            st.markdown('<p class="section-title">Status Breakdown</p>', unsafe_allow_html=True)
+            if circ_agg["total"]:
+                fig_circ_donut = fig_status_donut(circ_agg["status_counts"], n_circ, "#aa66ff")
+                st.plotly_chart(fig_circ_donut, width="stretch", config={"displayModeBar": False}, key="db_circ_donut")
+            else:
+                st.markdown('<div class="alert-bar alert-info">No circular data yet.</div>', unsafe_allow_html=True)
+
+        with circ_col2:
+            st.markdown('<p class="section-title">Completion Progress</p>', unsafe_allow_html=True)
+            if circ_agg["total"]:
+                fig_prog_db = fig_progress_gauge(circ_agg["pct_done"])
+                st.plotly_chart(fig_prog_db, width="stretch", config={"displayModeBar": False}, key="db_prog")
+
+        with circ_col3:
+            st.markdown('<p class="section-title">By Team</p>', unsafe_allow_html=True)
+            if circ_agg["total"]:
+                fig_ct_db = fig_team_bars(circ_agg["team_counts"], "#aa66ff", x_grid=False)
+                st.plotly_chart(fig_ct_db, width="stretch", config={"displayModeBar": False}, key="db_ct")
+
+        st.markdown("<br>", unsafe_allow_html=True)
+
+        # ── Row 3: Task Reminder charts ───────────────────────────────────────────
+        st.markdown('<p class="section-title">Task Reminders</p>', unsafe_allow_html=True)
+        task_col1, task_col2, task_col3 = st.columns([1.2, 1, 1])
+
+        with task_col1:
+            st.markdown('<p class="section-title">By Status</p>', unsafe_allow_html=True)
+            if task_agg["total"]:
+                fig_ts_db = fig_status_donut(task_agg["status_counts"], n_task, "#ff9933",
+                                             hole=0.55, text_size=10, legend_size=9, legend_y=-0.2, center_size=20)
+                st.plotly_chart(fig_ts_db, width="stretch", config={"displayModeBar": False}, key="db_ts")
+            else:
+                st.markdown('<div class="alert-bar alert-info">No task data yet.</div>', unsafe_allow_html=True)
+
+        with task_col2:
+            st.markdown('<p class="section-title">Task Status Overview</p>', unsafe_allow_html=True)
+            if task_agg["total"]:
+                fig_ot = fig_task_overview(task_agg["n_closed"], task_agg["n_due_today"],
+                                           task_agg["n_overdue"], task_agg["total"])
+                st.plotly_chart(fig_ot, width="stretch", config={"displayModeBar": False}, key="db_ot")
 
-    st.markdown('</div>', unsafe_allow_html=True)
+        with task_col3:
+            st.markdown('<p class="section-title">Tasks by Team &amp; Status</p>', unsafe_allow_html=True)
+            if task_agg["total"]:
+                fig_tts_db = fig_task_team_status(task_agg["teams_order"], task_agg["team_status"])
+                st.plotly_chart(fig_tts_db, width="stretch", config={"displayModeBar": False}, key="db_tts")
+
+        st.markdown('</div>', unsafe_allow_html=True)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  TAB 2 — OPERATIONAL ISSUES
 # ══════════════════════════════════════════════════════════════════════════════
-with tab2:
-    st.markdown('<div class="tab-body">', unsafe_allow_html=True)
-    if st.session_state.get("active_tab") == "ops":
-        show_flash()
-        st.session_state["active_tab"] = None
-
-    col_left, col_right = st.columns([2, 1])
-
-    with col_left:
-        st.markdown('<p class="section-title">Filter</p>', unsafe_allow_html=True)
-        fc1, fc2, fc3 = st.columns(3)
-        with fc1:
-            sel_team = st.multiselect("Team", options=OPS_TEAMS, default=[], key="f_team")
-        with fc2:
-            sel_sev = st.multiselect("Severity", options=SEVERITIES, default=[], key="f_sev")
-        with fc3:
-            sel_stat = st.multiselect("Status", options=STATUSES, default=[], key="f_stat")
-
-        filt = df_ops.copy()
-        if sel_team:  filt = filt[filt["team"].isin(sel_team)]
-        if sel_sev:   filt = filt[filt["severity"].isin(sel_sev)]
-        if sel_stat:  filt = filt[filt["status"].isin(sel_stat)]
-
-        tbl_title_col, tbl_export_col = st.columns([3, 1])
-        with tbl_title_col:
-            st.markdown('<p class="section-title">Operational Issues</p>', unsafe_allow_html=True)
-        with tbl_export_col:
-            if not filt.empty:
-                exp_filt = filt.copy()
-                exp_filt["issue_date"] = pd.to_datetime(exp_filt["issue_date"], errors="coerce").dt.strftime("%d-%m-%Y")
+if tab2.open:
+    with tab2:
+        st.markdown('<div class="tab-body">', unsafe_allow_html=True)
+        df_ops = session_data("ops")
+        if st.session_state.get("active_tab") == "ops":
+            show_flash()
+            st.session_state["active_tab"] = None
+
+        col_left, col_right = st.columns([2, 1])
+
+        with col_left:
+            st.markdown('<p class="section-title">Filter</p>', unsafe_allow_html=True)
+            fc1, fc2, fc3, fc4 = st.columns([1, 1, 1, 0.6])
+            with fc1:
+                sel_team = st.multiselect("Team", options=OPS_TEAMS, default=[], key="f_team")
+            with fc2:
+                sel_sev = st.multiselect("Severity", options=SEVERITIES, default=[], key="f_sev")
+            with fc3:
+                sel_stat = st.multiselect("Status", options=STATUSES, default=[], key="f_stat")
+            with fc4:
+                ops_page_size = st.selectbox("Rows / page", PAGE_SIZES, index=1, key="f_page_size")
+
+            ops_index = session_index("ops_data")
+            ops_rows = filter_rows(ops_index, {"team": sel_team, "severity": sel_sev, "status": sel_stat})
+
+            tbl_title_col, tbl_export_col = st.columns([3, 1])
+            with tbl_title_col:
+                st.markdown('<p class="section-title">Operational Issues</p>', unsafe_allow_html=True)
+            with tbl_export_col:
+                if len(ops_rows):
+                    st.download_button(
+                        "📤 Export",
+                        data=partial(export_csv, df_ops, ops_rows, "issue_date"),
+                        file_name=f"DELTA_OPS_issues_{date.today().strftime('%d%m%Y')}.csv",
+                        mime="text/csv",
+                        key="export_ops_filtered",
+                        width="stretch",
+                    )
                 st.download_button(
-                    "📤 Export",
-                    data=exp_filt.to_csv(index=False).encode(),
-                    file_name=f"DELTA_OPS_issues_{date.today().strftime('%d%m%Y')}.csv",
+                    "🕘 History",
+                    data=lambda: journal_frame("ops").to_csv(index=False).encode(),
+                    file_name=f"DELTA_OPS_issues_history_{date.today().strftime('%d%m%Y')}.csv",
                     mime="text/csv",
-                    key="export_ops_filtered",
-                    use_container_width=True,
+                    key="history_ops",
+                    width="stretch",
                 )
 
-        if filt.empty:
-            st.markdown('<div class="alert-bar alert-info">No issues match current filters.</div>', unsafe_allow_html=True)
-        else:
-            def sev_pill(s):
-                cls = {"High": "high", "Medium": "medium", "Low": "low"}.get(s, "low")
-                return f'<span class="pill pill-{cls}">{s}</span>'
-            def status_pill(s):
-                cls = {"Open": "open", "In Progress": "inprogress", "Closed": "closed"}.get(s, "closed")
-                return f'<span class="pill pill-{cls}">{s}</span>'
-
-            for status_label, default_open in [("Open", True), ("In Progress", True), ("Closed", False)]:
-                group = filt[filt["status"] == status_label].sort_values("severity")
-                if group.empty:
-                    continue
-                label = f"{status_label}  ({len(group)})"
-                with st.expander(label, expanded=default_open):
-                    rows_html2 = ""
-                    for idx_row, row in group.iterrows():
-                        date_str = row["issue_date"].strftime("%d %b %Y") if pd.notna(row["issue_date"]) else "—"
-                        rows_html2 += f"""
-                        <tr>
-                            <td class="team-cell">{_html.escape(str(row['team']))}</td>
-                            <td>{_html.escape(str(row['issue_description']))}</td>
-                            <td>{date_str}</td>
-                            <td>{_html.escape(str(row['reported_to']))}</td>
-                            <td>{sev_pill(row['severity'])}</td>
-                            <td>{status_pill(row['status'])}</td>
-                        </tr>"""
+            if not len(ops_rows):
+                st.markdown('<div class="alert-bar alert-info">No issues match current filters.</div>', unsafe_allow_html=True)
+            else:
+                def render_issue_table(df_page):
+                    rows_html2 = _cached_rows_html("ops", df_page[OPS_COLUMNS], _ops_rows_html)
                     st.markdown(f"""
                     <div class="chart-wrapper">
                     <table class="issue-table">
@@ -1506,718 +4093,600 @@ with tab2:
                     </div>
                     """, unsafe_allow_html=True)
 
-        # ── Delete section ────────────────────────────────────────────────────
-        if not df_ops.empty:
-            st.markdown('<p class="section-title" style="margin-top:24px">Delete Issues</p>', unsafe_allow_html=True)
-            ops_delete_options = {
-                f"[{i}] {row['team']} | {str(row['issue_description'])[:50]} | {row['status']}": i
-                for i, row in df_ops.iterrows()
-            }
-            ops_to_delete = st.multiselect(
-                "Select issue(s) to delete (multi-select supported)",
-                options=list(ops_delete_options.keys()),
-                key="ops_delete_select"
-            )
-            if ops_to_delete:
-                if st.button("🗑 DELETE SELECTED ISSUES", key="ops_delete_btn", use_container_width=True):
-                    indices_to_drop = [ops_delete_options[k] for k in ops_to_delete]
-                    st.session_state["ops_data"] = df_ops.drop(index=indices_to_drop).reset_index(drop=True)
-                    save_ops(st.session_state["ops_data"])
-                    st.session_state["flash"] = ("success", f"{len(indices_to_drop)} issue(s) deleted.")
-                    st.session_state["active_tab"] = "ops"
-                    st.rerun()
-
-    with col_right:
-        st.markdown('<p class="section-title">Log New Issue</p>', unsafe_allow_html=True)
-        with st.container():
-            f_team  = st.selectbox("Team", OPS_TEAMS, key="n_team")
-            f_desc  = st.text_area("Issue Description", height=90, key="n_desc",
-                                    placeholder="Describe the operational issue…")
-            f_date  = st.date_input("Issue Date", value=date.today(), key="n_date")
-            f_rep   = st.selectbox("Reported To", OPS_REPORTED_TO, key="n_rep")
-            f_sev2  = st.selectbox("Severity", SEVERITIES, key="n_sev2")
-            f_stat2 = st.selectbox("Status", STATUSES, key="n_stat2")
-
-            if st.button("LOG ISSUE", key="log_btn"):
-                if f_desc.strip():
-                    new_row = {
-                        "team":              f_team,
-                        "issue_description": f_desc.strip(),
-                        "issue_date":        pd.Timestamp(f_date),
-                        "reported_to":       f_rep,
-                        "severity":          f_sev2,
-                        "status":            f_stat2,
-                    }
-                    st.session_state["ops_data"] = pd.concat(
-                        [st.session_state["ops_data"], pd.DataFrame([new_row])],
-                        ignore_index=True
-                    )
-                    save_ops(st.session_state["ops_data"])
-                    st.session_state["flash"] = ("success", "Issue logged and saved.")
-                    st.session_state["active_tab"] = "ops"
-                    st.rerun()
-                else:
-                    st.error("Description cannot be empty.")
-
-        # ── Update status ─────────────────────────────────────────────────────
-        if len(df_ops) > 0:
-            st.markdown('<p class="section-title" style="margin-top:24px">Update Status</p>', unsafe_allow_html=True)
-            desc_options = df_ops["issue_description"].str[:55].tolist()
-            sel_desc = st.selectbox("Select Issue", desc_options, key="upd_desc")
-            new_status = st.selectbox("New Status", STATUSES, key="upd_stat")
-            if st.button("UPDATE STATUS", key="upd_btn"):
-                idx = df_ops[df_ops["issue_description"].str[:55] == sel_desc].index
-                if len(idx) > 0:
-                    st.session_state["ops_data"].loc[idx[0], "status"] = new_status
-                    save_ops(st.session_state["ops_data"])
-                    st.session_state["flash"] = ("success", "Status updated.")
-                    st.session_state["active_tab"] = "ops"
-                    st.rerun()
-
-        # ── Bulk CSV Upload ────────────────────────────────────────────────────
-        st.markdown("""
-        <div class="bulk-panel">
-            <div class="bulk-step"><b>BULK UPLOAD</b> · Operational Issues CSV</div>
-        """, unsafe_allow_html=True)
-
-        st.markdown('<p class="section-title" style="margin-top:4px">Step 1 — Download Template</p>', unsafe_allow_html=True)
-        st.markdown("""
-        <div style="font-size:11px; color:#4a6080; margin-bottom:8px; font-family:'IBM Plex Mono',monospace;">
-            <span style="color:#ff4466">★ Required columns:</span>
-            team · issue_description · issue_date · reported_to · severity · status<br>
-            <span style="color:#4a6080">team: DP | BROKING | EAGLE &nbsp;·&nbsp;
-            severity: High | Medium | Low &nbsp;·&nbsp; status: Open | In Progress | Closed<br>
-            Date format: DD-MM-YYYY or YYYY-MM-DD</span>
-        </div>
-        """, unsafe_allow_html=True)
-
-        st.download_button(
-            "📥 Download OPS Template",
-            data=make_ops_template(),
-            file_name="DELTA_OPS_issue_template.csv",
-            mime="text/csv",
-            use_container_width=True,
-            key="dl_ops_tmpl"
-        )
-
-        st.markdown('<p class="section-title" style="margin-top:16px">Step 2 — Upload CSV</p>', unsafe_allow_html=True)
-
-        uploaded_ops = st.file_uploader(
-            "Upload Operational Issues CSV",
-            type=["csv"],
-            key="bulk_ops_upload",
-        )
-
-        if uploaded_ops is not None:
-            # Use file hash to prevent processing same file twice
-            file_key = f"ops_imported_{uploaded_ops.name}_{uploaded_ops.size}"
-
-            try:
-                raw_ops = pd.read_csv(uploaded_ops)
-                st.markdown(
-                    f'<div class="upload-result upload-ok">📄 <b>{uploaded_ops.name}</b> &nbsp;·&nbsp; '
-                    f'<b>{len(raw_ops)}</b> rows detected</div>',
-                    unsafe_allow_html=True
+                ops_groups = status_groups(df_ops, ops_index, ops_rows, "severity")
+                for status_label, default_open in [("Open", True), ("In Progress", True), ("Closed", False)]:
+                    group = ops_groups[status_label]
+                    if not len(group):
+                        continue
+                    label = f"{status_label}  ({len(group)})"
+                    with st.expander(label, expanded=default_open):
+                        render_paged(df_ops, group, f"pg_ops_{status_label}", ops_page_size, render_issue_table)
+
+            # ── Delete section ────────────────────────────────────────────────────
+            if not df_ops.empty:
+                st.markdown('<p class="section-title" style="margin-top:24px">Delete Issues</p>', unsafe_allow_html=True)
+                ops_delete_options = record_labels(df_ops, "issue_description")
+                ops_to_delete = st.multiselect(
+                    "Select issue(s) to delete (multi-select supported)",
+                    options=list(ops_delete_options),
+                    format_func=ops_delete_options.get,
+                    key="ops_delete_select"
                 )
+                if ops_to_delete:
+                    if st.button("🗑 DELETE SELECTED ISSUES", key="ops_delete_btn", width="stretch"):
+                        drop_records("ops_data", ops_to_delete)
+                        st.session_state["flash"] = save_flash(commit_edits("ops_data", "delete", ops_to_delete), f"{len(ops_to_delete)} issue(s) deleted.")
+                        st.session_state["active_tab"] = "ops"
+                        st.rerun()
+
+        with col_right:
+            st.markdown('<p class="section-title">Log New Issue</p>', unsafe_allow_html=True)
+            with st.container():
+                f_team  = st.selectbox("Team", OPS_TEAMS, key="n_team")
+                f_desc  = st.text_area("Issue Description", height=90, key="n_desc",
+                                        placeholder="Describe the operational issue…")
+                f_date  = st.date_input("Issue Date", value=date.today(), key="n_date")
+                f_rep   = st.selectbox("Reported To", OPS_REPORTED_TO, key="n_rep")
+                f_sev2  = st.selectbox("Severity", SEVERITIES, key="n_sev2")
+                f_stat2 = st.selectbox("Status", STATUSES, key="n_stat2")
+
+                if st.button("LOG ISSUE", key="log_btn"):
+                    if f_desc.strip():
+                        new_row = {
+                            "team":              f_team,
+                            "issue_description": f_desc.strip(),
+                            "issue_date":        pd.Timestamp(f_date),
+                            "reported_to":       f_rep,
+                            "severity":          f_sev2,
+                            "status":            f_stat2,
+                        }
+                        new_id = add_record("ops_data", new_row, "ops")
+                        st.session_state["flash"] = save_flash(commit_edits("ops_data", "create", [new_id]), "Issue logged and saved.")
+                        st.session_state["active_tab"] = "ops"
+                        st.rerun()
+                    else:
+                        st.error("Description cannot be empty.")
+
+            # ── Update status ─────────────────────────────────────────────────────
+            if len(df_ops) > 0:
+                st.markdown('<p class="section-title" style="margin-top:24px">Update Status</p>', unsafe_allow_html=True)
+                desc_options = dict(zip(df_ops[ID_COL], df_ops["issue_description"].astype(str).str[:55]))
+                sel_desc = st.selectbox("Select Issue", list(desc_options), format_func=desc_options.get, key="upd_desc")
+                new_status = st.selectbox("New Status", STATUSES, key="upd_stat")
+                if st.button("UPDATE STATUS", key="upd_btn"):
+                    if set_record_status("ops_data", sel_desc, new_status):
+                        st.session_state["flash"] = save_flash(commit_edits("ops_data", "status", [sel_desc]), "Status updated.")
+                        st.session_state["active_tab"] = "ops"
+                        st.rerun()
+                    else:
+                        st.session_state["flash"] = ("error", "That issue no longer exists — it was changed or removed in another session.")
+                        st.session_state["active_tab"] = "ops"
+                        st.rerun()
+
+            # ── Bulk CSV Upload ────────────────────────────────────────────────────
+            st.markdown("""
+            <div class="bulk-panel">
+                <div class="bulk-step"><b>BULK UPLOAD</b> · Operational Issues CSV</div>
+            """, unsafe_allow_html=True)
+
+            st.markdown('<p class="section-title" style="margin-top:4px">Step 1 — Download Template</p>', unsafe_allow_html=True)
+            st.markdown("""
+            <div style="font-size:11px; color:#4a6080; margin-bottom:8px; font-family:'IBM Plex Mono',monospace;">
+                <span style="color:#ff4466">★ Required columns:</span>
+                team · issue_description · issue_date · reported_to · severity · status<br>
+                <span style="color:#4a6080">team: DP | BROKING | EAGLE &nbsp;·&nbsp;
+                severity: High | Medium | Low &nbsp;·&nbsp; status: Open | In Progress | Closed<br>
+                Date format: DD-MM-YYYY or YYYY-MM-DD</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+            st.download_button(
+                "📥 Download OPS Template",
+                data=make_ops_template(),
+                file_name="DELTA_OPS_issue_template.csv",
+                mime="text/csv",
+                width="stretch",
+                key="dl_ops_tmpl"
+            )
 
-                with st.expander("👁 Preview uploaded rows", expanded=False):
-                    st.dataframe(raw_ops.head(10), use_container_width=True)
-
-                clean_ops, errs_ops = validate_ops_bulk(raw_ops)
-
-                if errs_ops:
-                    for e in errs_ops:
-                        st.markdown(f'<div class="upload-result upload-err">❌ {e}</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="upload-result upload-warn">⚠ No data saved. Fix errors and re-upload.</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(
-                        f'<div class="upload-result upload-ok">✅ Validation passed — '
-                        f'<b>{len(clean_ops)}</b> issues ready to import</div>',
-                        unsafe_allow_html=True
-                    )
-
-                    with st.expander("✅ Preview validated data", expanded=False):
-                        st.dataframe(clean_ops, use_container_width=True)
+            st.markdown('<p class="section-title" style="margin-top:16px">Step 2 — Upload CSV</p>', unsafe_allow_html=True)
 
-                    st.markdown('<p class="section-title" style="margin-top:12px">Step 3 — Import Mode</p>', unsafe_allow_html=True)
+            uploaded_ops = st.file_uploader(
+                "Upload Operational Issues CSV",
+                type=["csv"],
+                key="bulk_ops_upload",
+            )
 
-                    ops_mode = st.radio(
-                        "Import mode",
-                        ["Append — add to existing", "Replace — clear all and import fresh"],
-                        key="ops_import_mode",
-                        index=0
-                    )
+            if uploaded_ops is not None:
+                # Use file hash to prevent processing same file twice
+                file_key = f"ops_imported_{uploaded_ops.name}_{uploaded_ops.size}"
 
-                    if "Replace" in ops_mode:
-                        st.markdown('<div class="upload-result upload-warn">⚠ Replace will permanently delete ALL current operational data.</div>', unsafe_allow_html=True)
+                try:
+                    n_ops_rows, errs_ops, clean_ops = render_upload_check(uploaded_ops, file_key, "ops")
 
-                    # Guard: only show import button if this file hasn't been imported yet
-                    already_imported = st.session_state.get(file_key, False)
-                    if already_imported:
-                        st.markdown('<div class="upload-result upload-ok">✅ This file has already been imported. Upload a new file to import again.</div>', unsafe_allow_html=True)
+                    if errs_ops:
+                        st.markdown('<div class="upload-result upload-warn">⚠ No data saved. Fix errors and re-upload.</div>', unsafe_allow_html=True)
                     else:
-                        if st.button("💾 CONFIRM IMPORT", key="ops_confirm_import", use_container_width=True):
-                            existing = st.session_state["ops_data"]
-                            if "Replace" in ops_mode:
-                                merged = clean_ops.copy()
-                            else:
-                                merged = pd.concat([existing, clean_ops], ignore_index=True)
-                            st.session_state["ops_data"] = merged
-                            save_ops(merged)
-                            st.session_state[file_key] = True  # mark as imported
-                            st.session_state["flash"] = (
-                                "success",
-                                f"{len(clean_ops)} issues imported ({'replaced' if 'Replace' in ops_mode else 'appended'}). Total: {len(merged)} rows."
-                            )
-                            st.rerun()
-
-            except Exception as e:
-                st.markdown(f'<div class="upload-result upload-err">❌ Cannot read file: {e}</div>', unsafe_allow_html=True)
+                        st.markdown(
+                            f'<div class="upload-result upload-ok">✅ Validation passed — '
+                            f'<b>{n_ops_rows}</b> issues ready to import</div>',
+                            unsafe_allow_html=True
+                        )
+
+                        with st.expander("✅ Preview validated data", expanded=False):
+                            st.dataframe(clean_ops, width="stretch")
+
+                        st.markdown('<p class="section-title" style="margin-top:12px">Step 3 — Import Mode</p>', unsafe_allow_html=True)
+
+                        ops_mode = st.radio(
+                            "Import mode",
+                            ["Append — add to existing", "Replace — clear all and import fresh"],
+                            key="ops_import_mode",
+                            index=0
+                        )
+
+                        if "Replace" in ops_mode:
+                            st.markdown('<div class="upload-result upload-warn">⚠ Replace will permanently delete ALL current operational data.</div>', unsafe_allow_html=True)
+
+                        # Guard: only show import button if this file hasn't been imported yet
+                        already_imported = st.session_state.get(file_key, False)
+                        if already_imported:
+                            st.markdown('<div class="upload-result upload-ok">✅ This file has already been imported. Upload a new file to import again.</div>', unsafe_allow_html=True)
+                        else:
+                            if st.button("💾 CONFIRM IMPORT", key="ops_confirm_import", width="stretch"):
+                                n_imported, n_total = import_upload(
+                                    "ops", uploaded_ops, replace="Replace" in ops_mode, checked=True)
+                                st.session_state[file_key] = True  # mark as imported
+                                st.session_state["flash"] = (
+                                    "success",
+                                    f"{n_imported} issues imported ({'replaced' if 'Replace' in ops_mode else 'appended'}). Total: {n_total} rows."
+                                )
+                                st.session_state["active_tab"] = "ops"
+                                st.rerun()
+
+                except Exception as e:
+                    st.markdown(f'<div class="upload-result upload-err">❌ Cannot read file: {e}</div>', unsafe_allow_html=True)
+
+            st.markdown('</div>', unsafe_allow_html=True)
 
         st.markdown('</div>', unsafe_allow_html=True)
 
-    st.markdown('</div>', unsafe_allow_html=True)
-
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  TAB 3 — CIRCULAR IMPLEMENTATION
 # ══════════════════════════════════════════════════════════════════════════════
-with tab3:
-    st.markdown('<div class="tab-body">', unsafe_allow_html=True)
-    if st.session_state.get("active_tab") == "circ":
-        show_flash()
-        st.session_state["active_tab"] = None
-
-    col_cl, col_cr = st.columns([2, 1])
-
-    with col_cl:
-        # Filter bar for circulars
-        st.markdown('<p class="section-title">Filter</p>', unsafe_allow_html=True)
-        cc1, cc2, cc3 = st.columns(3)
-        with cc1:
-            c_sel_team = st.multiselect("Team", options=CIRC_TEAMS, default=[], key="cf_team")
-        with cc2:
-            c_sel_sev = st.multiselect("Severity", options=SEVERITIES, default=[], key="cf_sev")
-        with cc3:
-            c_sel_stat = st.multiselect("Status", options=STATUSES, default=[], key="cf_stat")
-
-        filt_circ = df_circ.copy()
-        if c_sel_team:  filt_circ = filt_circ[filt_circ["team"].isin(c_sel_team)]
-        if c_sel_sev:   filt_circ = filt_circ[filt_circ["severity"].isin(c_sel_sev)]
-        if c_sel_stat:  filt_circ = filt_circ[filt_circ["status"].isin(c_sel_stat)]
-
-        # Title + export
-        circ_title_col, circ_export_col = st.columns([3, 1])
-        with circ_title_col:
-            st.markdown('<p class="section-title">Active Circulars</p>', unsafe_allow_html=True)
-        with circ_export_col:
-            if not filt_circ.empty:
-                exp_circ = filt_circ.copy()
-                exp_circ["due_date"] = pd.to_datetime(exp_circ["due_date"], errors="coerce").dt.strftime("%d-%m-%Y")
+if tab3.open:
+    with tab3:
+        st.markdown('<div class="tab-body">', unsafe_allow_html=True)
+        df_circ = session_data("circ")
+        if st.session_state.get("active_tab") == "circ":
+            show_flash()
+            st.session_state["active_tab"] = None
+
+        col_cl, col_cr = st.columns([2, 1])
+
+        with col_cl:
+            # Filter bar for circulars
+            st.markdown('<p class="section-title">Filter</p>', unsafe_allow_html=True)
+            cc1, cc2, cc3, cc4 = st.columns([1, 1, 1, 0.6])
+            with cc1:
+                c_sel_team = st.multiselect("Team", options=CIRC_TEAMS, default=[], key="cf_team")
+            with cc2:
+                c_sel_sev = st.multiselect("Severity", options=SEVERITIES, default=[], key="cf_sev")
+            with cc3:
+                c_sel_stat = st.multiselect("Status", options=STATUSES, default=[], key="cf_stat")
+            with cc4:
+                circ_page_size = st.selectbox("Rows / page", PAGE_SIZES, index=1, key="cf_page_size")
+
+            circ_index = session_index("circ_data")
+            circ_rows = filter_rows(circ_index, {"team": c_sel_team, "severity": c_sel_sev, "status": c_sel_stat})
+
+            # Title + export
+            circ_title_col, circ_export_col = st.columns([3, 1])
+            with circ_title_col:
+                st.markdown('<p class="section-title">Active Circulars</p>', unsafe_allow_html=True)
+            with circ_export_col:
+                if len(circ_rows):
+                    st.download_button(
+                        "📤 Export",
+                        data=partial(export_csv, df_circ, circ_rows, "due_date"),
+                        file_name=f"DELTA_OPS_circulars_{date.today().strftime('%d%m%Y')}.csv",
+                        mime="text/csv",
+                        key="export_circ_filtered",
+                        width="stretch",
+                    )
                 st.download_button(
-                    "📤 Export",
-                    data=exp_circ.to_csv(index=False).encode(),
-                    file_name=f"DELTA_OPS_circulars_{date.today().strftime('%d%m%Y')}.csv",
+                    "🕘 History",
+                    data=lambda: journal_frame("circ").to_csv(index=False).encode(),
+                    file_name=f"DELTA_OPS_circulars_history_{date.today().strftime('%d%m%Y')}.csv",
                     mime="text/csv",
-                    key="export_circ_filtered",
-                    use_container_width=True,
+                    key="history_circ",
+                    width="stretch",
                 )
 
-        if filt_circ.empty:
-            st.markdown('<div class="alert-bar alert-info">No circular implementation items match filters. Log one using the form →</div>', unsafe_allow_html=True)
-        else:
-            def render_circ_cards(df_group):
-                for _, row in df_group.iterrows():
-                    date_str   = row["due_date"].strftime("%d %b %Y") if pd.notna(row["due_date"]) else "—"
-                    status_cls = {"Open": "open", "In Progress": "inprogress", "Closed": "closed"}.get(str(row["status"]), "closed")
-                    sev_cls    = {"High": "high", "Medium": "medium", "Low": "low"}.get(str(row["severity"]), "low")
-                    desc       = _html.escape(str(row["circular_description"]))
-                    team       = _html.escape(str(row["team"]))
-                    rep_to     = _html.escape(str(row["reported_to"]))
-                    sev_lbl    = _html.escape(str(row["severity"]))
-                    stat_lbl   = _html.escape(str(row["status"]))
-                    card = (
-                        f'<div class="circ-card">'
-                        f'<div class="circ-card-title">{desc}</div>'
-                        f'<div class="circ-card-meta">'
-                        f'<span class="card-team">{team}</span>'
-                        f'<span class="card-meta-item">&#128197;&nbsp;{date_str}</span>'
-                        f'<span class="card-meta-item">&#128228;&nbsp;{rep_to}</span>'
-                        f'<span class="pill pill-{sev_cls}">{sev_lbl}</span>'
-                        f'<span class="pill pill-{status_cls}">{stat_lbl}</span>'
-                        f'</div>'
-                        f'</div>'
-                    )
-                    st.markdown(card, unsafe_allow_html=True)
-
-            # ── Grouped expand/collapse by status ────────────────────────────
-            for status_label, default_open in [("Open", True), ("In Progress", True), ("Closed", False)]:
-                group = filt_circ[filt_circ["status"] == status_label].sort_values("severity")
-                if group.empty:
-                    continue
-                label = f"{status_label}  ({len(group)})"
-                with st.expander(label, expanded=default_open):
-                    render_circ_cards(group)
-
-        # ── Delete section ─────────────────────────────────────────────────────
-        if not df_circ.empty:
-            st.markdown('<p class="section-title" style="margin-top:24px">Delete Circular Items</p>', unsafe_allow_html=True)
-            circ_delete_options = {
-                f"[{i}] {row['team']} | {str(row['circular_description'])[:50]} | {row['status']}": i
-                for i, row in df_circ.iterrows()
-            }
-            circ_to_delete = st.multiselect(
-                "Select circular item(s) to delete (multi-select supported)",
-                options=list(circ_delete_options.keys()),
-                key="circ_delete_select"
-            )
-            if circ_to_delete:
-                if st.button("🗑 DELETE SELECTED CIRCULARS", key="circ_delete_btn", use_container_width=True):
-                    indices_to_drop = [circ_delete_options[k] for k in circ_to_delete]
-                    st.session_state["circ_data"] = df_circ.drop(index=indices_to_drop).reset_index(drop=True)
-                    save_circ(st.session_state["circ_data"])
-                    st.session_state["flash"] = ("success", f"{len(indices_to_drop)} circular item(s) deleted.")
-                    st.session_state["active_tab"] = "circ"
-                    st.rerun()
-
-    with col_cr:
-        # ── Log circular ──────────────────────────────────────────────────────
-        st.markdown('<p class="section-title">Log Circular Item</p>', unsafe_allow_html=True)
-
-        c_team  = st.selectbox("Team", CIRC_TEAMS, key="c_team")
-        c_desc  = st.text_area("Circular Description", height=90, key="c_desc",
-                                placeholder="Circular No / implementation detail…")
-        c_date  = st.date_input("Due Date", value=date.today(), key="c_date")
-        c_rep   = st.selectbox("Reported To", CIRC_REPORTED_TO, key="c_rep")
-        c_sev   = st.selectbox("Severity", SEVERITIES, key="c_sev")
-        c_stat  = st.selectbox("Status", STATUSES, key="c_stat")
-
-        if st.button("LOG CIRCULAR", key="circ_btn"):
-            if c_desc.strip():
-                new_row = {
-                    "team":                 c_team,
-                    "circular_description": c_desc.strip(),
-                    "due_date":             pd.Timestamp(c_date),
-                    "reported_to":          c_rep,
-                    "severity":             c_sev,
-                    "status":               c_stat,
-                }
-                st.session_state["circ_data"] = pd.concat(
-                    [st.session_state["circ_data"], pd.DataFrame([new_row])],
-                    ignore_index=True
-                )
-                save_circ(st.session_state["circ_data"])
-                st.session_state["flash"] = ("success", "Circular item logged.")
-                st.session_state["active_tab"] = "circ"
-                st.rerun()
+            if not len(circ_rows):
+                st.markdown('<div class="alert-bar alert-info">No circular implementation items match filters. Log one using the form →</div>', unsafe_allow_html=True)
             else:
-                st.error("Description cannot be empty.")
-
-        # ── Update circular status ────────────────────────────────────────────
-        if not df_circ.empty:
-            st.markdown('<p class="section-title" style="margin-top:24px">Update Circular Status</p>', unsafe_allow_html=True)
-            circ_descs = df_circ["circular_description"].str[:55].tolist()
-            sel_circ = st.selectbox("Select Circular", circ_descs, key="upd_circ_desc")
-            new_circ_status = st.selectbox("New Status", STATUSES, key="upd_circ_stat")
-            if st.button("UPDATE", key="upd_circ_btn"):
-                idx = df_circ[df_circ["circular_description"].str[:55] == sel_circ].index
-                if len(idx) > 0:
-                    st.session_state["circ_data"].loc[idx[0], "status"] = new_circ_status
-                    save_circ(st.session_state["circ_data"])
-                    st.session_state["flash"] = ("success", "Circular status updated.")
+                def render_circ_cards(df_group):
+                    st.markdown(_cached_rows_html("circ", df_group[CIRC_COLUMNS], _circ_cards_html),
+                                unsafe_allow_html=True)
+
+                # ── Grouped expand/collapse by status ────────────────────────────
+                circ_groups = status_groups(df_circ, circ_index, circ_rows, "severity")
+                for status_label, default_open in [("Open", True), ("In Progress", True), ("Closed", False)]:
+                    group = circ_groups[status_label]
+                    if not len(group):
+                        continue
+                    label = f"{status_label}  ({len(group)})"
+                    with st.expander(label, expanded=default_open):
+                        render_paged(df_circ, group, f"pg_circ_{status_label}", circ_page_size, render_circ_cards)
+
+            # ── Delete section ─────────────────────────────────────────────────────
+            if not df_circ.empty:
+                st.markdown('<p class="section-title" style="margin-top:24px">Delete Circular Items</p>', unsafe_allow_html=True)
+                circ_delete_options = record_labels(df_circ, "circular_description")
+                circ_to_delete = st.multiselect(
+                    "Select circular item(s) to delete (multi-select supported)",
+                    options=list(circ_delete_options),
+                    format_func=circ_delete_options.get,
+                    key="circ_delete_select"
+                )
+                if circ_to_delete:
+                    if st.button("🗑 DELETE SELECTED CIRCULARS", key="circ_delete_btn", width="stretch"):
+                        drop_records("circ_data", circ_to_delete)
+                        st.session_state["flash"] = save_flash(commit_edits("circ_data", "delete", circ_to_delete), f"{len(circ_to_delete)} circular item(s) deleted.")
+                        st.session_state["active_tab"] = "circ"
+                        st.rerun()
+
+        with col_cr:
+            # ── Log circular ──────────────────────────────────────────────────────
+            st.markdown('<p class="section-title">Log Circular Item</p>', unsafe_allow_html=True)
+
+            c_team  = st.selectbox("Team", CIRC_TEAMS, key="c_team")
+            c_desc  = st.text_area("Circular Description", height=90, key="c_desc",
+                                    placeholder="Circular No / implementation detail…")
+            c_date  = st.date_input("Due Date", value=date.today(), key="c_date")
+            c_rep   = st.selectbox("Reported To", CIRC_REPORTED_TO, key="c_rep")
+            c_sev   = st.selectbox("Severity", SEVERITIES, key="c_sev")
+            c_stat  = st.selectbox("Status", STATUSES, key="c_stat")
+
+            if st.button("LOG CIRCULAR", key="circ_btn"):
+                if c_desc.strip():
+                    new_row = {
+                        "team":                 c_team,
+                        "circular_description": c_desc.strip(),
+                        "due_date":             pd.Timestamp(c_date),
+                        "reported_to":          c_rep,
+                        "severity":             c_sev,
+                        "status":               c_stat,
+                    }
+                    new_id = add_record("circ_data", new_row, "circ")
+                    st.session_state["flash"] = save_flash(commit_edits("circ_data", "create", [new_id]), "Circular item logged.")
                     st.session_state["active_tab"] = "circ"
                     st.rerun()
-
-        # ── Bulk CSV Upload — Circulars ────────────────────────────────────────
-        st.markdown("""
-        <div class="bulk-panel bulk-panel-circ">
-            <div class="bulk-step bulk-step-circ"><b style="color:#aa66ff">BULK UPLOAD</b> · Circular Implementation CSV</div>
-        """, unsafe_allow_html=True)
-
-        st.markdown('<p class="section-title" style="margin-top:4px">Step 1 — Download Template</p>', unsafe_allow_html=True)
-        st.markdown("""
-        <div style="font-size:11px; color:#4a6080; margin-bottom:8px; font-family:'IBM Plex Mono',monospace;">
-            <span style="color:#aa66ff">★ Required columns:</span>
-            Team · Circular_No_description · Due_date · reported_to · severity · status<br>
-            <span style="color:#4a6080">team: DP | BROKING | EAGLE | COMPLIANCE<br>
-            severity: High | Medium | Low &nbsp;·&nbsp; status: Open | In Progress | Closed<br>
-            Date format: DD-MM-YYYY or YYYY-MM-DD</span>
-        </div>
-        """, unsafe_allow_html=True)
-
-        st.download_button(
-            "📥 Download Circular Template",
-            data=make_circ_template(),
-            file_name="DELTA_OPS_circular_template.csv",
-            mime="text/csv",
-            use_container_width=True,
-            key="dl_circ_tmpl"
-        )
-
-        st.markdown('<p class="section-title" style="margin-top:16px">Step 2 — Upload CSV</p>', unsafe_allow_html=True)
-
-        uploaded_circ = st.file_uploader(
-            "Upload Circular Items CSV",
-            type=["csv"],
-            key="bulk_circ_upload",
-        )
-
-        if uploaded_circ is not None:
-            circ_file_key = f"circ_imported_{uploaded_circ.name}_{uploaded_circ.size}"
-
-            try:
-                raw_circ = pd.read_csv(uploaded_circ)
-                st.markdown(
-                    f'<div class="upload-result upload-ok">📄 <b>{uploaded_circ.name}</b> &nbsp;·&nbsp; '
-                    f'<b>{len(raw_circ)}</b> rows detected</div>',
-                    unsafe_allow_html=True
-                )
-
-                with st.expander("👁 Preview uploaded rows", expanded=False):
-                    st.dataframe(raw_circ.head(10), use_container_width=True)
-
-                clean_circ, errs_circ = validate_circ_bulk(raw_circ)
-
-                if errs_circ:
-                    for e in errs_circ:
-                        st.markdown(f'<div class="upload-result upload-err">❌ {e}</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="upload-result upload-warn">⚠ No data saved. Fix errors and re-upload.</div>', unsafe_allow_html=True)
                 else:
-                    st.markdown(
-                        f'<div class="upload-result upload-ok">✅ Validation passed — '
-                        f'<b>{len(clean_circ)}</b> circular items ready to import</div>',
-                        unsafe_allow_html=True
-                    )
+                    st.error("Description cannot be empty.")
 
-                    with st.expander("✅ Preview validated data", expanded=False):
-                        st.dataframe(clean_circ, use_container_width=True)
+            # ── Update circular status ────────────────────────────────────────────
+            if not df_circ.empty:
+                st.markdown('<p class="section-title" style="margin-top:24px">Update Circular Status</p>', unsafe_allow_html=True)
+                circ_descs = dict(zip(df_circ[ID_COL], df_circ["circular_description"].astype(str).str[:55]))
+                sel_circ = st.selectbox("Select Circular", list(circ_descs), format_func=circ_descs.get, key="upd_circ_desc")
+                new_circ_status = st.selectbox("New Status", STATUSES, key="upd_circ_stat")
+                if st.button("UPDATE", key="upd_circ_btn"):
+                    if set_record_status("circ_data", sel_circ, new_circ_status):
+                        st.session_state["flash"] = save_flash(commit_edits("circ_data", "status", [sel_circ]), "Circular status updated.")
+                        st.session_state["active_tab"] = "circ"
+                        st.rerun()
+                    else:
+                        st.session_state["flash"] = ("error", "That circular item no longer exists — it was changed or removed in another session.")
+                        st.session_state["active_tab"] = "circ"
+                        st.rerun()
+
+            # ── Bulk CSV Upload — Circulars ────────────────────────────────────────
+            st.markdown("""
+            <div class="bulk-panel bulk-panel-circ">
+                <div class="bulk-step bulk-step-circ"><b style="color:#aa66ff">BULK UPLOAD</b> · Circular Implementation CSV</div>
+            """, unsafe_allow_html=True)
+
+            st.markdown('<p class="section-title" style="margin-top:4px">Step 1 — Download Template</p>', unsafe_allow_html=True)
+            st.markdown("""
+            <div style="font-size:11px; color:#4a6080; margin-bottom:8px; font-family:'IBM Plex Mono',monospace;">
+                <span style="color:#aa66ff">★ Required columns:</span>
+                Team · Circular_No_description · Due_date · reported_to · severity · status<br>
+                <span style="color:#4a6080">team: DP | BROKING | EAGLE | COMPLIANCE<br>
+                severity: High | Medium | Low &nbsp;·&nbsp; status: Open | In Progress | Closed<br>
+                Date format: DD-MM-YYYY or YYYY-MM-DD</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+            st.download_button(
+                "📥 Download Circular Template",
+                data=make_circ_template(),
+                file_name="DELTA_OPS_circular_template.csv",
+                mime="text/csv",
+                width="stretch",
+                key="dl_circ_tmpl"
+            )
 
-                    st.markdown('<p class="section-title" style="margin-top:12px">Step 3 — Import Mode</p>', unsafe_allow_html=True)
+            st.markdown('<p class="section-title" style="margin-top:16px">Step 2 — Upload CSV</p>', unsafe_allow_html=True)
 
-                    circ_mode = st.radio(
-                        "Import mode",
-                        ["Append — add to existing", "Replace — clear all and import fresh"],
-                        key="circ_import_mode",
-                        index=0
-                    )
+            uploaded_circ = st.file_uploader(
+                "Upload Circular Items CSV",
+                type=["csv"],
+                key="bulk_circ_upload",
+            )
+
+            if uploaded_circ is not None:
+                circ_file_key = f"circ_imported_{uploaded_circ.name}_{uploaded_circ.size}"
 
-                    if "Replace" in circ_mode:
-                        st.markdown('<div class="upload-result upload-warn">⚠ Replace will permanently delete ALL current circular data.</div>', unsafe_allow_html=True)
+                try:
+                    n_circ_rows, errs_circ, clean_circ = render_upload_check(uploaded_circ, circ_file_key, "circ")
 
-                    already_imported_circ = st.session_state.get(circ_file_key, False)
-                    if already_imported_circ:
-                        st.markdown('<div class="upload-result upload-ok">✅ This file has already been imported. Upload a new file to import again.</div>', unsafe_allow_html=True)
+                    if errs_circ:
+                        st.markdown('<div class="upload-result upload-warn">⚠ No data saved. Fix errors and re-upload.</div>', unsafe_allow_html=True)
                     else:
-                        if st.button("💾 CONFIRM IMPORT", key="circ_confirm_import", use_container_width=True):
-                            existing_circ = st.session_state["circ_data"]
-                            if "Replace" in circ_mode:
-                                merged_circ = clean_circ.copy()
-                            else:
-                                merged_circ = pd.concat([existing_circ, clean_circ], ignore_index=True)
-                            st.session_state["circ_data"] = merged_circ
-                            save_circ(merged_circ)
-                            st.session_state[circ_file_key] = True  # mark as imported
-                            st.session_state["flash"] = (
-                                "success",
-                                f"{len(clean_circ)} circular items imported ({'replaced' if 'Replace' in circ_mode else 'appended'}). Total: {len(merged_circ)} rows."
-                            )
-                            st.session_state["active_tab"] = "circ"
-                            st.rerun()
-
-            except Exception as e:
-                st.markdown(f'<div class="upload-result upload-err">❌ Cannot read file: {e}</div>', unsafe_allow_html=True)
+                        st.markdown(
+                            f'<div class="upload-result upload-ok">✅ Validation passed — '
+                            f'<b>{n_circ_rows}</b> circular items ready to import</div>',
+                            unsafe_allow_html=True
+                        )
+
+                        with st.expander("✅ Preview validated data", expanded=False):
+                            st.dataframe(clean_circ, width="stretch")
+
+                        st.markdown('<p class="section-title" style="margin-top:12px">Step 3 — Import Mode</p>', unsafe_allow_html=True)
+
+                        circ_mode = st.radio(
+                            "Import mode",
+                            ["Append — add to existing", "Replace — clear all and import fresh"],
+                            key="circ_import_mode",
+                            index=0
+                        )
+
+                        if "Replace" in circ_mode:
+                            st.markdown('<div class="upload-result upload-warn">⚠ Replace will permanently delete ALL current circular data.</div>', unsafe_allow_html=True)
+
+                        already_imported_circ = st.session_state.get(circ_file_key, False)
+                        if already_imported_circ:
+                            st.markdown('<div class="upload-result upload-ok">✅ This file has already been imported. Upload a new file to import again.</div>', unsafe_allow_html=True)
+                        else:
+                            if st.button("💾 CONFIRM IMPORT", key="circ_confirm_import", width="stretch"):
+                                n_imported, n_total = import_upload(
+                                    "circ", uploaded_circ, replace="Replace" in circ_mode, checked=True)
+                                st.session_state[circ_file_key] = True  # mark as imported
+                                st.session_state["flash"] = (
+                                    "success",
+                                    f"{n_imported} circular items imported ({'replaced' if 'Replace' in circ_mode else 'appended'}). Total: {n_total} rows."
+                                )
+                                st.session_state["active_tab"] = "circ"
+                                st.rerun()
+
+                except Exception as e:
+                    st.markdown(f'<div class="upload-result upload-err">❌ Cannot read file: {e}</div>', unsafe_allow_html=True)
+
+            st.markdown('</div>', unsafe_allow_html=True)
 
         st.markdown('</div>', unsafe_allow_html=True)
 
-    st.markdown('</div>', unsafe_allow_html=True)
-
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  TAB 4 — TASK REMINDERS
 # ══════════════════════════════════════════════════════════════════════════════
-with tab4:
-    st.markdown('<div class="tab-body">', unsafe_allow_html=True)
-    if st.session_state.get("active_tab") == "task":
-        show_flash()
-        st.session_state["active_tab"] = None
-
-    today_ts4 = pd.Timestamp(date.today())
-
-    col_tl, col_tr = st.columns([2, 1])
-
-    with col_tl:
-        st.markdown('<p class="section-title">Filter</p>', unsafe_allow_html=True)
-        tf1, tf2, tf3, tf4f = st.columns(4)
-        with tf1:
-            t_sel_team = st.multiselect("Team", options=TASK_TEAMS, default=[], key="tf_team")
-        with tf2:
-            t_sel_task = st.multiselect("Task Type", options=TASK_TYPES, default=[], key="tf_task")
-        with tf3:
-            t_sel_sev = st.multiselect("Severity", options=SEVERITIES, default=[], key="tf_sev")
-        with tf4f:
-            t_sel_stat = st.multiselect("Status", options=STATUSES, default=[], key="tf_stat")
-
-        filt_task = df_task.copy()
-        if t_sel_team:  filt_task = filt_task[filt_task["team"].isin(t_sel_team)]
-        if t_sel_task:  filt_task = filt_task[filt_task["task"].isin(t_sel_task)]
-        if t_sel_sev:   filt_task = filt_task[filt_task["severity"].isin(t_sel_sev)]
-        if t_sel_stat:  filt_task = filt_task[filt_task["status"].isin(t_sel_stat)]
-
-        if not filt_task.empty:
-            filt_task = filt_task.copy()
-            filt_task["_sort_key"] = filt_task["due_date"].fillna(pd.Timestamp("2099-01-01"))
-            filt_task = filt_task.sort_values("_sort_key")
-
-        task_title_col, task_export_col = st.columns([3, 1])
-        with task_title_col:
-            st.markdown('<p class="section-title">Task Reminders</p>', unsafe_allow_html=True)
-        with task_export_col:
-            if not filt_task.empty:
-                exp_task = filt_task.drop(columns=["_sort_key"], errors="ignore").copy()
-                exp_task["due_date"] = pd.to_datetime(exp_task["due_date"], errors="coerce").dt.strftime("%d-%m-%Y")
+if tab4.open:
+    with tab4:
+        st.markdown('<div class="tab-body">', unsafe_allow_html=True)
+        df_task = session_data("task")
+        if st.session_state.get("active_tab") == "task":
+            show_flash()
+            st.session_state["active_tab"] = None
+
+        col_tl, col_tr = st.columns([2, 1])
+
+        with col_tl:
+            st.markdown('<p class="section-title">Filter</p>', unsafe_allow_html=True)
+            tf1, tf2, tf3, tf4f, tf5 = st.columns([1, 1, 1, 1, 0.6])
+            with tf1:
+                t_sel_team = st.multiselect("Team", options=TASK_TEAMS, default=[], key="tf_team")
+            with tf2:
+                t_sel_task = st.multiselect("Task Type", options=TASK_TYPES, default=[], key="tf_task")
+            with tf3:
+                t_sel_sev = st.multiselect("Severity", options=SEVERITIES, default=[], key="tf_sev")
+            with tf4f:
+                t_sel_stat = st.multiselect("Status", options=STATUSES, default=[], key="tf_stat")
+            with tf5:
+                task_page_size = st.selectbox("Rows / page", PAGE_SIZES, index=1, key="tf_page_size")
+
+            task_index = session_index("task_data")
+            task_rows = filter_rows(task_index, {"team": t_sel_team, "task": t_sel_task,
+                                                 "severity": t_sel_sev, "status": t_sel_stat})
+
+            task_title_col, task_export_col = st.columns([3, 1])
+            with task_title_col:
+                st.markdown('<p class="section-title">Task Reminders</p>', unsafe_allow_html=True)
+            with task_export_col:
+                if len(task_rows):
+                    st.download_button(
+                        "📤 Export",
+                        data=partial(export_csv, df_task, task_rows, "due_date"),
+                        file_name=f"DELTA_OPS_tasks_{date.today().strftime('%d%m%Y')}.csv",
+                        mime="text/csv",
+                        key="export_task_filtered",
+                        width="stretch",
+                    )
                 st.download_button(
-                    "📤 Export",
-                    data=exp_task.to_csv(index=False).encode(),
-                    file_name=f"DELTA_OPS_tasks_{date.today().strftime('%d%m%Y')}.csv",
+                    "🕘 History",
+                    data=lambda: journal_frame("task").to_csv(index=False).encode(),
+                    file_name=f"DELTA_OPS_tasks_history_{date.today().strftime('%d%m%Y')}.csv",
                     mime="text/csv",
-                    key="export_task_filtered",
-                    use_container_width=True,
+                    key="history_task",
+                    width="stretch",
                 )
 
-        if filt_task.empty:
-            st.markdown('<div class="alert-bar alert-info">No tasks match current filters. Add one using the form →</div>', unsafe_allow_html=True)
-        else:
-            def render_task_cards(df_group):
-                today_d = date.today()
-                for _, row in df_group.iterrows():
-                    due        = row["due_date"]
-                    due_str    = due.strftime("%d %b %Y") if pd.notna(due) else "—"
-                    is_closed  = str(row["status"]).strip().lower() == "closed"
-                    is_overdue = pd.notna(due) and due.date() < today_d and not is_closed
-                    is_today   = pd.notna(due) and due.date() == today_d and not is_closed
-
-                    if is_closed:
-                        card_cls = "task-card done"
-                    elif is_overdue:
-                        card_cls = "task-card overdue"
-                    elif is_today:
-                        card_cls = "task-card due-today"
-                    else:
-                        card_cls = "task-card"
-
-                    if is_overdue:
-                        urgency = '<span class="task-badge overdue-badge">OVERDUE</span>'
-                    elif is_today:
-                        urgency = '<span class="task-badge today-badge">DUE TODAY</span>'
-                    else:
-                        days_left = (due.date() - today_d).days if pd.notna(due) else None
-                        if days_left is not None and 0 < days_left <= 3 and not is_closed:
-                            urgency = f'<span class="task-badge today-badge">DUE IN {days_left}D</span>'
-                        else:
-                            urgency = ""
-
-                    sev_cls    = {"High": "high", "Medium": "medium", "Low": "low"}.get(str(row["severity"]), "low")
-                    status_cls = {"Open": "open", "In Progress": "inprogress", "Closed": "closed"}.get(str(row["status"]), "closed")
-
-                    # Safely escape all user data
-                    desc      = _html.escape(str(row["issue_description"]))
-                    team      = _html.escape(str(row["team"]))
-                    task_type = _html.escape(str(row["task"]))
-                    sev_lbl   = _html.escape(str(row["severity"]))
-                    stat_lbl  = _html.escape(str(row["status"]))
-
-                    card = (
-                        f'<div class="{card_cls}">'
-                        f'<div class="task-card-title">{desc}</div>'
-                        f'<div class="task-card-meta">'
-                        f'<span class="card-team">{team}</span>'
-                        f'<span class="task-badge">{task_type}</span>'
-                        f'<span class="card-meta-item">&#128197;&nbsp;Due:&nbsp;{due_str}</span>'
-                        f'<span class="pill pill-{sev_cls}">{sev_lbl}</span>'
-                        f'<span class="pill pill-{status_cls}">{stat_lbl}</span>'
-                        f'{urgency}'
-                        f'</div>'
-                        f'</div>'
-                    )
-                    st.markdown(card, unsafe_allow_html=True)
-
-            # ── Grouped expand/collapse by status (same pattern as circular) ──
-            for status_label, default_open in [("Open", True), ("In Progress", True), ("Closed", False)]:
-                group = filt_task[filt_task["status"] == status_label].copy()
-                if "_sort_key" in group.columns:
-                    group = group.sort_values("_sort_key")
-                if group.empty:
-                    continue
-                label = f"{status_label}  ({len(group)})"
-                with st.expander(label, expanded=default_open):
-                    render_task_cards(group)
-
-        # ── Delete section ─────────────────────────────────────────────────────
-        if not df_task.empty:
-            st.markdown('<p class="section-title" style="margin-top:24px">Delete Tasks</p>', unsafe_allow_html=True)
-            task_delete_options = {
-                f"[{i}] {row['team']} | {str(row['issue_description'])[:50]} | {row['status']}": i
-                for i, row in df_task.iterrows()
-            }
-            tasks_to_delete = st.multiselect(
-                "Select task(s) to delete (multi-select supported)",
-                options=list(task_delete_options.keys()),
-                key="task_delete_select"
-            )
-            if tasks_to_delete:
-                if st.button("🗑 DELETE SELECTED TASKS", key="task_delete_btn", use_container_width=True):
-                    indices_to_drop = [task_delete_options[k] for k in tasks_to_delete]
-                    st.session_state["task_data"] = df_task.drop(index=indices_to_drop).reset_index(drop=True)
-                    save_task(st.session_state["task_data"])
-                    st.session_state["flash"] = ("success", f"{len(indices_to_drop)} task(s) deleted.")
-                    st.session_state["active_tab"] = "task"
-                    st.rerun()
-
-
-
-    with col_tr:
-        st.markdown('<p class="section-title">Add Task Reminder</p>', unsafe_allow_html=True)
-
-        t_team = st.selectbox("Team", TASK_TEAMS, key="t_team")
-        t_desc = st.text_area("Description", height=80, key="t_desc",
-                               placeholder="What needs to be done...")
-        t_due  = st.date_input("Due Date", value=date.today(), key="t_due")
-        t_type = st.selectbox("Task Type", TASK_TYPES, key="t_type")
-        t_sev  = st.selectbox("Severity", SEVERITIES, key="t_sev")
-        t_stat = st.selectbox("Status", STATUSES, key="t_stat")
-
-        if st.button("ADD TASK", key="task_add_btn"):
-            if t_desc.strip():
-                new_task = {
-                    "team":              t_team,
-                    "issue_description": t_desc.strip(),
-                    "due_date":          pd.Timestamp(t_due),
-                    "task":              t_type,
-                    "severity":          t_sev,
-                    "status":            t_stat,
-                }
-                st.session_state["task_data"] = pd.concat(
-                    [st.session_state["task_data"], pd.DataFrame([new_task])],
-                    ignore_index=True
-                )
-                save_task(st.session_state["task_data"])
-                st.session_state["flash"] = ("success", "Task reminder added.")
-                st.session_state["active_tab"] = "task"
-                st.rerun()
+            if not len(task_rows):
+                st.markdown('<div class="alert-bar alert-info">No tasks match current filters. Add one using the form →</div>', unsafe_allow_html=True)
             else:
-                st.error("Description cannot be empty.")
-
-        if not df_task.empty:
-            st.markdown('<p class="section-title" style="margin-top:24px">Update Task Status</p>', unsafe_allow_html=True)
-            task_descs = df_task["issue_description"].str[:50].tolist()
-            sel_task_desc = st.selectbox("Select Task", task_descs, key="upd_task_desc")
-            new_task_status = st.selectbox("New Status", STATUSES, key="upd_task_stat")
-            if st.button("UPDATE", key="upd_task_btn"):
-                idx = df_task[df_task["issue_description"].str[:50] == sel_task_desc].index
-                if len(idx) > 0:
-                    st.session_state["task_data"].loc[idx[0], "status"] = new_task_status
-                    save_task(st.session_state["task_data"])
-                    st.session_state["flash"] = ("success", "Task status updated.")
+                def render_task_cards(df_group):
+                    # The urgency columns are part of the row hash: fragments turn over with them
+                    st.markdown(_cached_rows_html("task", df_group[TASK_COLUMNS + URGENCY_COLS], _task_cards_html),
+                                unsafe_allow_html=True)
+
+                # ── Grouped expand/collapse by status (same pattern as circular) ──
+                task_groups = status_groups(df_task, task_index, task_rows, "due_date")
+                for status_label, default_open in [("Open", True), ("In Progress", True), ("Closed", False)]:
+                    group = task_groups[status_label]
+                    if not len(group):
+                        continue
+                    label = f"{status_label}  ({len(group)})"
+                    with st.expander(label, expanded=default_open):
+                        render_paged(df_task, group, f"pg_task_{status_label}", task_page_size, render_task_cards)
+
+            # ── Delete section ─────────────────────────────────────────────────────
+            if not df_task.empty:
+                st.markdown('<p class="section-title" style="margin-top:24px">Delete Tasks</p>', unsafe_allow_html=True)
+                task_delete_options = record_labels(df_task, "issue_description")
+                tasks_to_delete = st.multiselect(
+                    "Select task(s) to delete (multi-select supported)",
+                    options=list(task_delete_options),
+                    format_func=task_delete_options.get,
+                    key="task_delete_select"
+                )
+                if tasks_to_delete:
+                    if st.button("🗑 DELETE SELECTED TASKS", key="task_delete_btn", width="stretch"):
+                        drop_records("task_data", tasks_to_delete)
+                        st.session_state["flash"] = save_flash(commit_edits("task_data", "delete", tasks_to_delete), f"{len(tasks_to_delete)} task(s) deleted.")
+                        st.session_state["active_tab"] = "task"
+                        st.rerun()
+
+
+
+        with col_tr:
+            st.markdown('<p class="section-title">Add Task Reminder</p>', unsafe_allow_html=True)
+
+            t_team = st.selectbox("Team", TASK_TEAMS, key="t_team")
+            t_desc = st.text_area("Description", height=80, key="t_desc",
+                                   placeholder="What needs to be done...")
+            t_due  = st.date_input("Due Date", value=date.today(), key="t_due")
+            t_type = st.selectbox("Task Type", TASK_TYPES, key="t_type")
+            t_sev  = st.selectbox("Severity", SEVERITIES, key="t_sev")
+            t_stat = st.selectbox("Status", STATUSES, key="t_stat")
+
+            if st.button("ADD TASK", key="task_add_btn"):
+                if t_desc.strip():
+                    new_task = {
+                        "team":              t_team,
+                        "issue_description": t_desc.strip(),
+                        "due_date":          pd.Timestamp(t_due),
+                        "task":              t_type,
+                        "severity":          t_sev,
+                        "status":            t_stat,
+                    }
+                    new_id = add_record("task_data", new_task, "task")
+                    st.session_state["flash"] = save_flash(commit_edits("task_data", "create", [new_id]), "Task reminder added.")
                     st.session_state["active_tab"] = "task"
                     st.rerun()
-
-        st.markdown("""
-        <div class="bulk-panel bulk-panel-task">
-            <div class="bulk-step"><b style="color:#ff9933">BULK UPLOAD</b> &middot; Task Reminders CSV</div>
-        """, unsafe_allow_html=True)
-
-        st.markdown('<p class="section-title" style="margin-top:4px">Step 1 &mdash; Download Template</p>', unsafe_allow_html=True)
-        st.markdown("""
-        <div style="font-size:11px; color:#4a6080; margin-bottom:8px; font-family:'IBM Plex Mono',monospace;">
-            <span style="color:#ff9933">Required columns:</span>
-            team &middot; issue_description &middot; Due Date &middot; Task &middot; severity &middot; status<br>
-            <span style="color:#4a6080">team: DP | BROKING | EAGLE | COMPLIANCE<br>
-            severity: High | Medium | Low &nbsp;&middot;&nbsp; status: Open | In Progress | Closed<br>
-            Date format: DD-MM-YYYY or YYYY-MM-DD</span>
-        </div>
-        """, unsafe_allow_html=True)
-
-        st.download_button(
-            "Download Task Template",
-            data=make_task_template(),
-            file_name="DELTA_OPS_task_template.csv",
-            mime="text/csv",
-            use_container_width=True,
-            key="dl_task_tmpl"
-        )
-
-        st.markdown('<p class="section-title" style="margin-top:16px">Step 2 &mdash; Upload CSV</p>', unsafe_allow_html=True)
-
-        uploaded_task = st.file_uploader(
-            "Upload Task Reminders CSV",
-            type=["csv"],
-            key="bulk_task_upload",
-        )
-
-        if uploaded_task is not None:
-            task_file_key = f"task_imported_{uploaded_task.name}_{uploaded_task.size}"
-            try:
-                raw_task = pd.read_csv(uploaded_task)
-                st.markdown(
-                    f'<div class="upload-result upload-ok">File: <b>{uploaded_task.name}</b> &nbsp;&middot;&nbsp; '
-                    f'<b>{len(raw_task)}</b> rows detected</div>',
-                    unsafe_allow_html=True
-                )
-
-                with st.expander("Preview uploaded rows", expanded=False):
-                    st.dataframe(raw_task.head(10), use_container_width=True)
-
-                clean_task, errs_task = validate_task_bulk(raw_task)
-
-                if errs_task:
-                    for e in errs_task:
-                        st.markdown(f'<div class="upload-result upload-err">Error: {e}</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="upload-result upload-warn">No data saved. Fix errors and re-upload.</div>', unsafe_allow_html=True)
                 else:
-                    st.markdown(
-                        f'<div class="upload-result upload-ok">Validation passed: '
-                        f'<b>{len(clean_task)}</b> tasks ready to import</div>',
-                        unsafe_allow_html=True
-                    )
+                    st.error("Description cannot be empty.")
 
-                    with st.expander("Preview validated data", expanded=False):
-                        st.dataframe(clean_task, use_container_width=True)
+            if not df_task.empty:
+                st.markdown('<p class="section-title" style="margin-top:24px">Update Task Status</p>', unsafe_allow_html=True)
+                task_descs = dict(zip(df_task[ID_COL], df_task["issue_description"].astype(str).str[:50]))
+                sel_task_desc = st.selectbox("Select Task", list(task_descs), format_func=task_descs.get, key="upd_task_desc")
+                new_task_status = st.selectbox("New Status", STATUSES, key="upd_task_stat")
+                if st.button("UPDATE", key="upd_task_btn"):
+                    if set_record_status("task_data", sel_task_desc, new_task_status):
+                        st.session_state["flash"] = save_flash(commit_edits("task_data", "status", [sel_task_desc]), "Task status updated.")
+                        st.session_state["active_tab"] = "task"
+                        st.rerun()
+                    else:
+                        st.session_state["flash"] = ("error", "That task no longer exists — it was changed or removed in another session.")
+                        st.session_state["active_tab"] = "task"
+                        st.rerun()
+
+            st.markdown("""
+            <div class="bulk-panel bulk-panel-task">
+                <div class="bulk-step"><b style="color:#ff9933">BULK UPLOAD</b> &middot; Task Reminders CSV</div>
+            """, unsafe_allow_html=True)
+
+            st.markdown('<p class="section-title" style="margin-top:4px">Step 1 &mdash; Download Template</p>', unsafe_allow_html=True)
+            st.markdown("""
+            <div style="font-size:11px; color:#4a6080; margin-bottom:8px; font-family:'IBM Plex Mono',monospace;">
+                <span style="color:#ff9933">Required columns:</span>
+                team &middot; issue_description &middot; Due Date &middot; Task &middot; severity &middot; status<br>
+                <span style="color:#4a6080">team: DP | BROKING | EAGLE | COMPLIANCE<br>
+                severity: High | Medium | Low &nbsp;&middot;&nbsp; status: Open | In Progress | Closed<br>
+                Date format: DD-MM-YYYY or YYYY-MM-DD</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+            st.download_button(
+                "Download Task Template",
+                data=make_task_template(),
+                file_name="DELTA_OPS_task_template.csv",
+                mime="text/csv",
+                width="stretch",
+                key="dl_task_tmpl"
+            )
 
-                    st.markdown('<p class="section-title" style="margin-top:12px">Step 3 &mdash; Import Mode</p>', unsafe_allow_html=True)
+            st.markdown('<p class="section-title" style="margin-top:16px">Step 2 &mdash; Upload CSV</p>', unsafe_allow_html=True)
 
-                    task_mode = st.radio(
-                        "Import mode",
-                        ["Append - add to existing", "Replace - clear all and import fresh"],
-                        key="task_import_mode",
-                        index=0
-                    )
+            uploaded_task = st.file_uploader(
+                "Upload Task Reminders CSV",
+                type=["csv"],
+                key="bulk_task_upload",
+            )
 
-                    if "Replace" in task_mode:
-                        st.markdown('<div class="upload-result upload-warn">Replace will permanently delete ALL current task data.</div>', unsafe_allow_html=True)
+            if uploaded_task is not None:
+                task_file_key = f"task_imported_{uploaded_task.name}_{uploaded_task.size}"
+                try:
+                    n_task_rows, errs_task, clean_task = render_upload_check(uploaded_task, task_file_key, "task", plain=True)
 
-                    already_imported_task = st.session_state.get(task_file_key, False)
-                    if already_imported_task:
-                        st.markdown('<div class="upload-result upload-ok">This file has already been imported. Upload a new file to import again.</div>', unsafe_allow_html=True)
+                    if errs_task:
+                        st.markdown('<div class="upload-result upload-warn">No data saved. Fix errors and re-upload.</div>', unsafe_allow_html=True)
                     else:
-                        if st.button("CONFIRM IMPORT", key="task_confirm_import", use_container_width=True):
-                            existing_task = st.session_state["task_data"]
-                            if "Replace" in task_mode:
-                                merged_task = clean_task.copy()
-                            else:
-                                merged_task = pd.concat([existing_task, clean_task], ignore_index=True)
-                            st.session_state["task_data"] = merged_task
-                            save_task(merged_task)
-                            st.session_state[task_file_key] = True
-                            st.session_state["flash"] = (
-                                "success",
-                                f"{len(clean_task)} tasks imported ({'replaced' if 'Replace' in task_mode else 'appended'}). Total: {len(merged_task)} rows."
-                            )
-                            st.session_state["active_tab"] = "task"
-                            st.rerun()
-
-            except Exception as e:
-                st.markdown(f'<div class="upload-result upload-err">Cannot read file: {e}</div>', unsafe_allow_html=True)
+                        st.markdown(
+                            f'<div class="upload-result upload-ok">Validation passed: '
+                            f'<b>{n_task_rows}</b> tasks ready to import</div>',
+                            unsafe_allow_html=True
+                        )
+
+                        with st.expander("Preview validated data", expanded=False):
+                            st.dataframe(clean_task, width="stretch")
+
+                        st.markdown('<p class="section-title" style="margin-top:12px">Step 3 &mdash; Import Mode</p>', unsafe_allow_html=True)
+
+                        task_mode = st.radio(
+                            "Import mode",
+                            ["Append - add to existing", "Replace - clear all and import fresh"],
+                            key="task_import_mode",
+                            index=0
+                        )
+
+                        if "Replace" in task_mode:
+                            st.markdown('<div class="upload-result upload-warn">Replace will permanently delete ALL current task data.</div>', unsafe_allow_html=True)
+
+                        already_imported_task = st.session_state.get(task_file_key, False)
+                        if already_imported_task:
+                            st.markdown('<div class="upload-result upload-ok">This file has already been imported. Upload a new file to import again.</div>', unsafe_allow_html=True)
+                        else:
+                            if st.button("CONFIRM IMPORT", key="task_confirm_import", width="stretch"):
+                                n_imported, n_total = import_upload(
+                                    "task", uploaded_task, replace="Replace" in task_mode, checked=True)
+                                st.session_state[task_file_key] = True
+                                st.session_state["flash"] = (
+                                    "success",
+                                    f"{n_imported} tasks imported ({'replaced' if 'Replace' in task_mode else 'appended'}). Total: {n_total} rows."
+                                )
+                                st.session_state["active_tab"] = "task"
+                                st.rerun()
+
+                except Exception as e:
+                    st.markdown(f'<div class="upload-result upload-err">Cannot read file: {e}</div>', unsafe_allow_html=True)
+
+            st.markdown('</div>', unsafe_allow_html=True)
 
         st.markdown('</div>', unsafe_allow_html=True)
 
-    st.markdown('</div>', unsafe_allow_html=True)
+if PROFILE_STARTUP:
+    report_startup_profile(next((label for label, tab in zip(TAB_LABELS, (tab1, tab2, tab3, tab4)) if tab.open),
+                                "none"))
@@ -0,0 +1,22 @@
+import os
+import runpy
+import shutil
+from types import SimpleNamespace
+
+import pytest
+from streamlit import config, logger
+
+
+@pytest.fixture(scope="session")
+def delta(tmp_path_factory):
+    """
+    delta_ops, run in Streamlit's bare mode from a copy in a temporary
+    directory, so its local store (DELTA_OPS.db, CSV fallbacks) lives there
+    and not next to the real app. Importing the module renders the page
+    once, with no Google Sheets configured.
+    """
+    app_dir = tmp_path_factory.mktemp("app")
+    shutil.copy(os.path.join(os.path.dirname(__file__), os.pardir, "delta_ops.py"), app_dir)
+    config.set_option("logger.level", "error")
+    logger.set_log_level("error")
+    return SimpleNamespace(**runpy.run_path(str(app_dir / "delta_ops.py"), run_name="delta_ops"))
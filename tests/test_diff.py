@@ -0,0 +1,109 @@
+import random
+
+import pandas as pd
+
+
+def _apply(old_rows, new_rows, script):
+    """Rebuild the new rows from the old ones and an edit script (old-row order)."""
+    updates = {op[1]: new_rows[op[2]] for op in script if op[0] == "update"}
+    inserts = {op[1]: op[2] for op in script if op[0] == "insert"}
+    deleted = {i for op in script if op[0] == "delete" for i in range(op[1], op[2])}
+    rows = []
+    for i, row in enumerate(old_rows):
+        rows += inserts.get(i, [])
+        if i not in deleted:
+            rows.append(updates.get(i, row))
+    return rows + inserts.get(len(old_rows), [])
+
+
+A, B, C, X = ("r1", "a", "Open"), ("r2", "b", "Open"), ("r3", "c", "Open"), ("r9", "x", "Open")
+
+
+def test_diff_rows_mid_list_insert(delta):
+    assert delta._diff_rows([A, B, C], [A, X, B, C]) == [("insert", 1, [X])]
+
+
+def test_diff_rows_update_names_changed_cells(delta):
+    edited = ("r2", "b", "Closed")
+    assert delta._diff_rows([A, B, C], [A, edited, C]) == [("update", 1, 1, [2])]
+
+
+def test_diff_rows_delete_and_append(delta):
+    script = delta._diff_rows([A, B, C], [A, C, X])
+    assert _apply([A, B, C], [A, C, X], script) == [A, C, X]
+
+
+def test_merge_rows_keeps_both_sides_changes(delta):
+    base = [A, B]
+    ours = [("r1", "a2", "Open"), B, X]     # edit a description, add a record
+    theirs = [("r1", "a", "Closed")]        # close r1, delete r2
+    rows, conflicts = delta._merge_rows(base, ours, theirs, 0)
+    assert rows == [("r1", "a2", "Closed"), X]
+    assert conflicts == []
+
+
+def test_merge_rows_same_record_conflict_theirs_wins(delta):
+    base = [A, B]
+    ours = [("r1", "a", "In Progress"), B]
+    theirs = [("r1", "a", "Closed"), B]
+    rows, conflicts = delta._merge_rows(base, ours, theirs, 0)
+    assert rows == theirs
+    assert conflicts == [("r1", 2, "In Progress", "Closed")]
+
+
+def test_merge_rows_edit_of_deleted_record_conflicts(delta):
+    ours = [A, ("r2", "b", "Closed")]
+    rows, conflicts = delta._merge_rows([A, B], ours, [A], 0)
+    assert rows == [A]
+    assert conflicts == [("r2", None, ("r2", "b", "Closed"), None)]
+
+
+def test_diff_records_mid_list_insert(delta):
+    assert delta._diff_records([A, B, C], [A, X, B, C], 0) == [("insert", 1, [X])]
+
+
+def test_diff_records_matches_on_id(delta):
+    # r2 goes and r3 changes: an update of r3, not a rewrite of two rows
+    edited = ("r3", "c", "Closed")
+    assert delta._diff_records([A, B, C], [A, edited], 0) == [("delete", 1, 2), ("update", 2, 1, [2])]
+
+
+def test_diff_records_none_without_usable_ids(delta):
+    assert delta._diff_records([A, B], [B, A], 0) is None                 # reordered
+    assert delta._diff_records([A, A], [A], 0) is None                    # repeated id
+    assert delta._diff_records([A, ("", "z", "Open")], [A], 0) is None    # blank id
+
+
+def test_diff_records_rebuilds_random_edits(delta):
+    rng = random.Random(6)
+    for _ in range(200):
+        old = [(f"r{i}", rng.choice("abc"), "Open") for i in range(rng.randint(0, 12))]
+        new, next_id = [], 100
+        for row in old:
+            roll = rng.random()
+            if roll < 0.2:
+                continue
+            if roll < 0.4:
+                row = (row[0], row[1], "Closed")
+            new.append(row)
+            if rng.random() < 0.2:
+                new.append((f"r{next_id}", "n", "Open"))
+                next_id += 1
+        script = delta._diff_records(old, new, 0)
+        assert _apply(old, new, script) == new
+
+
+def test_sqlite_write_mid_list_insert_round_trip(delta):
+    table, columns, date_cols = delta.SQL_DATASETS["circ"]
+    df = pd.DataFrame({
+        "team": ["DP", "DP", "EAGLE"], "circular_description": ["c1", "c2", "c3"],
+        "due_date": pd.to_datetime(["2026-01-05", None, "2026-02-01"]),
+        "reported_to": ["", "", ""], "severity": ["High", "Low", "Low"],
+        "status": ["Open", "Open", "Closed"], "record_id": ["r1", "r2", "r3"]})
+    delta._sqlite_write(df, table, columns, date_cols)
+    edited = pd.concat([df.iloc[:1], df.iloc[:1].assign(record_id="r9", circular_description="new"),
+                              df.iloc[1:]], ignore_index=True)
+    edited.loc[3, "status"] = "Open"
+    delta._sqlite_write(edited, table, columns, date_cols)
+    stored = delta._sqlite_read(table, columns, date_cols)
+    assert delta._sqlite_rows(stored, columns, date_cols) == delta._sqlite_rows(edited, columns, date_cols)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+
+def _frame():
+    return pd.DataFrame({"team": ["DP", None, "DP", "EAGLE"],
+                         "severity": ["High", "Low", "Low", "High"],
+                         "status": ["Open", "Open", None, "Closed"]})
+
+
+def _assert_matches(delta, index, df):
+    """The edited index selects the same rows as one built from scratch."""
+    fresh = delta.build_value_index(df)
+    assert index["rows"] == fresh["rows"] == len(df)
+    for col, by_value in fresh["bitmaps"].items():
+        for value, bits in by_value.items():
+            assert np.array_equal(index["bitmaps"][col][value], bits), (col, value)
+        for value in index["bitmaps"][col].keys() - by_value.keys():
+            assert not index["bitmaps"][col][value].any(), (col, value)
+
+
+def test_filter_rows_ors_values_and_ands_columns(delta):
+    index = delta.build_value_index(_frame())
+    assert delta.filter_rows(index, {"team": ["DP", "EAGLE"], "severity": ["High"]}).tolist() == [0, 3]
+    assert delta.filter_rows(index, {"team": [], "status": ["Open"]}).tolist() == [0, 1]
+    assert delta.filter_rows(index, {"status": [None]}).tolist() == [2]
+
+
+def test_index_counts_leaves_out_missing_values(delta):
+    index = delta.build_value_index(_frame())
+    assert delta.index_counts(index, "team").to_dict() == {"DP": 2, "EAGLE": 1}
+    assert delta.index_counts(index, "team", include_missing=True).sum() == 4
+    high = delta.index_mask(index, "severity", ["High"])
+    assert delta.index_counts(index, "team", high).to_dict() == {"DP": 1, "EAGLE": 1}
+
+
+def test_index_append(delta):
+    df = _frame()
+    row = {"team": "BROKING", "severity": "High", "status": None}
+    index = delta.index_append(delta.build_value_index(df), row)
+    _assert_matches(delta, index, pd.concat([df, pd.DataFrame([row])], ignore_index=True))
+
+
+def test_index_set(delta):
+    df = _frame()
+    index = delta.index_set(delta.build_value_index(df), 2, {"status": "Closed", "team": "BROKING",
+                                                            "issue_description": "not indexed"})
+    df.loc[2, ["status", "team"]] = ["Closed", "BROKING"]
+    _assert_matches(delta, index, df)
+
+
+def test_index_keep(delta):
+    df = _frame()
+    keep = np.array([True, False, True, False])
+    index = delta.index_keep(delta.build_value_index(df), keep)
+    _assert_matches(delta, index, df[keep].reset_index(drop=True))
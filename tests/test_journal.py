@@ -0,0 +1,63 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+
+
+def _ops_frame(delta, ids, statuses):
+    return pd.DataFrame({
+        "team": "DP", "issue_description": [f"issue {rid}" for rid in ids],
+        "issue_date": pd.Timestamp("2026-01-05"), "reported_to": "", "severity": "High",
+        "status": statuses, "record_id": ids})[delta.OPS_COLUMNS]
+
+
+def _created(rid, status="Open"):
+    return {"row": {"team": "EAGLE", "issue_description": f"issue {rid}", "issue_date": "2026-03-01",
+                    "reported_to": "", "severity": "Low", "status": status, "record_id": rid}}
+
+
+def _events():
+    return [(1, "create", ["r3"], _created("r3")),
+            (2, "status", ["r1"], {"from": "Open", "to": "Closed"}),
+            (3, "delete", ["r2"], {"rows": []}),
+            (4, "status", ["r3"], {"from": "Open", "to": "In Progress"})]
+
+
+def test_apply_events_replays_onto_snapshot(delta):
+    _, columns, date_cols = delta.SQL_DATASETS["ops"]
+    snapshot = _ops_frame(delta, ["r1", "r2"], ["Open", "Open"])
+    df = delta.apply_events(snapshot, _events(), columns, date_cols)
+    assert df["record_id"].tolist() == ["r1", "r3"]
+    assert df["status"].tolist() == ["Closed", "In Progress"]
+    assert df.loc[1, "issue_date"] == pd.Timestamp("2026-03-01")
+    # Events are idempotent: replaying them onto the result changes nothing
+    assert delta.apply_events(df, _events(), columns, date_cols).equals(df)
+
+
+def test_compact_journal_folds_tail_into_snapshot(delta):
+    table, columns, date_cols = delta.SQL_DATASETS["ops"]
+    store_path, csv_path = delta.LOCAL_FILES["ops"]
+    delta._local_write(_ops_frame(delta, ["r1", "r2"], ["Open", "Open"]),
+                       table, store_path, csv_path, columns, date_cols)
+    con = delta._sqlite_conn()
+    for _, kind, ids, payload in _events():
+        delta.journal_append(table, kind, ids, payload)
+    assert len(delta._journal_tail(con, table)) == 4
+    replayed = delta._local_read(table, store_path, csv_path, columns, date_cols)
+    assert replayed["record_id"].tolist() == ["r1", "r3"]
+
+    delta.compact_journal("ops")
+    assert delta._journal_tail(con, table) == []
+    snapshot = delta._sqlite_read(table, columns, date_cols)
+    assert delta._sqlite_rows(snapshot, columns, date_cols) == delta._sqlite_rows(replayed, columns, date_cols)
+    # The events stay in the journal as the audit trail
+    kinds = [k for k, in con.execute("SELECT kind FROM _journal WHERE dataset = ? ORDER BY seq", (table,))]
+    assert kinds[-4:] == ["create", "status", "delete", "status"]
+
+
+def test_journal_append_stamps_ist(delta):
+    table = delta.SQL_DATASETS["task"][0]
+    seq = delta.journal_append(table, "delete", ["r1"], {"rows": []})
+    at, ids = delta._sqlite_conn().execute("SELECT at, record_ids FROM _journal WHERE seq = ?", (seq,)).fetchone()
+    assert datetime.fromisoformat(at).utcoffset() == delta.IST.utcoffset(None)
+    assert json.loads(ids) == ["r1"]
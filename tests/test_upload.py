@@ -0,0 +1,44 @@
+import pandas as pd
+
+
+def _ops_upload(**overrides):
+    raw = {"Team": [" dp", "eagle"], "Issue Description": ["x", "y"],
+           "issue_date": ["05-01-2026", "2026-02-01"], "reported_to": ["a", None],
+           "severity": ["high", "LOW"], "status": ["open", "in progress"]}
+    return pd.DataFrame({**raw, **overrides})
+
+
+def test_validate_bulk_normalises_a_clean_upload(delta):
+    clean, errors, problems = delta.validate_bulk("ops", _ops_upload())
+    assert errors == [] and problems.empty
+    assert list(clean.columns) == delta.OPS_COLUMNS
+    assert clean["team"].tolist() == ["DP", "EAGLE"]
+    assert clean["severity"].tolist() == ["High", "Low"]
+    assert clean["status"].tolist() == ["Open", "In Progress"]
+    assert clean["issue_date"].tolist() == [pd.Timestamp("2026-01-05"), pd.Timestamp("2026-02-01")]
+    assert clean["reported_to"].tolist() == ["a", ""]
+    assert clean["record_id"].nunique() == 2
+
+
+def test_validate_bulk_reports_every_bad_cell_by_sheet_row(delta):
+    clean, errors, problems = delta.validate_bulk(
+        "ops", _ops_upload(Team=["dp", "XX"], issue_date=["bad", "2026-02-01"]), first_row=10)
+    assert clean is None
+    assert len(errors) == 2
+    assert sorted(zip(problems["row"], problems["column"], problems["problem"])) == [
+        (10, "issue_date", "date"), (11, "team", "enum")]
+
+
+def test_validate_bulk_missing_column(delta):
+    clean, errors, _ = delta.validate_bulk("ops", _ops_upload().drop(columns="status"))
+    assert clean is None
+    assert errors[0] == "Missing required columns: ['status']"
+
+
+def test_validate_bulk_column_aliases(delta):
+    raw = pd.DataFrame({"team": ["DP"], "Circular_No_description": ["c"], "issue_date": ["01-01-2026"],
+                        "reported_to": [""], "severity": ["High"], "status": ["Open"]})
+    clean, errors, _ = delta.validate_bulk("circ", raw)
+    assert errors == []
+    assert clean["circular_description"].tolist() == ["c"]
+    assert clean["due_date"].tolist() == [pd.Timestamp("2026-01-01")]